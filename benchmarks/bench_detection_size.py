@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark latensi dan recall untuk batas ukuran deteksi (max_detection_size)
+Copyright (c) 2025, Ahmad Fadlilah (https://github.com/ahmadfadlilah)
+
+Gambar uji berisi satu wajah per petak grid. Recall adalah bagian wajah yang
+ditemukan (IoU >= 0.5); kolom "sama" adalah bagian kotak hasil resolusi penuh
+yang juga ditemukan setelah gambar diperkecil.
+
+Jalankan dari root repositori:
+    python benchmarks/bench_detection_size.py --width 2400 --caps 640 960 1280
+"""
+
+import argparse
+import os
+
+import cv2
+
+from common import box_recall, load_detector, make_group_image, percentile, time_calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--width', type=int, default=2400, help='Lebar gambar uji (piksel)')
+    parser.add_argument('--grid', type=int, default=3, help='Jumlah wajah per baris/kolom pada gambar uji')
+    parser.add_argument('--caps', type=int, nargs='+', default=[480, 640, 960, 1280],
+                        help='Nilai max_detection_size yang diuji')
+    parser.add_argument('--profile', default='upload-accurate', help='Profil deteksi')
+    parser.add_argument('--repeat', type=int, default=3, help='Jumlah pengulangan per konfigurasi')
+    args = parser.parse_args()
+
+    image, truth = make_group_image(args.width, args.grid)
+    print(f"Gambar uji {image.shape[1]}x{image.shape[0]}, profil: {args.profile}, CPU: {os.cpu_count()}, "
+          f"thread OpenCV: {cv2.getNumThreads()}")
+    print(f"{'batas':>8} {'p50':>10} {'p95':>10} {'kotak':>6} {'recall':>7} {'sama':>6} {'speedup':>8}")
+
+    baseline = None
+    reference = None
+    for cap in [None] + sorted(args.caps, reverse=True):
+        detector = load_detector(max_detection_size=cap)
+        faces = detector.detect(image, args.profile)
+        # Resolusi penuh hanya diukur sekali karena paling lambat
+        durations = time_calls(lambda: detector.detect(image, args.profile),
+                               1 if cap is None else args.repeat, warmup=0)
+
+        p50 = percentile(durations, 50)
+        if cap is None:
+            baseline, reference = p50, faces
+        label = 'penuh' if cap is None else str(cap)
+        print(f"{label:>8} {p50 * 1e3:8.1f}ms {percentile(durations, 95) * 1e3:8.1f}ms "
+              f"{len(faces):>6} {box_recall(truth, faces):7.2f} {box_recall(reference, faces):6.2f} "
+              f"{baseline / p50:7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Microbenchmark Non-Maximum Suppression: merge_faces vektor vs loop Python lama
+Copyright (c) 2025, Ahmad Fadlilah (https://github.com/ahmadfadlilah)
+
+Jalankan dari root repositori:
+    python benchmarks/bench_nms.py
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.nms import merge_faces, merge_faces_reference
+
+
+def make_candidates(count, seed=0, image_size=1920):
+    """Buat kandidat kotak yang berkelompok seperti keluaran ensemble enam cascade"""
+    rng = np.random.default_rng(seed)
+    centers = rng.integers(0, image_size, size=(max(1, count // 6), 2))
+    picks = centers[rng.integers(0, len(centers), size=count)]
+    sizes = rng.integers(24, 160, size=count)
+    jitter = rng.integers(-12, 13, size=(count, 2))
+    xy = np.clip(picks + jitter - sizes[:, None] // 2, 0, image_size)
+    faces = np.column_stack([xy, sizes, sizes]).astype(np.int32)
+    # Pecah menjadi enam bagian, satu per pass cascade
+    return np.array_split(faces, 6)
+
+
+def measure(func, faces_list, budget=1.0):
+    """Waktu rata-rata per panggilan (detik) dengan jumlah pengulangan adaptif"""
+    timer = timeit.Timer(lambda: func(faces_list))
+    number, elapsed = timer.autorange()
+    repeat = max(1, min(5, int(budget / max(elapsed, 1e-9))))
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000, 10000],
+                        help='Jumlah kandidat kotak yang diuji')
+    parser.add_argument('--skip-reference-above', type=int, default=10000,
+                        help='Lewati loop lama untuk ukuran di atas nilai ini (terlalu lambat)')
+    args = parser.parse_args()
+
+    print(f"{'kandidat':>10} {'disimpan':>9} {'loop lama':>14} {'vektor':>14} {'speedup':>9}")
+    for count in args.sizes:
+        faces_list = make_candidates(count)
+        new_time = measure(merge_faces, faces_list)
+        kept = len(merge_faces(faces_list))
+
+        if count <= args.skip_reference_above:
+            expected = merge_faces_reference(faces_list)
+            assert np.array_equal(expected, merge_faces(faces_list)), "Hasil NMS berbeda!"
+            ref_time = measure(merge_faces_reference, faces_list)
+            ref_text = f"{ref_time * 1e3:11.3f} ms"
+            speedup = f"{ref_time / new_time:8.1f}x"
+        else:
+            ref_text = f"{'-':>14}"
+            speedup = f"{'-':>9}"
+
+        print(f"{count:>10} {kept:>9} {ref_text} {new_time * 1e3:11.3f} ms {speedup}")
+
+
+if __name__ == '__main__':
+    main()
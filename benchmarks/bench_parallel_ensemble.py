@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark latensi per permintaan untuk ensemble cascade paralel (profil upload-accurate)
+Copyright (c) 2025, Ahmad Fadlilah (https://github.com/ahmadfadlilah)
+
+Jalankan dari root repositori:
+    python benchmarks/bench_parallel_ensemble.py --workers 1 2 4 8
+"""
+
+import argparse
+import os
+
+import cv2
+
+from common import load_detector, load_sample, percentile, time_calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8],
+                        help='Jumlah pekerja ensemble yang diuji')
+    parser.add_argument('--width', type=int, default=640, help='Lebar gambar uji (piksel)')
+    parser.add_argument('--repeat', type=int, default=10, help='Jumlah pengulangan per konfigurasi')
+    parser.add_argument('--cv-threads', type=int, default=None,
+                        help='Batasi thread internal OpenCV (cv2.setNumThreads) agar tidak oversubscription')
+    args = parser.parse_args()
+
+    if args.cv_threads is not None:
+        cv2.setNumThreads(args.cv_threads)
+
+    image = load_sample(args.width)
+    print(f"Gambar uji {image.shape[1]}x{image.shape[0]}, CPU: {os.cpu_count()}, "
+          f"thread OpenCV: {cv2.getNumThreads()}")
+    print(f"{'pekerja':>8} {'p50':>10} {'p95':>10} {'wajah':>6} {'speedup':>8}")
+
+    baseline = None
+    for workers in args.workers:
+        detector = load_detector(max_workers=workers)
+        faces = detector.detect(image)
+        durations = time_calls(lambda: detector.detect(image), args.repeat)
+        detector.close()
+
+        p50 = percentile(durations, 50)
+        if baseline is None:
+            baseline = p50
+        print(f"{workers:>8} {p50 * 1e3:8.1f}ms {percentile(durations, 95) * 1e3:8.1f}ms "
+              f"{len(faces):>6} {baseline / p50:7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Uji beban throughput /upload pada server prefork dengan 1, 2, 4, ... worker
+Copyright (c) 2025, Ahmad Fadlilah (https://github.com/ahmadfadlilah)
+
+Untuk setiap jumlah worker, `src/serve.py` dijalankan sebagai proses terpisah
+dan sejumlah klien tetap mengirim POST /upload?mode=boxes tanpa jeda (satu
+koneksi per permintaan agar tersebar ke semua worker) selama beberapa detik.
+Dilaporkan throughput, latensi p50/p95/p99, dan memori: PSS total semua proses
+serta memori privat per worker (bagian yang tidak dibagi copy-on-write dengan
+master). Respons 503 dari admission control dihitung sebagai penolakan dan
+klien menunggu sesuai header Retry-After sebelum mencoba lagi.
+
+Jalankan dari root repositori:
+    python benchmarks/bench_prefork.py
+    python benchmarks/bench_prefork.py --workers 1 2 4 8 --clients 16 --output hasil.json
+    python benchmarks/bench_prefork.py --workers 1 --clients 16 --upload-concurrency 0   # tanpa admission control
+"""
+
+import argparse
+import http.client
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import cv2
+
+from common import REPO_ROOT, load_sample, percentile
+
+
+def multipart(image_bytes):
+    boundary = 'bench-boundary'
+    body = (f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="wajah.jpg"\r\n'
+            'Content-Type: image/jpeg\r\n\r\n').encode() + image_bytes + f'\r\n--{boundary}--\r\n'.encode()
+    return body, {'Content-Type': f'multipart/form-data; boundary={boundary}', 'Connection': 'close'}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def children(pid):
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as f:
+            return [int(child) for child in f.read().split()]
+    except OSError:
+        return []
+
+
+def memory_mb(pid):
+    """(PSS, memori privat) proses dalam MB dari /proc/<pid>/smaps_rollup (hanya Linux)"""
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            fields = {line.split(':')[0]: int(line.split()[1]) for line in f if line.split()[-1:] == ['kB']}
+    except OSError:
+        return None, None
+    private = fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)
+    return fields.get('Pss', 0) / 1024, private / 1024
+
+
+def wait_ready(port, server, workers, timeout=120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("Server berhenti sebelum siap")
+        if len(children(server.pid)) >= workers:
+            try:
+                connection = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+                connection.request('GET', '/cascades')
+                if json.loads(connection.getresponse().read()).get('loaded'):
+                    return
+            except OSError:
+                pass
+        time.sleep(0.5)
+    raise RuntimeError(f"Server di port {port} tidak siap dalam {timeout} detik")
+
+
+def load(port, clients, duration, body, headers):
+    """Klien tanpa jeda selama `duration` detik. Mengembalikan (latensi sukses, jumlah gagal, jumlah ditolak, detik)."""
+    latencies = []
+    failures = [0]
+    rejected = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client():
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                connection = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+                connection.request('POST', '/upload?mode=boxes', body, headers)
+                response = connection.getresponse()
+                response.read()
+                status = response.status
+                connection.close()
+            except OSError:
+                status = None
+            with lock:
+                if status == 200:
+                    latencies.append(time.perf_counter() - start)
+                elif status == 503:
+                    rejected[0] += 1
+                else:
+                    failures[0] += 1
+            if status == 503:
+                time.sleep(float(response.headers.get('Retry-After', 1)))
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, failures[0], rejected[0], time.perf_counter() - start
+
+
+def bench_workers(workers, args, body, headers):
+    port = free_port()
+    env = dict(os.environ, FACE_RESULT_CACHE_MB='0', FACE_EAGER_LOAD='1')
+    if args.upload_concurrency is not None:
+        env['FACE_UPLOAD_CONCURRENCY'] = str(args.upload_concurrency)
+    server = subprocess.Popen([sys.executable, os.path.join('src', 'serve.py'), '--workers', str(workers),
+                               '--port', str(port)], cwd=REPO_ROOT, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_ready(port, server, workers)
+        # Pemanasan: setiap worker melayani beberapa permintaan sebelum diukur
+        load(port, args.clients, args.warmup, body, headers)
+        latencies, failures, rejected, elapsed = load(port, args.clients, args.duration, body, headers)
+
+        pids = [server.pid] + children(server.pid)
+        memory = [memory_mb(pid) for pid in pids]
+        worker_private = [private for _, private in memory[1:] if private is not None]
+        return {
+            "workers": workers,
+            "clients": args.clients,
+            "requests": len(latencies),
+            "failures": failures,
+            "rejected": rejected,
+            "throughput_rps": round(len(latencies) / elapsed, 2),
+            "p50_ms": round(percentile(latencies, 50) * 1000, 1) if latencies else None,
+            "p95_ms": round(percentile(latencies, 95) * 1000, 1) if latencies else None,
+            "p99_ms": round(percentile(latencies, 99) * 1000, 1) if latencies else None,
+            "total_pss_mb": round(sum(pss for pss, _ in memory if pss is not None), 1),
+            "master_pss_mb": round(memory[0][0], 1) if memory[0][0] is not None else None,
+            "worker_private_mb": round(sum(worker_private) / len(worker_private), 1) if worker_private else None,
+        }
+    finally:
+        server.send_signal(signal.SIGTERM)
+        try:
+            server.wait(30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4], help='Jumlah worker yang diukur')
+    parser.add_argument('--clients', type=int, default=8, help='Jumlah klien bersamaan')
+    parser.add_argument('--duration', type=float, default=20, help='Lama pengukuran per jumlah worker (detik)')
+    parser.add_argument('--warmup', type=float, default=3, help='Lama pemanasan sebelum diukur (detik)')
+    parser.add_argument('--image-width', type=int, default=640, help='Lebar gambar unggahan')
+    parser.add_argument('--upload-concurrency', type=int,
+                        help='FACE_UPLOAD_CONCURRENCY untuk server (0 = tanpa admission control)')
+    parser.add_argument('--output', help='Simpan hasil sebagai JSON di path ini')
+    args = parser.parse_args()
+
+    flag, encoded = cv2.imencode('.jpg', load_sample(args.image_width))
+    body, headers = multipart(encoded.tobytes())
+
+    results = []
+    baseline = None
+    for workers in args.workers:
+        result = bench_workers(workers, args, body, headers)
+        baseline = baseline or result['throughput_rps']
+        result["speedup"] = round(result['throughput_rps'] / baseline, 2) if baseline else None
+        results.append(result)
+        print(f"worker {workers:2d}  {result['throughput_rps']:6.2f} req/s  (x{result['speedup']})  "
+              f"p50 {result['p50_ms']} ms  p99 {result['p99_ms']} ms  gagal {result['failures']}  "
+              f"ditolak {result['rejected']}  "
+              f"PSS total {result['total_pss_mb']} MB  privat/worker {result['worker_private_mb']} MB")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({"cpu_count": os.cpu_count(), "args": vars(args), "results": results}, f, indent=2)
+        print(f"Hasil disimpan di {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,444 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Suite benchmark pipeline upload dan live dengan hasil JSON dan pembanding baseline
+Copyright (c) 2025, Ahmad Fadlilah (https://github.com/ahmadfadlilah)
+
+Suite ini menjalankan kode aplikasi yang sebenarnya, bukan mock:
+- upload: POST /upload (view `upload_image` lewat test client Flask) untuk
+  korpus gambar dengan beberapa resolusi dan jumlah wajah
+- live: loop deteksi live (`CameraSession.run`) dengan klip video (VideoFileSource) sebagai
+  pengganti webcam, diputar pada FPS aslinya, dan satu penonton /video_feed
+
+Korpus dan klip dibuat secara deterministik dari benchmarks/data/astronaut.jpg,
+jadi tidak membutuhkan webcam, layar, atau akses jaringan. Untuk setiap kasus
+dilaporkan latensi p50/p95/p99, throughput, latensi per tahap (dari hook
+/metrics), puncak memori yang dilacak tracemalloc per tahap, dan puncak RSS.
+
+Jalankan dari root repositori:
+    python benchmarks/bench_suite.py --output hasil.json
+    python benchmarks/bench_suite.py --baseline hasil.json --threshold 0.15
+    python benchmarks/bench_suite.py --quick
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from io import BytesIO
+
+import cv2
+import numpy as np
+
+from common import REPO_ROOT, box_recall, make_group_image, percentile, synthetic_video, textured_background
+
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from src.sources import VideoFileSource  # noqa: E402
+
+try:
+    import resource
+except ImportError:
+    # Tidak tersedia di Windows; puncak RSS tidak dilaporkan
+    resource = None
+
+# Format file hasil; naikkan jika struktur JSON berubah
+RESULT_VERSION = 1
+
+# Korpus upload: (lebar gambar, wajah per baris/kolom); 0 = latar tanpa wajah
+CORPUS = [(320, 1), (640, 1), (640, 2), (640, 0), (1280, 3), (1920, 4)]
+QUICK_CORPUS = [(320, 1), (640, 2), (640, 0)]
+
+# Tahap yang membungkus tahap lain; puncak memorinya tidak bermakna sehingga tidak dicatat
+WRAPPING_STAGES = ('upload:detect', 'live:detect')
+
+
+def build_corpus(corpus):
+    """Buat gambar uji sebagai bytes JPEG. Mengembalikan list (nama, bytes, kotak ground truth)."""
+    cases = []
+    for width, grid in corpus:
+        if grid == 0:
+            image = textured_background(width, width * 3 // 4)
+            truth = np.empty((0, 4), dtype=np.int32)
+        else:
+            image, truth = make_group_image(width, grid)
+        data = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, 95])[1].tobytes()
+        cases.append((f"{image.shape[1]}x{image.shape[0]}-{len(truth)}faces", data, truth))
+    return cases
+
+
+def write_clip(path, frames, fps):
+    """Tulis klip video sintetis (MJPG) ke path. Mengembalikan kotak wajah per frame."""
+    truths = []
+    writer = None
+    try:
+        for frame, truth in synthetic_video(frames):
+            if writer is None:
+                writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), fps,
+                                         (frame.shape[1], frame.shape[0]))
+                if not writer.isOpened():
+                    raise RuntimeError("VideoWriter MJPG tidak tersedia pada build OpenCV ini")
+            writer.write(frame)
+            truths.append(truth)
+    finally:
+        if writer is not None:
+            writer.release()
+    return truths
+
+
+class StageRecorder:
+    """Kumpulkan durasi mentah per tahap (untuk persentil yang tepat) dan puncak memori tracemalloc.
+
+    Puncak memori sebuah tahap adalah puncak alokasi yang dilacak antara akhir
+    tahap sebelumnya dan akhir tahap ini, relatif terhadap alokasi saat itu.
+    Buffer internal OpenCV (C++) tidak terlacak; lihat peak_rss_mb untuk total proses.
+    """
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.memory = defaultdict(int)
+        self._base = 0
+
+    def reset(self):
+        self.samples.clear()
+        self.memory.clear()
+
+    def mark(self):
+        """Tandai awal pengukuran memori (misalnya awal permintaan)"""
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+            self._base = tracemalloc.get_traced_memory()[0]
+
+    def record(self, stage, seconds):
+        self.samples[stage].append(seconds)
+        if tracemalloc.is_tracing() and stage not in WRAPPING_STAGES:
+            current, peak = tracemalloc.get_traced_memory()
+            self.memory[stage] = max(self.memory[stage], peak - self._base)
+            tracemalloc.reset_peak()
+            self._base = current
+
+    def attach(self, web):
+        """Sambungkan ke hook metrik aplikasi: observer FaceDetector dan histogram tahap pipeline"""
+        forward_stage = web.detector.stage_observer
+
+        def detector_observer(profile, stage, seconds):
+            self.record(f"detector:{profile}:{stage}", seconds)
+            if forward_stage is not None:
+                forward_stage(profile, stage, seconds)
+
+        web.detector.stage_observer = detector_observer
+
+        histogram = web.PIPELINE_STAGE_SECONDS
+        forward_observe = histogram.observe
+
+        def observe(value, **labels):
+            self.record(f"{labels['pipeline']}:{labels['stage']}", value)
+            forward_observe(value, **labels)
+
+        histogram.observe = observe
+
+
+def summarize(durations):
+    """Statistik latensi (ms) dari daftar durasi dalam detik"""
+    if not durations:
+        return {"count": 0}
+    return {
+        "count": len(durations),
+        "mean_ms": round(float(np.mean(durations)) * 1e3, 3),
+        "p50_ms": round(percentile(durations, 50) * 1e3, 3),
+        "p95_ms": round(percentile(durations, 95) * 1e3, 3),
+        "p99_ms": round(percentile(durations, 99) * 1e3, 3),
+    }
+
+
+def stage_summary(recorder, memory=None):
+    stages = {}
+    for stage, durations in sorted(recorder.samples.items()):
+        stages[stage] = summarize(durations)
+        if memory is not None and stage in memory:
+            stages[stage]["peak_traced_kb"] = round(memory[stage] / 1024, 1)
+    return stages
+
+
+def post_upload(client, name, data, mode):
+    return client.post(f'/upload?mode={mode}', data={'file': (BytesIO(data), name + '.jpg')},
+                       content_type='multipart/form-data')
+
+
+def bench_upload(web, recorder, cases, repeat, warmup, mode, measure_memory):
+    """Latensi permintaan /upload per gambar korpus"""
+    client = web.app.test_client()
+    results = {}
+    for name, data, truth in cases:
+        for _ in range(warmup):
+            post_upload(client, name, data, mode)
+
+        recorder.reset()
+        durations = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            response = post_upload(client, name, data, mode)
+            durations.append(time.perf_counter() - start)
+            if response.status_code != 200 or not response.get_json()['success']:
+                raise RuntimeError(f"/upload gagal untuk {name}: {response.get_data(as_text=True)[:200]}")
+        samples = {stage: list(values) for stage, values in recorder.samples.items()}
+
+        # Satu permintaan tambahan di bawah tracemalloc untuk puncak memori (tidak ikut latensi)
+        peak_kb = None
+        memory = None
+        if measure_memory:
+            recorder.reset()
+            tracemalloc.start()
+            try:
+                recorder.mark()
+                post_upload(client, name, data, mode)
+                peak_kb = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+                memory = dict(recorder.memory)
+            finally:
+                tracemalloc.stop()
+
+        # Kotak wajah untuk recall diambil dari mode boxes (tidak ikut latensi)
+        faces = post_upload(client, name, data, 'boxes').get_json()['faces']
+
+        recorder.reset()
+        recorder.samples.update(samples)
+        results[f"upload/{name}"] = {
+            "kind": "upload",
+            "mode": mode,
+            "bytes": len(data),
+            "faces": len(faces),
+            "expected_faces": len(truth),
+            "recall": round(box_recall(truth, faces), 3),
+            "latency": summarize(durations),
+            "throughput_per_s": round(len(durations) / sum(durations), 3),
+            "peak_traced_kb": peak_kb,
+            "stages": stage_summary(recorder, memory),
+        }
+        print_result(f"upload/{name}", results[f"upload/{name}"])
+    return results
+
+
+def bench_live(web, recorder, frames, fps, realtime=True):
+    """FPS dan latensi per frame loop deteksi live (`CameraSession.run`) dengan klip video sebagai kamera"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'clip.avi')
+        write_clip(path, frames, fps)
+
+        durations = []
+        process_live_frame = web.process_live_frame
+
+        def timed_process_live_frame(tracker, frame, session):
+            start = time.perf_counter()
+            process_live_frame(tracker, frame, session)
+            durations.append(time.perf_counter() - start)
+
+        web.process_live_frame = timed_process_live_frame
+        session = web.create_session('bench', path, None)
+        session.camera = VideoFileSource(path, realtime=realtime, fps=fps)
+        recorder.reset()
+
+        # Satu penonton agar encode JPEG /video_feed ikut terukur
+        viewer_frames = []
+        session.broadcaster.open()
+        viewer = threading.Thread(
+            target=lambda: viewer_frames.extend(len(jpeg) for jpeg in session.broadcaster.frames()))
+        viewer.start()
+
+        session.running = True
+        start = time.perf_counter()
+        try:
+            session.run()
+        finally:
+            elapsed = time.perf_counter() - start
+            web.process_live_frame = process_live_frame
+            # run() melepaskan sumber sendiri saat klip habis
+            session.stop()
+            viewer.join()
+
+    stats = session.capture.stats()
+    result = {
+        "kind": "live",
+        "frames": frames,
+        "clip_fps": fps,
+        "realtime": realtime,
+        "captured": stats["captured"],
+        "processed": stats["processed"],
+        "dropped": stats["dropped"],
+        "fps": round(stats["processed"] / elapsed, 3),
+        "viewer_frames": len(viewer_frames),
+        "latency": summarize(durations),
+        "throughput_per_s": round(len(durations) / sum(durations), 3) if durations else 0.0,
+        "stages": stage_summary(recorder),
+    }
+    print_result("live/clip", result)
+    return {"live/clip": result}
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    # ru_maxrss dalam KB di Linux, dalam bytes di macOS
+    scale = 1 if sys.platform == 'darwin' else 1024
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / (1024 * 1024), 1)
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "opencv": cv2.__version__,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "opencv_threads": cv2.getNumThreads(),
+    }
+
+
+def print_result(name, result):
+    latency = result["latency"]
+    extra = (f"fps {result['fps']:.1f}, dibuang {result['dropped']}" if result["kind"] == "live"
+             else f"wajah {result['faces']}/{result['expected_faces']}, recall {result['recall']:.2f}")
+    print(f"{name:<32} p50 {latency['p50_ms']:9.1f}ms  p95 {latency['p95_ms']:9.1f}ms  "
+          f"p99 {latency['p99_ms']:9.1f}ms  {result['throughput_per_s']:7.2f}/s  {extra}")
+
+
+def compare(current, baseline, threshold, min_ms=5.0):
+    """Bandingkan hasil dengan baseline. Mengembalikan list regresi (deskripsi teks).
+
+    Regresi: p50/p95 kasus atau p50 tahap (>= min_ms pada baseline) naik lebih
+    dari `threshold`, atau throughput/FPS turun lebih dari `threshold`.
+    """
+    regressions = []
+
+    def check(name, label, old, new, higher_is_worse=True):
+        if not old or new is None:
+            return
+        change = new / old - 1
+        worse = change > threshold if higher_is_worse else -change > threshold
+        marker = 'REGRESI' if worse else ''
+        print(f"  {label:<60} {old:10.2f} -> {new:10.2f} ({change:+7.1%}) {marker}")
+        if worse:
+            regressions.append(f"{name} {label}: {old:.2f} -> {new:.2f} ({change:+.1%})")
+
+    if baseline.get("environment") != current["environment"]:
+        print("Peringatan: lingkungan baseline berbeda; perbandingan mungkin tidak sebanding.")
+    if baseline.get("config") != current["config"]:
+        print("Peringatan: konfigurasi baseline berbeda (korpus, pengulangan, klip, atau variabel FACE_*).")
+
+    for name, result in current["results"].items():
+        old = baseline.get("results", {}).get(name)
+        if old is None:
+            print(f"{name}: tidak ada di baseline")
+            continue
+        print(name)
+        for metric in ('p50_ms', 'p95_ms'):
+            check(name, metric, old["latency"].get(metric), result["latency"].get(metric))
+        check(name, "throughput_per_s", old.get("throughput_per_s"), result.get("throughput_per_s"),
+              higher_is_worse=False)
+        if result["kind"] == "live":
+            check(name, "fps", old.get("fps"), result.get("fps"), higher_is_worse=False)
+        for stage, stats in result["stages"].items():
+            old_stats = old.get("stages", {}).get(stage, {})
+            if old_stats.get("p50_ms", 0) >= min_ms:
+                check(name, f"{stage} p50_ms", old_stats["p50_ms"], stats.get("p50_ms"))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3, help='Jumlah permintaan terukur per gambar korpus')
+    parser.add_argument('--warmup', type=int, default=1, help='Permintaan pemanasan per gambar (tidak diukur)')
+    parser.add_argument('--mode', default='full', help='Mode respons /upload yang diukur')
+    parser.add_argument('--clip-frames', type=int, default=90, help='Jumlah frame klip video live')
+    parser.add_argument('--clip-fps', type=float, default=15, help='FPS asli klip video live')
+    parser.add_argument('--clip-fast', action='store_true',
+                        help='Putar klip secepat mungkin tanpa membuang frame (throughput deterministik)')
+    parser.add_argument('--quick', action='store_true', help='Korpus kecil, 2 pengulangan, klip 30 frame')
+    parser.add_argument('--skip-upload', action='store_true', help='Lewati benchmark upload')
+    parser.add_argument('--skip-live', action='store_true', help='Lewati benchmark live')
+    parser.add_argument('--no-memory', action='store_true', help='Lewati pengukuran memori tracemalloc')
+    parser.add_argument('--output', help='Simpan hasil sebagai JSON di path ini')
+    parser.add_argument('--baseline', help='Bandingkan dengan file JSON hasil sebelumnya')
+    parser.add_argument('--threshold', type=float, default=0.15,
+                        help='Batas regresi relatif (0.15 = lebih lambat 15%%); exit code 1 jika terlampaui')
+    args = parser.parse_args()
+
+    corpus = CORPUS
+    if args.quick:
+        corpus = QUICK_CORPUS
+        args.repeat = min(args.repeat, 2)
+        args.clip_frames = min(args.clip_frames, 30)
+
+    # Konfigurasi aplikasi dibaca saat import: tanpa cache hasil (setiap permintaan dideteksi
+    # ulang), metrik aktif untuk hook per tahap, dan pemuatan detektor yang diukur di sini
+    os.environ['FACE_RESULT_CACHE_MB'] = '0'
+    os.environ['FACE_METRICS'] = '1'
+    os.environ['FACE_EAGER_LOAD'] = '0'
+    import src.app as web
+
+    start = time.perf_counter()
+    if not web.load_detector():
+        raise RuntimeError("Gagal memuat cascade")
+    load_ms = round((time.perf_counter() - start) * 1e3, 1)
+
+    recorder = StageRecorder()
+    recorder.attach(web)
+
+    report = {
+        "version": RESULT_VERSION,
+        "created": datetime.datetime.now().isoformat(timespec='seconds'),
+        "environment": environment(),
+        "config": {
+            "repeat": args.repeat,
+            "warmup": args.warmup,
+            "mode": args.mode,
+            "corpus": [list(item) for item in corpus],
+            "clip_frames": args.clip_frames,
+            "clip_fps": args.clip_fps,
+            "clip_realtime": not args.clip_fast,
+            "max_detection_size": web.app.config['MAX_DETECTION_SIZE'],
+            "ensemble_workers": web.app.config['ENSEMBLE_WORKERS'],
+            "tracking_interval": web.app.config['TRACKING_INTERVAL'],
+            "target_fps": web.app.config['TARGET_FPS'],
+        },
+        "load_ms": load_ms,
+        "results": {},
+    }
+    print(f"Detektor dimuat dalam {load_ms} ms, CPU: {os.cpu_count()}, thread OpenCV: {cv2.getNumThreads()}")
+
+    if not args.skip_upload:
+        report["results"].update(bench_upload(web, recorder, build_corpus(corpus), args.repeat, args.warmup,
+                                              args.mode, not args.no_memory))
+    if not args.skip_live:
+        report["results"].update(bench_live(web, recorder, args.clip_frames, args.clip_fps,
+                                            realtime=not args.clip_fast))
+    report["peak_rss_mb"] = peak_rss_mb()
+    print(f"Puncak RSS: {report['peak_rss_mb']} MB")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Hasil disimpan di {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"\nPerbandingan dengan {args.baseline} (batas {args.threshold:.0%}):")
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regresi melebihi batas:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\nTidak ada regresi.")
+
+
+if __name__ == '__main__':
+    main()
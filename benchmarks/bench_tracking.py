@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark FPS loop live dengan pelacakan antar keyframe (FaceTracker)
+Copyright (c) 2025, Ahmad Fadlilah (https://github.com/ahmadfadlilah)
+
+Video sintetis 640x480: potret contoh bergerak perlahan di atas latar bertekstur.
+Recall adalah bagian frame yang wajahnya ditemukan (IoU >= 0.5).
+
+Jalankan dari root repositori:
+    python benchmarks/bench_tracking.py --intervals 1 5 10
+    python benchmarks/bench_tracking.py --intervals 5 --target-fps 10 20
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import cv2
+
+from common import REPO_ROOT, box_recall, load_detector, percentile, synthetic_video
+
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from src.scheduler import EnhancedScheduler  # noqa: E402
+from src.tracking import FaceTracker  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--intervals', type=int, nargs='+', default=[1, 5, 10],
+                        help='Interval keyframe yang diuji (1 = deteksi penuh setiap frame)')
+    parser.add_argument('--frames', type=int, default=120, help='Jumlah frame video sintetis')
+    parser.add_argument('--target-fps', type=float, nargs='*', default=[],
+                        help='Uji juga EnhancedScheduler dengan target FPS ini (selain interval tetap)')
+    parser.add_argument('--no-spread', action='store_true',
+                        help='Jalankan semua pass yang ditingkatkan dalam satu frame')
+    args = parser.parse_args()
+
+    video = list(synthetic_video(args.frames))
+    detector = load_detector()
+    print(f"Video sintetis {len(video)} frame 640x480, CPU: {os.cpu_count()}, "
+          f"thread OpenCV: {cv2.getNumThreads()}")
+    print(f"{'interval':>8} {'target':>7} {'fps':>8} {'ms/frame':>9} {'p95':>9} {'keyframe':>9} "
+          f"{'hilang':>7} {'recall':>7} {'speedup':>8}")
+
+    baseline = None
+    for interval in args.intervals:
+        for target_fps in [None] + list(args.target_fps):
+            scheduler = None
+            if target_fps:
+                scheduler = EnhancedScheduler(detector, target_fps=target_fps, spread=not args.no_spread)
+            tracker = FaceTracker(detector, keyframe_interval=interval, scheduler=scheduler)
+            found = 0
+            durations = []
+            for frame, truth in video:
+                start = time.perf_counter()
+                faces = tracker.update(frame)
+                durations.append(time.perf_counter() - start)
+                found += box_recall(truth[None, :], faces)
+
+            fps = len(durations) / sum(durations)
+            if baseline is None:
+                baseline = fps
+            label = f"{target_fps:g}" if target_fps else 'tetap'
+            print(f"{interval:>8} {label:>7} {fps:8.1f} {1e3 / fps:8.1f}ms {percentile(durations, 95) * 1e3:8.1f}ms "
+                  f"{tracker.keyframes:>9} {tracker.lost_tracks:>7} {found / len(video):7.2f} {fps / baseline:7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Puncak memori per permintaan /upload untuk gambar beresolusi sangat tinggi
+Copyright (c) 2025, Ahmad Fadlilah (https://github.com/ahmadfadlilah)
+
+Setiap gambar (grid potret contoh, beberapa megapiksel) dikirim ke POST /upload
+lewat test client Flask. Puncak memori yang dilacak tracemalloc (termasuk
+semua array NumPy/OpenCV) diukur per permintaan untuk penerimaan hemat memori
+(`lean`, decode grayscale yang diperkecil decoder) dan jalur lama (`full`,
+satu decode BGR resolusi penuh untuk deteksi dan anotasi).
+
+Jalankan dari root repositori:
+    python benchmarks/bench_upload_memory.py
+    python benchmarks/bench_upload_memory.py --megapixels 12 48 --modes boxes full --output hasil.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from io import BytesIO
+from unittest.mock import patch
+
+import cv2
+import numpy as np
+
+from common import REPO_ROOT, box_recall, make_group_image
+
+# Tanpa batas piksel dan tanpa cache agar setiap permintaan benar-benar diproses
+os.environ.setdefault('FACE_MAX_UPLOAD_PIXELS', '0')
+os.environ.setdefault('FACE_MAX_UPLOAD_MB', '0')
+os.environ.setdefault('FACE_RESULT_CACHE_MB', '0')
+os.environ.setdefault('FACE_EAGER_LOAD', '0')
+
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+import src.app as web  # noqa: E402
+
+
+def legacy_intake():
+    """Patch jalur lama: satu gambar BGR resolusi penuh dipakai untuk deteksi lalu anotasi"""
+    decoded = {}
+
+    def decode_for_detection(data, min_side=None, max_pixels=None):
+        image = decoded['image'] = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+        return image, 1.0, 1.0
+
+    def decode_color(data):
+        return decoded['image']
+
+    return decoded, (patch.object(web, 'decode_for_detection', decode_for_detection),
+                     patch.object(web, 'decode_color', decode_color))
+
+
+def measure(client, data, mode):
+    """Satu permintaan /upload. Mengembalikan (puncak MB, detik, wajah atau None)."""
+    tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        response = client.post(f'/upload?mode={mode}', data={'file': (BytesIO(data), 'besar.jpg')},
+                               content_type='multipart/form-data')
+        seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    if response.status_code != 200:
+        raise RuntimeError(f"/upload gagal: {response.get_data()[:200]}")
+    if 'X-Faces' in response.headers:
+        # Mode jpeg/webp: bytes gambar langsung, kotak wajah di header
+        return peak / 1e6, seconds, json.loads(response.headers['X-Faces'])
+    return peak / 1e6, seconds, response.get_json().get('faces')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--megapixels', type=float, nargs='+', default=[12, 24, 48], help='Ukuran gambar (MP)')
+    parser.add_argument('--modes', nargs='+', default=['boxes', 'full'], help='Mode respons /upload')
+    parser.add_argument('--intake', choices=('lean', 'full', 'both'), default='both')
+    parser.add_argument('--output', help='Simpan hasil sebagai JSON di path ini')
+    args = parser.parse_args()
+
+    if web.detector is None and not web.load_detector():
+        raise RuntimeError("Gagal memuat cascade")
+    client = web.app.test_client()
+    intakes = ['full', 'lean'] if args.intake == 'both' else [args.intake]
+
+    results = []
+    for megapixels in args.megapixels:
+        width = int(round((megapixels * 1e6) ** 0.5))
+        image, truth = make_group_image(width)
+        data = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes()
+        del image
+        for mode in args.modes:
+            for intake in intakes:
+                decoded, patches = legacy_intake() if intake == 'full' else ({}, ())
+                for patcher in patches:
+                    patcher.start()
+                try:
+                    peak_mb, seconds, faces = measure(client, data, mode)
+                finally:
+                    for patcher in patches:
+                        patcher.stop()
+                    decoded.clear()
+                result = {
+                    "megapixels": round(width * width / 1e6, 1),
+                    "bytes": len(data),
+                    "mode": mode,
+                    "intake": intake,
+                    "peak_traced_mb": round(peak_mb, 1),
+                    "seconds": round(seconds, 3),
+                    "recall": round(box_recall(truth, faces), 3) if faces is not None else None,
+                }
+                results.append(result)
+                print(f"{result['megapixels']:5.1f} MP  {mode:<6} {intake:<5} puncak {result['peak_traced_mb']:7.1f} MB  "
+                      f"{result['seconds']:6.2f} s  recall {result['recall']}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({"cpu_count": os.cpu_count(), "args": vars(args), "results": results}, f, indent=2)
+        print(f"Hasil disimpan di {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,228 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Uji beban penonton /video_feed: server Flask berthread vs mode ASGI
+Copyright (c) 2025, Ahmad Fadlilah (https://github.com/ahmadfadlilah)
+
+Setiap server dijalankan sebagai proses terpisah dengan sumber 'synthetic'
+(tanpa webcam). Penonton MJPEG ditambahkan bertahap; untuk setiap jumlah
+penonton diukur berapa penonton yang masih menerima frame, FPS per penonton,
+latensi /upload (mode boxes) yang dikirim bersamaan, serta jumlah thread dan
+RSS proses server.
+
+Jalankan dari root repositori:
+    python benchmarks/bench_viewers.py --viewers 0 25 100
+    python benchmarks/bench_viewers.py --server asgi --viewers 200 --output hasil.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import cv2
+
+from common import REPO_ROOT, load_sample, percentile
+
+SERVERS = {
+    # Server pengembangan Werkzeug berthread: satu thread per koneksi
+    'threaded': [sys.executable, '-c',
+                 'import os, sys; sys.path.insert(0, os.getcwd()); from src.app import app; '
+                 'app.run(host="127.0.0.1", port=int(os.environ["FACE_PORT"]), threaded=True)'],
+    'asgi': [sys.executable, os.path.join('src', 'asgi.py')],
+}
+BOUNDARY = b'--frame'
+
+
+async def http_request(port, method, path, body=b'', headers=()):
+    """Permintaan HTTP/1.1 sederhana dengan Connection: close. Mengembalikan (status, body)."""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    lines = [f"{method} {path} HTTP/1.1", "Host: 127.0.0.1", "Connection: close",
+             f"Content-Length: {len(body)}", *headers]
+    writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+    data = await reader.read()
+    writer.close()
+    head, _, payload = data.partition(b'\r\n\r\n')
+    status = int(head.split(b' ', 2)[1]) if head else 0
+    if b'transfer-encoding: chunked' in head.lower():
+        payload = dechunk(payload)
+    return status, payload
+
+
+def dechunk(data):
+    body = bytearray()
+    while data:
+        size, _, data = data.partition(b'\r\n')
+        size = int(size, 16)
+        if size == 0:
+            break
+        body += data[:size]
+        data = data[size + 2:]
+    return bytes(body)
+
+
+def multipart(image_bytes):
+    boundary = 'bench-boundary'
+    body = (f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="wajah.jpg"\r\n'
+            'Content-Type: image/jpeg\r\n\r\n').encode() + image_bytes + f'\r\n--{boundary}--\r\n'.encode()
+    return body, f'Content-Type: multipart/form-data; boundary={boundary}'
+
+
+class Viewer:
+    """Satu penonton MJPEG yang menghitung frame yang diterima"""
+
+    def __init__(self, port):
+        self.port = port
+        self.frames = 0
+        self.error = None
+        self.task = None
+
+    async def run(self):
+        try:
+            reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+            writer.write(b'GET /video_feed HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: close\r\n\r\n')
+            tail = b''
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    self.error = 'ditutup'
+                    return
+                # Boundary bisa terpotong di antara dua blok data
+                chunk = tail + data
+                self.frames += chunk.count(BOUNDARY) - tail.count(BOUNDARY)
+                tail = chunk[-len(BOUNDARY):]
+        except (OSError, asyncio.IncompleteReadError) as e:
+            self.error = str(e) or type(e).__name__
+
+
+def process_stats(pid):
+    """Jumlah thread dan RSS (MB) proses dari /proc (hanya Linux)"""
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            fields = dict(line.split(':', 1) for line in f if ':' in line)
+        return int(fields['Threads']), round(int(fields['VmRSS'].split()[0]) / 1024, 1)
+    except (OSError, KeyError, ValueError):
+        return None, None
+
+
+async def wait_ready(port, timeout=120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            status, _ = await http_request(port, 'GET', '/cameras')
+            if status == 200:
+                return
+        except OSError:
+            pass
+        await asyncio.sleep(0.5)
+    raise RuntimeError(f"Server di port {port} tidak siap dalam {timeout} detik")
+
+
+async def measure(port, viewers, duration, upload_body, upload_header):
+    """Ukur penonton dan latensi unggahan selama `duration` detik"""
+    start_frames = [viewer.frames for viewer in viewers]
+    latencies = []
+    failures = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        request_start = time.perf_counter()
+        try:
+            status, _ = await http_request(port, 'POST', '/upload?mode=boxes', upload_body, [upload_header])
+        except OSError:
+            status = 0
+        if status == 200:
+            latencies.append(time.perf_counter() - request_start)
+        else:
+            failures += 1
+    elapsed = time.perf_counter() - start
+
+    received = [viewer.frames - before for viewer, before in zip(viewers, start_frames)]
+    return {
+        "viewers": len(viewers),
+        "sustained": sum(1 for count in received if count > 0),
+        "viewer_fps": round(sum(received) / len(received) / elapsed, 2) if received else None,
+        "uploads": len(latencies),
+        "upload_failures": failures,
+        "upload_p50_ms": round(percentile(latencies, 50) * 1000, 1) if latencies else None,
+        "upload_p95_ms": round(percentile(latencies, 95) * 1000, 1) if latencies else None,
+    }
+
+
+async def bench_server(name, port, viewer_counts, duration, settle, upload_body, upload_header):
+    env = dict(os.environ, FACE_SOURCE='synthetic', FACE_PORT=str(port), FACE_RESULT_CACHE_MB='0')
+    server = subprocess.Popen(SERVERS[name], cwd=REPO_ROOT, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    viewers = []
+    results = []
+    try:
+        await wait_ready(port)
+        status, _ = await http_request(port, 'POST', '/start_detection')
+        if status != 200:
+            raise RuntimeError(f"/start_detection gagal (status {status})")
+
+        for count in sorted(viewer_counts):
+            while len(viewers) < count:
+                viewer = Viewer(port)
+                viewer.task = asyncio.ensure_future(viewer.run())
+                viewers.append(viewer)
+            await asyncio.sleep(settle)
+
+            result = await measure(port, viewers, duration, upload_body, upload_header)
+            result["server_threads"], result["server_rss_mb"] = process_stats(server.pid)
+            result["server"] = name
+            results.append(result)
+            print(f"{name:<9} penonton {result['viewers']:4d}  aktif {result['sustained']:4d}  "
+                  f"fps/penonton {result['viewer_fps'] or 0:5.2f}  upload p50 {result['upload_p50_ms'] or 0:8.1f}ms  "
+                  f"p95 {result['upload_p95_ms'] or 0:8.1f}ms  gagal {result['upload_failures']}  "
+                  f"thread {result['server_threads']}  RSS {result['server_rss_mb']} MB")
+    finally:
+        for viewer in viewers:
+            viewer.task.cancel()
+        server.terminate()
+        try:
+            server.wait(10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+    return results
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+async def run(args):
+    flag, encoded = cv2.imencode('.jpg', load_sample(args.image_width))
+    upload_body, upload_header = multipart(encoded.tobytes())
+    results = []
+    for name in (['threaded', 'asgi'] if args.server == 'both' else [args.server]):
+        results += await bench_server(name, free_port(), args.viewers, args.duration, args.settle,
+                                      upload_body, upload_header)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--server', choices=('threaded', 'asgi', 'both'), default='both')
+    parser.add_argument('--viewers', type=int, nargs='+', default=[0, 25, 100],
+                        help='Jumlah penonton yang diukur (bertahap)')
+    parser.add_argument('--duration', type=float, default=15, help='Lama pengukuran per jumlah penonton (detik)')
+    parser.add_argument('--settle', type=float, default=3, help='Jeda setelah menambah penonton (detik)')
+    parser.add_argument('--image-width', type=int, default=320, help='Lebar gambar unggahan')
+    parser.add_argument('--output', help='Simpan hasil sebagai JSON di path ini')
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({"cpu_count": os.cpu_count(), "args": vars(args), "results": results}, f, indent=2)
+        print(f"Hasil disimpan di {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Utilitas bersama untuk skrip benchmark
+Copyright (c) 2025, Ahmad Fadlilah (https://github.com/ahmadfadlilah)
+"""
+
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from src.detector import FaceDetector  # noqa: E402
+from src.sources import SyntheticSource  # noqa: E402
+
+
+def load_sample(width=None, name='astronaut.jpg'):
+    """Muat gambar contoh dari benchmarks/data, opsional diubah ukurannya ke lebar tertentu"""
+    image = cv2.imread(os.path.join(DATA_DIR, name))
+    if image is None:
+        raise FileNotFoundError(f"Gambar contoh tidak ditemukan: {name}")
+    if width and width != image.shape[1]:
+        height = int(round(image.shape[0] * width / image.shape[1]))
+        interpolation = cv2.INTER_AREA if width < image.shape[1] else cv2.INTER_CUBIC
+        image = cv2.resize(image, (width, height), interpolation=interpolation)
+    return image
+
+
+# Posisi wajah [x, y, w, h] pada astronaut.jpg (512x512) sebagai ground truth
+SAMPLE_FACE = (176, 65, 96, 96)
+
+
+def make_group_image(width, grid=3):
+    """Susun gambar contoh dalam grid grid x grid untuk meniru foto beresolusi tinggi dengan banyak wajah.
+
+    Mengembalikan tuple (gambar, kotak ground truth) dengan satu wajah per petak.
+    """
+    tile = load_sample(max(1, width // grid))
+    row = np.hstack([tile] * grid)
+    image = np.vstack([row] * grid)
+
+    size = tile.shape[1]
+    face = np.array(SAMPLE_FACE, dtype=np.float64) * size / 512
+    truth = [face + [col * size, row_index * size, 0, 0] for row_index in range(grid) for col in range(grid)]
+    return image, np.rint(truth).astype(np.int32)
+
+
+def textured_background(width, height, seed=0):
+    """Latar bertekstur tanpa wajah (sama dengan latar SyntheticSource)"""
+    return SyntheticSource(size=(width, height), seed=seed).background.copy()
+
+
+def synthetic_source(frames, tile=360, width=640, height=480, seed=0, realtime=False, fps=15):
+    """SyntheticSource dengan potret contoh yang bergerak pelan; `last_box` berisi posisi wajah"""
+    face = np.array(SAMPLE_FACE, dtype=np.float64) * tile / 512
+    return SyntheticSource(size=(width, height), fps=fps, realtime=realtime, frames=frames,
+                           image=load_sample(tile), face_box=face, seed=seed)
+
+
+def synthetic_video(frames, tile=360, width=640, height=480, seed=0):
+    """Hasilkan (frame, kotak wajah) dengan potret yang bergerak beberapa piksel per frame"""
+    source = synthetic_source(frames, tile, width, height, seed)
+    while True:
+        success, frame = source.read()
+        if not success:
+            return
+        yield frame, np.rint(source.last_box).astype(np.int32)
+
+
+def box_recall(reference, candidate, threshold=0.5):
+    """Bagian kotak referensi yang memiliki pasangan di candidate dengan IoU >= threshold"""
+    reference = np.asarray(reference, dtype=np.float64).reshape(-1, 4)
+    candidate = np.asarray(candidate, dtype=np.float64).reshape(-1, 4)
+    if len(reference) == 0:
+        return 1.0
+    if len(candidate) == 0:
+        return 0.0
+    a, b = reference[:, None, :], candidate[None, :, :]
+    ix = np.clip(np.minimum(a[..., 0] + a[..., 2], b[..., 0] + b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    iy = np.clip(np.minimum(a[..., 1] + a[..., 3], b[..., 1] + b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    overlap = ix * iy
+    iou = overlap / (a[..., 2] * a[..., 3] + b[..., 2] * b[..., 3] - overlap)
+    return float(np.mean(iou.max(axis=1) >= threshold))
+
+
+def load_detector(**kwargs):
+    """Buat FaceDetector dengan cascade bawaan OpenCV (tanpa akses jaringan)"""
+    detector = FaceDetector(cascade_dir=cv2.data.haarcascades, **kwargs)
+    if not detector.load(download=False):
+        raise RuntimeError("Gagal memuat cascade bawaan OpenCV")
+    return detector
+
+
+def time_calls(func, repeat, warmup=1):
+    """Jalankan func berulang kali dan kembalikan daftar durasi (detik)"""
+    for _ in range(warmup):
+        func()
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def percentile(durations, q):
+    """Persentil q (0-100) dari daftar durasi"""
+    return float(np.percentile(durations, q))
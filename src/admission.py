@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Kontrol penerimaan (admission control) untuk pipeline unggahan
+Copyright (c) 2025, Ahmad Fadlilah (https://github.com/ahmadfadlilah)
+
+Tanpa batas, setiap unggahan dalam satu lonjakan langsung menjalankan ensemble
+deteksi bersamaan: semua permintaan melambat dan memori melonjak. Di sini
+jumlah deteksi bersamaan dibatasi, permintaan lain menunggu giliran (FIFO) di
+antrean yang juga terbatas, dan permintaan yang tidak akan dilayani tepat
+waktu langsung ditolak sehingga klien dapat mencoba lagi (503 + Retry-After).
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+try:
+    from .scheduler import SMOOTHING
+except ImportError:
+    from scheduler import SMOOTHING
+
+# Alasan penolakan: antrean penuh, perkiraan waktu tunggu melebihi deadline, atau deadline habis saat menunggu
+REJECT_REASONS = ('queue_full', 'deadline', 'timeout')
+
+
+class Overloaded(Exception):
+    """Permintaan ditolak karena pipeline penuh; `retry_after` adalah saran jeda (detik)"""
+
+    def __init__(self, reason, retry_after):
+        self.reason = reason
+        self.retry_after = retry_after
+        super().__init__(f"Server sedang sibuk ({reason}), coba lagi dalam {retry_after} detik")
+
+
+class AdmissionController:
+    """Batas jumlah permintaan yang diproses bersamaan, dengan antrean terbatas dan deadline per permintaan.
+
+    `limit` permintaan diproses bersamaan (0 = tanpa batas); paling banyak
+    `queue_size` permintaan menunggu giliran secara FIFO, selebihnya ditolak
+    seketika. Permintaan yang menunggu ditolak jika perkiraan waktu tunggunya
+    (rata-rata bergerak durasi layanan x posisi antrean) melebihi deadline-nya,
+    atau jika deadline habis sebelum mendapat giliran. `observer(detik)`
+    dipanggil dengan waktu tunggu setiap permintaan yang diterima.
+    """
+
+    def __init__(self, limit, queue_size=0, max_wait=None, observer=None):
+        self.limit = max(0, int(limit))
+        self.queue_size = max(0, int(queue_size))
+        self.max_wait = max_wait
+        self.observer = observer
+        self._condition = threading.Condition()
+        self._queue = deque()
+        self.in_use = 0
+        self.admitted = 0
+        self.rejected = dict.fromkeys(REJECT_REASONS, 0)
+        self.wait_seconds = 0.0
+        # Rata-rata bergerak durasi satu permintaan setelah diterima (detik)
+        self.service_seconds = None
+
+    @property
+    def enabled(self):
+        return self.limit > 0
+
+    @property
+    def queued(self):
+        return len(self._queue)
+
+    def resize(self, limit, queue_size):
+        """Ubah batas slot dan panjang antrean (misalnya bagian satu worker dari batas seluruh server)"""
+        with self._condition:
+            self.limit = max(0, int(limit))
+            self.queue_size = max(0, int(queue_size))
+            self._condition.notify_all()
+
+    def saturated(self):
+        """True jika permintaan baru pasti ditolak (semua slot terpakai dan antrean penuh)"""
+        return self.enabled and self.in_use >= self.limit and len(self._queue) >= self.queue_size
+
+    def expected_wait(self, position=None):
+        """Perkiraan waktu tunggu (detik) untuk posisi antrean tertentu (bawaan: paling belakang)"""
+        if self.service_seconds is None:
+            return 0.0
+        position = len(self._queue) if position is None else position
+        return self.service_seconds * (position + 1) / self.limit
+
+    def retry_after(self):
+        """Saran jeda sebelum mencoba lagi (detik, bulat, minimal 1)"""
+        return max(1, math.ceil(self.expected_wait()))
+
+    def reject(self, reason):
+        """Catat penolakan dan kembalikan exception Overloaded untuk dilempar"""
+        with self._condition:
+            self.rejected[reason] += 1
+            return Overloaded(reason, self.retry_after())
+
+    @contextmanager
+    def slot(self, timeout=None):
+        """Tahan satu slot selama blok kode berjalan; tunggu giliran paling lama min(timeout, max_wait).
+
+        Melempar Overloaded jika antrean penuh atau deadline tidak terpenuhi.
+        """
+        if not self.enabled:
+            yield 0.0
+            return
+
+        start = time.perf_counter()
+        wait_limit = min(t for t in (timeout, self.max_wait, float('inf')) if t is not None)
+        with self._condition:
+            if self.in_use >= self.limit or self._queue:
+                if len(self._queue) >= self.queue_size:
+                    self.rejected['queue_full'] += 1
+                    raise Overloaded('queue_full', self.retry_after())
+                if self.expected_wait() > wait_limit:
+                    self.rejected['deadline'] += 1
+                    raise Overloaded('deadline', self.retry_after())
+
+                ticket = object()
+                self._queue.append(ticket)
+                if not self._condition.wait_for(lambda: self._queue[0] is ticket and self.in_use < self.limit,
+                                                None if wait_limit == float('inf') else wait_limit):
+                    self._queue.remove(ticket)
+                    self.rejected['timeout'] += 1
+                    # Permintaan di belakangnya mungkin sekarang berada di depan
+                    self._condition.notify_all()
+                    raise Overloaded('timeout', self.retry_after())
+                self._queue.popleft()
+            self.in_use += 1
+            self.admitted += 1
+            waited = time.perf_counter() - start
+            self.wait_seconds += waited
+            # Antrean berikutnya mungkin juga mendapat slot
+            self._condition.notify_all()
+
+        if self.observer is not None:
+            self.observer(waited)
+        service_start = time.perf_counter()
+        try:
+            yield waited
+        finally:
+            elapsed = time.perf_counter() - service_start
+            with self._condition:
+                self.in_use -= 1
+                if self.service_seconds is None:
+                    self.service_seconds = elapsed
+                else:
+                    self.service_seconds += SMOOTHING * (elapsed - self.service_seconds)
+                self._condition.notify_all()
+
+    def stats(self):
+        with self._condition:
+            return {
+                "limit": self.limit,
+                "queue_size": self.queue_size,
+                "max_wait": self.max_wait,
+                "in_use": self.in_use,
+                "queued": len(self._queue),
+                "admitted": self.admitted,
+                "rejected": dict(self.rejected),
+                "wait_seconds": round(self.wait_seconds, 3),
+                "service_seconds": round(self.service_seconds, 3) if self.service_seconds is not None else None,
+            }
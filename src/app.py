@@ -8,296 +8,348 @@ Copyright (c) 2025, Ahmad Fadlilah (https://github.com/ahmadfadlilah)
 import os
 import sys
 import base64
+import json
 from io import BytesIO
-import threading
 import time
+import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 # Penanganan error import
 try:
     import cv2
     import numpy as np
-    from flask import Flask, render_template, Response, request, jsonify
-    import requests
+    from flask import Flask, render_template, Response, request, jsonify, abort
 except ImportError:
     print("Menginstal dependensi yang diperlukan...")
     import subprocess
     subprocess.check_call([sys.executable, "-m", "pip", "install", 
-                         "opencv-python", "numpy", "flask", "requests"])
+                         "opencv-python", "numpy", "flask"])
     import cv2
     import numpy as np
-    from flask import Flask, render_template, Response, request, jsonify
-    import requests
+    from flask import Flask, render_template, Response, request, jsonify, abort
     print("Dependensi berhasil diinstal.")
 
+# Mesin deteksi wajah bersama (mendukung dijalankan sebagai skrip maupun paket)
+try:
+    from .detector import FaceDetector, draw_faces
+    from .nms import merge_faces
+    from .streaming import encode_jpeg
+    from .cache import ResultCache, content_key
+    from .tracking import FaceTracker, TrackerRegistry, ROI_PROFILE
+    from .scheduler import EnhancedScheduler
+    from .metrics import MetricsRegistry, CONTENT_TYPE as METRICS_CONTENT_TYPE
+    from .sources import IMAGE_EXTENSIONS, open_source
+    from .sessions import CAMERA_ID_PATTERN, CameraSession, CpuBudget, SessionManager, parse_cameras
+    from .admission import AdmissionController, Overloaded
+    from .intake import ImageTooLarge, decode_color, decode_for_detection, decode_frame, scale_faces
+except ImportError:
+    from detector import FaceDetector, draw_faces
+    from nms import merge_faces
+    from streaming import encode_jpeg
+    from cache import ResultCache, content_key
+    from tracking import FaceTracker, TrackerRegistry, ROI_PROFILE
+    from scheduler import EnhancedScheduler
+    from metrics import MetricsRegistry, CONTENT_TYPE as METRICS_CONTENT_TYPE
+    from sources import IMAGE_EXTENSIONS, open_source
+    from sessions import CAMERA_ID_PATTERN, CameraSession, CpuBudget, SessionManager, parse_cameras
+    from admission import AdmissionController, Overloaded
+    from intake import ImageTooLarge, decode_color, decode_for_detection, decode_frame, scale_faces
+
 app = Flask(__name__)
 
+# Konfigurasi (dapat diubah melalui variabel lingkungan)
+# FACE_CASCADE_DIR: folder file cascade lokal; jika kosong, cascade bawaan OpenCV
+# (cv2.data.haarcascades) yang dipakai. FACE_CASCADE_DOWNLOAD=1 mengizinkan unduhan
+# dari internet jika cascade utama tidak ditemukan di mana pun.
+app.config['CASCADE_DIR'] = os.environ.get('FACE_CASCADE_DIR') or None
+app.config['CASCADE_DOWNLOAD'] = os.environ.get('FACE_CASCADE_DOWNLOAD', '0') == '1'
+# FACE_EAGER_LOAD: muat dan warm-up detektor saat proses dimulai (0 = saat permintaan pertama)
+app.config['EAGER_LOAD'] = os.environ.get('FACE_EAGER_LOAD', '1') != '0'
+# FACE_ENSEMBLE_WORKERS: jumlah pass cascade yang dijalankan paralel per gambar (1 = berurutan)
+app.config['ENSEMBLE_WORKERS'] = int(os.environ.get('FACE_ENSEMBLE_WORKERS', '1'))
+# FACE_BATCH_WORKERS: jumlah gambar yang diproses bersamaan oleh /upload_batch
+app.config['BATCH_WORKERS'] = int(os.environ.get('FACE_BATCH_WORKERS', str(os.cpu_count() or 1)))
+# FACE_RESULT_CACHE_MB / FACE_RESULT_CACHE_TTL: batas ukuran (MB, 0 = nonaktif) dan umur (detik)
+# cache hasil /upload untuk gambar yang diunggah berulang kali
+app.config['RESULT_CACHE_MB'] = int(os.environ.get('FACE_RESULT_CACHE_MB', '64'))
+app.config['RESULT_CACHE_TTL'] = int(os.environ.get('FACE_RESULT_CACHE_TTL', '3600'))
+
+# FACE_MAX_DETECTION_SIZE: sisi terpanjang (piksel) gambar saat deteksi; gambar yang lebih
+# besar diperkecil dulu dan koordinat wajah dikembalikan ke ukuran asli (0 = resolusi penuh)
+app.config['MAX_DETECTION_SIZE'] = int(os.environ.get('FACE_MAX_DETECTION_SIZE', '1280'))
+# FACE_MAX_UPLOAD_MB: batas ukuran body permintaan (MB, 0 = tanpa batas); lebih besar ditolak dengan 413
+app.config['MAX_UPLOAD_MB'] = int(os.environ.get('FACE_MAX_UPLOAD_MB', '64'))
+app.config['MAX_CONTENT_LENGTH'] = app.config['MAX_UPLOAD_MB'] * 1024 * 1024 or None
+# FACE_MAX_UPLOAD_PIXELS: batas jumlah piksel gambar unggahan (0 = tanpa batas); ukuran dibaca
+# dari header sehingga gambar yang terlalu besar ditolak sebelum di-decode
+app.config['MAX_UPLOAD_PIXELS'] = int(os.environ.get('FACE_MAX_UPLOAD_PIXELS', str(64_000_000)))
+
+# FACE_TRACKING_INTERVAL: deteksi frame penuh setiap N frame live; di antaranya wajah
+# hanya dicari ulang di sekitar posisi sebelumnya (1 = deteksi penuh setiap frame)
+app.config['TRACKING_INTERVAL'] = int(os.environ.get('FACE_TRACKING_INTERVAL', '5'))
+
+# FACE_TARGET_FPS: target FPS loop live; deteksi yang ditingkatkan dijadwalkan sesuai
+# anggaran waktu yang terukur (0 = interval tetap setiap 10 frame)
+app.config['TARGET_FPS'] = float(os.environ.get('FACE_TARGET_FPS', '15'))
+# FACE_SPREAD_ENHANCED: bagi pass yang ditingkatkan ke beberapa frame berurutan (1) atau sekaligus (0)
+app.config['SPREAD_ENHANCED'] = os.environ.get('FACE_SPREAD_ENHANCED', '1') != '0'
+
+# FACE_SOURCE: sumber frame live: indeks webcam ('0'), path file video atau URL stream,
+# folder berisi gambar, atau 'synthetic[:LEBARxTINGGI]' untuk server tanpa kamera
+app.config['SOURCE'] = os.environ.get('FACE_SOURCE', '0')
+# FACE_SOURCE_REALTIME: putar file/folder/sintetis pada FPS aslinya (1) atau secepat mungkin tanpa
+# membuang frame (0); FACE_SOURCE_LOOP: ulangi file/folder dari awal setelah habis
+app.config['SOURCE_REALTIME'] = os.environ.get('FACE_SOURCE_REALTIME', '1') != '0'
+app.config['SOURCE_LOOP'] = os.environ.get('FACE_SOURCE_LOOP', '0') == '1'
+
+# FACE_CAMERAS: beberapa kamera dalam satu proses, 'id=sumber,id=sumber' (misalnya
+# 'lobi=0,gerbang=rtsp://...,demo=synthetic'); kosong = satu kamera 'default' dari FACE_SOURCE.
+# Route tanpa ID (/video_feed, /start_detection) memakai kamera 'default' atau kamera pertama.
+app.config['CAMERAS'] = parse_cameras(os.environ.get('FACE_CAMERAS', ''), app.config['SOURCE'])
+# FACE_LIVE_CPU_SLOTS: jumlah frame live yang boleh dideteksi bersamaan oleh semua kamera
+# (anggaran CPU global; bawaan jumlah core)
+app.config['LIVE_CPU_SLOTS'] = int(os.environ.get('FACE_LIVE_CPU_SLOTS', str(os.cpu_count() or 1)))
+# Deteksi live dapat dimulai dari proses ini; src/serve.py menonaktifkannya jika ada lebih
+# dari satu worker karena sesi kamera tidak dibagi antar proses
+app.config['LIVE_ENABLED'] = True
+
+# FACE_UPLOAD_CONCURRENCY: jumlah gambar /upload yang dideteksi bersamaan (bawaan jumlah core; 0 = tanpa
+# batas); FACE_UPLOAD_QUEUE: jumlah unggahan yang boleh menunggu giliran, selebihnya langsung ditolak
+# dengan 503 + Retry-After; FACE_UPLOAD_MAX_WAIT: lama maksimal menunggu di antrean (detik). Klien dapat
+# memberi deadline lebih pendek per permintaan dengan header X-Request-Timeout (detik).
+# Di src/serve.py kedua batas berlaku untuk seluruh server dan dibagi rata ke semua worker.
+app.config['UPLOAD_CONCURRENCY'] = int(os.environ.get('FACE_UPLOAD_CONCURRENCY', str(os.cpu_count() or 1)))
+app.config['UPLOAD_QUEUE'] = int(os.environ.get('FACE_UPLOAD_QUEUE', str(4 * app.config['UPLOAD_CONCURRENCY'])))
+app.config['UPLOAD_MAX_WAIT'] = float(os.environ.get('FACE_UPLOAD_MAX_WAIT', '10'))
+
+# FACE_FRAME_CLIENTS: jumlah klien /detect_frame (parameter ?client=) yang pelacak wajahnya
+# disimpan; klien yang paling lama tidak aktif dilupakan lebih dulu
+app.config['FRAME_CLIENTS'] = int(os.environ.get('FACE_FRAME_CLIENTS', '256'))
+
+# FACE_METRICS: catat latensi per tahap pipeline dan penghitung live untuk /metrics (0 = nonaktif)
+app.config['METRICS'] = os.environ.get('FACE_METRICS', '1') != '0'
+
+# Profil deteksi untuk gambar unggahan
+UPLOAD_PROFILE = 'upload-accurate'
+
+# Profil deteksi untuk frame yang dikirim klien ke /detect_frame (profil live cepat)
+FRAME_PROFILE = ROI_PROFILE
+# ID klien /detect_frame mengikuti aturan ID kamera (huruf, angka, _ dan -, maksimal 64)
+CLIENT_ID_PATTERN = CAMERA_ID_PATTERN
+
+# Mode respons /upload: dipilih dengan ?mode=... atau header Accept
+# full  : JSON dengan gambar hasil dalam base64 (bawaan, dipakai antarmuka web)
+# boxes : JSON berisi kotak dan jumlah wajah saja, tanpa menggambar/encode
+# jpeg/webp : bytes gambar hasil langsung, kotak dikirim di header X-Faces
+UPLOAD_MODES = ('full', 'boxes', 'jpeg', 'webp')
+BOXES_MIMETYPE = 'application/vnd.face-boxes+json'
+UPLOAD_ACCEPT_MODES = {
+    'application/json': 'full',
+    BOXES_MIMETYPE: 'boxes',
+    'image/jpeg': 'jpeg',
+    'image/webp': 'webp',
+}
+IMAGE_MIMETYPES = {'jpeg': ('.jpg', 'image/jpeg'), 'webp': ('.webp', 'image/webp')}
+
+# Batas bucket histogram jumlah wajah per gambar/frame
+FACE_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50)
+
+# Metrik Prometheus yang ditampilkan di /metrics
+metrics = MetricsRegistry(enabled=app.config['METRICS'])
+DETECTOR_STAGE_SECONDS = metrics.histogram(
+    'face_detector_stage_seconds', 'Durasi setiap langkah FaceDetector per profil', ('profile', 'stage'))
+PIPELINE_STAGE_SECONDS = metrics.histogram(
+    'face_pipeline_stage_seconds', 'Durasi tahap pipeline di luar detektor (decode, gambar, encode)',
+    ('pipeline', 'stage'))
+UPLOAD_SECONDS = metrics.histogram(
+    'face_upload_seconds', 'Durasi total permintaan /upload', ('mode', 'cache'))
+FACES_PER_IMAGE = metrics.histogram(
+    'face_faces_per_image', 'Jumlah wajah terdeteksi per gambar atau frame', ('pipeline',),
+    buckets=FACE_COUNT_BUCKETS)
+UPLOAD_QUEUE_WAIT_SECONDS = metrics.histogram(
+    'face_upload_queue_wait_seconds', 'Waktu tunggu /upload di antrean sebelum diproses')
+
 # Variabel global
-camera = None
-output_frame = None
-lock = threading.Lock()
-face_cascade = None
-face_cascade_alt = None
-face_cascade_alt2 = None
-profile_cascade = None
-detection_running = False
-
-def download_cascade_if_needed():
-    """Download file cascade jika belum ada"""
-    global face_cascade, face_cascade_alt, face_cascade_alt2, profile_cascade
-    
-    # Menggunakan haarcascade_frontalface_default.xml sebagai cascade utama
-    cascade_filename = 'haarcascade_frontalface_default.xml'
-    cascade_url = f'https://raw.githubusercontent.com/opencv/opencv/master/data/haarcascades/{cascade_filename}'
+detector = None
+batch_executor = None
+result_cache = ResultCache(max_bytes=app.config['RESULT_CACHE_MB'] * 1024 * 1024,
+                           ttl=app.config['RESULT_CACHE_TTL'])
+# Batas unggahan yang diproses bersamaan dan antrean di depan pipeline /upload
+upload_admission = AdmissionController(
+    app.config['UPLOAD_CONCURRENCY'], app.config['UPLOAD_QUEUE'], app.config['UPLOAD_MAX_WAIT'],
+    observer=lambda seconds: UPLOAD_QUEUE_WAIT_SECONDS.observe(seconds) if metrics.enabled else None)
 
-    if not os.path.exists(cascade_filename):
-        print(f"File cascade '{cascade_filename}' tidak ditemukan, mengunduh...")
-        try:
-            response = requests.get(cascade_url, timeout=10)
-            response.raise_for_status()
-            with open(cascade_filename, 'wb') as f:
-                f.write(response.content)
-            print("Unduhan selesai.")
-        except Exception as e:
-            print(f"Gagal mengunduh file cascade: {e}")
-            return False
-    
-    # Unduh file cascade tambahan untuk meningkatkan akurasi
-    cascade_files = {
-        'haarcascade_frontalface_alt.xml': 'face_cascade_alt',
-        'haarcascade_frontalface_alt2.xml': 'face_cascade_alt2',
-        'haarcascade_profileface.xml': 'profile_cascade'
-    }
-    
-    for filename, var_name in cascade_files.items():
-        if not os.path.exists(filename):
-            url = f'https://raw.githubusercontent.com/opencv/opencv/master/data/haarcascades/{filename}'
-            print(f"Mengunduh file cascade tambahan: {filename}...")
-            try:
-                response = requests.get(url, timeout=10)
-                response.raise_for_status()
-                with open(filename, 'wb') as f:
-                    f.write(response.content)
-                print(f"Unduhan {filename} selesai.")
-            except Exception as e:
-                print(f"Gagal mengunduh file cascade: {e}")
-                # Lanjutkan meskipun gagal mengunduh file tambahan
-    
-    # Muat semua cascade
-    face_cascade = cv2.CascadeClassifier('haarcascade_frontalface_default.xml')
-    face_cascade_alt = cv2.CascadeClassifier('haarcascade_frontalface_alt.xml')
-    face_cascade_alt2 = cv2.CascadeClassifier('haarcascade_frontalface_alt2.xml')
-    profile_cascade = cv2.CascadeClassifier('haarcascade_profileface.xml')
-    
-    if face_cascade.empty():
-        print(f"Error: Gagal memuat file cascade utama.")
+def observe_detector_stage(profile, stage, seconds):
+    """Observer langkah FaceDetector yang mencatat durasinya ke histogram /metrics"""
+    DETECTOR_STAGE_SECONDS.observe(seconds, profile=profile, stage=stage)
+
+def encode_live_frame(frame):
+    """Encode JPEG frame live untuk /video_feed sambil mencatat durasinya"""
+    with metrics.time(PIPELINE_STAGE_SECONDS, pipeline='live', stage='imencode'):
+        return encode_jpeg(frame)
+
+def open_camera_source(spec):
+    """Buka sumber frame live (webcam, file video, folder gambar, atau sintetis) untuk satu kamera"""
+    return open_source(spec, realtime=app.config['SOURCE_REALTIME'], loop=app.config['SOURCE_LOOP'])
+
+def create_tracker():
+    """Pelacak dan penjadwal deteksi baru untuk satu sesi deteksi live"""
+    # Deteksi yang ditingkatkan dijadwalkan agar loop tetap dalam target FPS
+    scheduler = None
+    if app.config['TARGET_FPS'] > 0:
+        scheduler = EnhancedScheduler(detector, target_fps=app.config['TARGET_FPS'],
+                                      spread=app.config['SPREAD_ENHANCED'])
+
+    # Deteksi penuh pada keyframe, pelacakan di sekitar wajah sebelumnya di antaranya
+    return FaceTracker(detector, keyframe_interval=app.config['TRACKING_INTERVAL'], scheduler=scheduler)
+
+def create_session(camera_id, spec, budget):
+    """Sesi kamera yang memakai detektor bersama dan pipeline live aplikasi ini"""
+    return CameraSession(camera_id, spec, opener=open_camera_source, tracker_factory=create_tracker,
+                         frame_handler=lambda session, tracker, frame: process_live_frame(tracker, frame, session),
+                         budget=budget, encoder=encode_live_frame)
+
+def create_frame_tracker():
+    """Pelacak untuk satu klien /detect_frame: hanya profil cepat, tanpa ensemble yang ditingkatkan"""
+    return FaceTracker(detector, keyframe_interval=app.config['TRACKING_INTERVAL'], enhanced=False)
+
+# Pelacak per klien /detect_frame (frame dari perangkat atau browser, bukan kamera server)
+frame_trackers = TrackerRegistry(create_frame_tracker, max_clients=app.config['FRAME_CLIENTS'])
+
+# Satu sesi per kamera; cascade dimuat sekali dan anggaran CPU dibagi semua sesi
+sessions = SessionManager(app.config['CAMERAS'], create_session,
+                          budget=CpuBudget(app.config['LIVE_CPU_SLOTS']))
+
+def per_camera(value):
+    """Nilai per kamera untuk metrik berlabel `camera` (None dilewati)"""
+    return lambda: {session.camera_id: value(session) for session in sessions}
+
+def capture_counter(name):
+    """Baca penghitung dari thread penangkap sesi yang sedang aktif (None jika belum ada)"""
+    return lambda session: getattr(session.capture, name) if session.capture is not None else None
+
+# Penghitung yang sudah ada dibaca saat /metrics diminta, tanpa biaya tambahan di jalur panas
+metrics.callback('face_live_running', 'Apakah deteksi live sedang berjalan',
+                 per_camera(lambda session: int(session.running)), labelnames=('camera',))
+metrics.callback('face_live_fps', 'FPS loop deteksi live (rata-rata bergerak)',
+                 per_camera(lambda session: session.fps), labelnames=('camera',))
+metrics.callback('face_live_frames_captured_total', 'Frame yang ditangkap kamera sejak deteksi dimulai',
+                 per_camera(capture_counter('captured')), 'counter', ('camera',))
+metrics.callback('face_live_frames_processed_total', 'Frame yang diproses loop deteksi sejak deteksi dimulai',
+                 per_camera(capture_counter('processed')), 'counter', ('camera',))
+metrics.callback('face_live_frames_dropped_total', 'Frame basi yang dibuang sebelum diproses',
+                 per_camera(capture_counter('dropped')), 'counter', ('camera',))
+metrics.callback('face_live_viewers', 'Jumlah penonton /video_feed',
+                 per_camera(lambda session: session.broadcaster.viewers), labelnames=('camera',))
+metrics.callback('face_live_event_subscribers', 'Jumlah pelanggan /detections/stream',
+                 per_camera(lambda session: session.detections.viewers), labelnames=('camera',))
+metrics.callback('face_live_frames_encoded_total', 'Frame live yang di-encode ke JPEG',
+                 per_camera(lambda session: session.broadcaster.frames_encoded), 'counter', ('camera',))
+metrics.callback('face_live_cpu_slots_in_use', 'Slot anggaran CPU live yang sedang dipakai',
+                 lambda: sessions.budget.in_use)
+metrics.callback('face_live_cpu_wait_seconds_total', 'Total waktu sesi kamera menunggu slot anggaran CPU',
+                 lambda: round(sessions.budget.wait_seconds, 6), 'counter')
+metrics.callback('face_frame_clients', 'Klien /detect_frame dengan pelacak aktif', lambda: len(frame_trackers))
+metrics.callback('face_upload_in_flight', 'Unggahan /upload yang sedang diproses',
+                 lambda: upload_admission.in_use)
+metrics.callback('face_upload_queue_depth', 'Unggahan /upload yang menunggu giliran',
+                 lambda: upload_admission.queued)
+metrics.callback('face_upload_rejected_total', 'Unggahan /upload yang ditolak dengan 503 per alasan',
+                 lambda: dict(upload_admission.rejected), 'counter', ('reason',))
+metrics.callback('face_result_cache_hits_total', 'Hit cache hasil /upload', lambda: result_cache.hits, 'counter')
+metrics.callback('face_result_cache_misses_total', 'Miss cache hasil /upload', lambda: result_cache.misses, 'counter')
+metrics.callback('face_result_cache_bytes', 'Ukuran cache hasil /upload (bytes)', lambda: result_cache.current_bytes)
+
+def load_detector():
+    """Muat dan validasi cascade dari folder lokal/bawaan OpenCV, lalu warm-up detektor wajah"""
+    global detector
+
+    face_detector = FaceDetector(cascade_dir=app.config['CASCADE_DIR'],
+                                 max_workers=app.config['ENSEMBLE_WORKERS'],
+                                 max_detection_size=app.config['MAX_DETECTION_SIZE'])
+    if not face_detector.load(download=app.config['CASCADE_DOWNLOAD']):
         return False
-    else:
-        print(f"Semua classifier cascade berhasil dimuat.")
-        return True
-    
-# Fungsi untuk menggabungkan hasil dari beberapa deteksi wajah dan menghilangkan duplikat
-def merge_faces(faces_list):
-    """Menggabungkan hasil deteksi wajah dan menghilangkan duplikat"""
-    if not faces_list:
-        return np.array([])
-    
-    # Gabungkan semua hasil deteksi
-    all_faces = np.vstack(faces_list) if len(faces_list) > 1 else faces_list[0]
-    
-    # Jika tidak ada wajah yang terdeteksi, kembalikan array kosong
-    if len(all_faces) == 0:
-        return np.array([])
-    
-    # Konversi format ke [x, y, w, h]
-    result_faces = []
-    
-    # Implementasi Non-Maximum Suppression (NMS) sederhana
-    # Urutkan wajah berdasarkan area (w*h) dari besar ke kecil
-    areas = all_faces[:, 2] * all_faces[:, 3]
-    indices = np.argsort(-areas)  # Urutan menurun
-    
-    # Ambang batas untuk overlap
-    overlap_threshold = 0.3
-    
-    keep = []
-    
-    for idx in indices:
-        keep_face = True
-        
-        # Kotak yang akan diperiksa
-        x1 = all_faces[idx, 0]
-        y1 = all_faces[idx, 1]
-        x2 = x1 + all_faces[idx, 2]
-        y2 = y1 + all_faces[idx, 3]
-        area1 = (x2 - x1) * (y2 - y1)
-        
-        # Bandingkan dengan kotak yang sudah disimpan
-        for kept_idx in keep:
-            # Kotak yang sudah disimpan
-            kx1 = all_faces[kept_idx, 0]
-            ky1 = all_faces[kept_idx, 1]
-            kx2 = kx1 + all_faces[kept_idx, 2]
-            ky2 = ky1 + all_faces[kept_idx, 3]
-            area2 = (kx2 - kx1) * (ky2 - ky1)
-            
-            # Hitung area overlap
-            x_overlap = max(0, min(x2, kx2) - max(x1, kx1))
-            y_overlap = max(0, min(y2, ky2) - max(y1, ky1))
-            overlap_area = x_overlap * y_overlap
-            
-            # Hitung IoU (Intersection over Union)
-            iou = overlap_area / float(area1 + area2 - overlap_area)
-            
-            if iou > overlap_threshold:
-                keep_face = False
-                break
-        
-        if keep_face:
-            keep.append(idx)
-    
-    # Kembalikan wajah yang disimpan
-    return all_faces[keep]
 
-def init_camera():
-    """Inisialisasi kamera"""
-    global camera
-    
-    print("Menginisialisasi webcam...")
-    camera = cv2.VideoCapture(0)
-
-    if not camera.isOpened():
-        print("Error: Tidak bisa membuka webcam dengan metode default.")
-        print("Mencoba membuka webcam dengan backend alternatif (CAP_DSHOW)...")
-        camera = cv2.VideoCapture(0, cv2.CAP_DSHOW)
-        if not camera.isOpened():
-            print("Error: Tetap tidak bisa membuka webcam. Pastikan webcam terpasang dan tidak digunakan aplikasi lain.")
-            return False
-        else:
-            print("Webcam berhasil dibuka dengan backend CAP_DSHOW.")
-    else:
-        print("Webcam berhasil dibuka dengan metode default.")
-    
+    # Warm-up agar permintaan pertama secepat permintaan berikutnya
+    warmup_ms = face_detector.warm_up()
+    print(f"Warm-up detektor selesai: {warmup_ms}")
+
+    # Latensi per langkah dicatat setelah warm-up agar histogram hanya berisi permintaan nyata
+    if metrics.enabled:
+        face_detector.stage_observer = observe_detector_stage
+
+    detector = face_detector
     return True
 
-def detect_faces():
-    """Deteksi wajah dari webcam secara real-time dengan akurasi yang ditingkatkan"""
-    global camera, output_frame, lock, face_cascade, face_cascade_alt, face_cascade_alt2, profile_cascade, detection_running
-    
-    num_faces = 0
-    frame_count = 0
-    enhanced_detection_interval = 10  # Setiap berapa frame akan menggunakan deteksi yang lebih akurat
-    
-    while detection_running:
-        success, frame = camera.read()
-        if not success:
-            print("Gagal membaca frame dari webcam.")
-            break
-        
-        # Untuk kecepatan, hitung frame dan hanya lakukan deteksi yang intensif pada interval tertentu
-        frame_count += 1
-        use_enhanced_detection = (frame_count % enhanced_detection_interval == 0)
-        
-        gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        
-        # Pra-pemrosesan gambar
-        gray_frame_equalized = cv2.equalizeHist(gray_frame)
-        
-        all_faces_detected = []
-        
-        # Untuk kecepatan, gunakan deteksi dasar pada sebagian besar frame
-        if not use_enhanced_detection:
-            # Deteksi wajah standar dengan cascade default untuk kecepatan
-            faces = face_cascade.detectMultiScale(
-                gray_frame_equalized,
-                scaleFactor=1.1,
-                minNeighbors=5,
-                minSize=(50, 50)
-            )
-            if len(faces) > 0:
-                all_faces_detected.append(faces)
-        else:
-            # Pada interval tertentu, lakukan deteksi yang lebih menyeluruh
-            # Deteksi dengan cascade default
-            faces_default = face_cascade.detectMultiScale(
-                gray_frame_equalized,
-                scaleFactor=1.1,
-                minNeighbors=5,
-                minSize=(30, 30)
-            )
-            if len(faces_default) > 0:
-                all_faces_detected.append(faces_default)
-            
-            # Deteksi dengan cascade alternatif
-            faces_alt = face_cascade_alt.detectMultiScale(
-                gray_frame_equalized,
-                scaleFactor=1.1,
-                minNeighbors=4,
-                minSize=(30, 30)
-            )
-            if len(faces_alt) > 0:
-                all_faces_detected.append(faces_alt)
-            
-            # Deteksi profil jika dibutuhkan ekstra akurasi
-            if len(all_faces_detected) == 0:
-                profile_faces = profile_cascade.detectMultiScale(
-                    gray_frame_equalized,
-                    scaleFactor=1.1,
-                    minNeighbors=3,
-                    minSize=(35, 35)
-                )
-                if len(profile_faces) > 0:
-                    all_faces_detected.append(profile_faces)
-        
-        # Gabungkan dan hapus wajah duplikat
-        if all_faces_detected:
-            # Gabungkan hasil deteksi dan filter duplikat
-            merged_faces = merge_faces(all_faces_detected)
-            num_faces = len(merged_faces)
-            
-            # Gambar kotak di sekitar wajah yang terdeteksi
-            for (x, y, w, h) in merged_faces:
-                cv2.rectangle(frame, (x, y), (x+w, y+h), (0, 255, 0), 2)
-        else:
-            num_faces = 0
-            
-        # Tampilkan informasi jumlah wajah terdeteksi
-        text_position = (10, 30)
-        font = cv2.FONT_HERSHEY_SIMPLEX
-        font_scale = 1
-        font_color = (255, 0, 0)  # Biru
-        thickness = 2
-        line_type = cv2.LINE_AA
-
-        cv2.putText(frame, f'Wajah Terdeteksi: {num_faces}',
-                    text_position,
-                    font,
-                    font_scale,
-                    font_color,
-                    thickness,
-                    line_type)
-        
-        # Update frame output
-        with lock:
-            output_frame = frame.copy()
-
-def generate_frames():
+def get_batch_executor():
+    """Thread pool bersama untuk /upload_batch (dibuat saat pertama kali dibutuhkan)"""
+    global batch_executor
+
+    if batch_executor is None:
+        batch_executor = ThreadPoolExecutor(max_workers=max(1, app.config['BATCH_WORKERS']),
+                                            thread_name_prefix='upload-batch')
+    return batch_executor
+
+def detect_upload(image_bytes, pipeline):
+    """Decode hemat memori lalu deteksi wajah pada gambar unggahan.
+
+    Gambar di-decode sebagai grayscale yang sudah diperkecil decoder (tidak di
+    bawah FACE_MAX_DETECTION_SIZE) dan koordinat wajah dikembalikan ke ukuran
+    asli. Mengembalikan array wajah, atau None jika gambar tidak dapat dibaca.
+    Melempar ImageTooLarge jika melebihi FACE_MAX_UPLOAD_PIXELS.
+    """
+    with metrics.time(PIPELINE_STAGE_SECONDS, pipeline=pipeline, stage='imdecode'):
+        gray, scale_x, scale_y = decode_for_detection(image_bytes, app.config['MAX_DETECTION_SIZE'],
+                                                      app.config['MAX_UPLOAD_PIXELS'])
+    if gray is None:
+        return None
+
+    # Pra-pemrosesan, deteksi multi-cascade, dan penggabungan hasil
+    # (rincian per langkah dicatat oleh FaceDetector di face_detector_stage_seconds)
+    with metrics.time(PIPELINE_STAGE_SECONDS, pipeline=pipeline, stage='detect'):
+        faces = detector.detect(gray, profile=UPLOAD_PROFILE)
+    return scale_faces(faces, scale_x, scale_y)
+
+def process_live_frame(tracker, frame, session):
+    """Deteksi, gambar, dan terbitkan satu frame live ke penonton sesi kamera"""
+    # Untuk kecepatan, deteksi penuh (dan deteksi intensif) hanya dilakukan pada interval tertentu
+    with metrics.time(PIPELINE_STAGE_SECONDS, pipeline='live', stage='detect'):
+        faces = tracker.update(frame)
+    if metrics.enabled:
+        FACES_PER_IMAGE.observe(len(faces), pipeline='live')
+    
+    # Gambar kotak di sekitar wajah dan jumlah wajah yang terdeteksi, hanya jika ada penonton
+    # MJPEG (pelanggan /detections/stream menggambar kotaknya sendiri di browser)
+    if session.broadcaster.viewers:
+        with metrics.time(PIPELINE_STAGE_SECONDS, pipeline='live', stage='draw'):
+            draw_faces(frame, faces)
+    
+    # Terbitkan frame output dan metadata deteksinya; frame diambil dari buffer penangkap sehingga
+    # tidak perlu disalin, dan frame yang digantikan dipakai ulang oleh penangkap untuk frame berikutnya
+    session.publish(frame, faces)
+
+def generate_frames(broadcaster):
     """Generator untuk streaming frame ke halaman web"""
-    global output_frame, lock
-    
-    while True:
-        with lock:
-            if output_frame is None:
-                continue
-            
-            # Encode frame sebagai JPEG
-            (flag, encoded_image) = cv2.imencode(".jpg", output_frame)
-            
-            if not flag:
-                continue
-                
+    # Setiap frame di-encode sekali dan dibagikan ke semua penonton
+    for encoded_image in broadcaster.frames():
         # Yield hasil sebagai respons streaming
         yield(b'--frame\r\n' b'Content-Type: image/jpeg\r\n\r\n' + 
-              bytearray(encoded_image) + b'\r\n')
+              encoded_image + b'\r\n')
+
+def generate_events(broadcaster):
+    """Generator Server-Sent Events berisi metadata deteksi per frame"""
+    # Klien EventSource menyambung ulang 1 detik setelah stream berakhir (deteksi dihentikan)
+    yield b'retry: 1000\n\n'
+    # Setiap event di-serialisasi sekali dan dibagikan ke semua pelanggan
+    yield from broadcaster.frames()
+
+def get_session(camera_id):
+    """Sesi untuk camera_id dari URL (None = kamera bawaan); 404 jika kamera tidak dikonfigurasi"""
+    session = sessions.get(camera_id)
+    if session is None:
+        abort(404, description=f"Kamera '{camera_id}' tidak dikonfigurasi")
+    return session
 
 @app.route('/')
 def index():
@@ -305,53 +357,77 @@ def index():
     return render_template('index.html')
 
 @app.route('/video_feed')
-def video_feed():
+@app.route('/video_feed/<camera_id>')
+def video_feed(camera_id=None):
     """Streaming video feed untuk halaman web"""
-    return Response(generate_frames(),
+    session = get_session(camera_id)
+    return Response(generate_frames(session.broadcaster),
                    mimetype='multipart/x-mixed-replace; boundary=frame')
 
+@app.route('/detections/stream')
+@app.route('/detections/stream/<camera_id>')
+def detections_stream(camera_id=None):
+    """Stream SSE metadata deteksi live (id frame, waktu, kotak, jumlah wajah) tanpa piksel"""
+    session = get_session(camera_id)
+    return Response(generate_events(session.detections), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @app.route('/start_detection', methods=['POST'])
-def start_detection():
+@app.route('/start_detection/<camera_id>', methods=['POST'])
+def start_detection(camera_id=None):
     """Memulai deteksi wajah"""
-    global detection_running
+    session = get_session(camera_id)
+    if not app.config['LIVE_ENABLED']:
+        return jsonify({"success": False, "camera": session.camera_id,
+                        "message": "Deteksi live tidak tersedia di server prefork dengan beberapa worker; "
+                                   "jalankan src/app.py atau src/asgi.py untuk kamera"}), 503
+    
+    # Inisialisasi cascade classifier jika belum (dipakai bersama oleh semua kamera)
+    if detector is None:
+        if not load_detector():
+            return jsonify({"success": False, "message": "Gagal memuat cascade classifier"})
     
-    if not detection_running:
-        # Inisialisasi cascade classifier jika belum
-        if face_cascade is None:
-            if not download_cascade_if_needed():
-                return jsonify({"success": False, "message": "Gagal memuat cascade classifier"})
-        
-        # Inisialisasi kamera jika belum
-        if camera is None:
-            if not init_camera():
-                return jsonify({"success": False, "message": "Gagal menginisialisasi kamera"})
-        
-        detection_running = True
-        threading.Thread(target=detect_faces).start()
-        return jsonify({"success": True, "message": "Deteksi wajah dimulai"})
-    else:
-        return jsonify({"success": False, "message": "Deteksi wajah sudah berjalan"})
+    success, message = session.start()
+    return jsonify({"success": success, "message": message, "camera": session.camera_id})
+
+@app.route('/live_stats')
+@app.route('/live_stats/<camera_id>')
+def live_stats(camera_id=None):
+    """Sumber frame, penghitung frame live (ditangkap, diproses, dibuang, penonton), dan jadwal deteksi"""
+    return jsonify(get_session(camera_id).stats())
+
+@app.route('/cameras')
+def cameras():
+    """Semua kamera yang dikonfigurasi beserta statistiknya dan pemakaian anggaran CPU bersama"""
+    return jsonify(sessions.stats())
 
 @app.route('/stop_detection', methods=['POST'])
-def stop_detection():
+@app.route('/stop_detection/<camera_id>', methods=['POST'])
+def stop_detection(camera_id=None):
     """Menghentikan deteksi wajah"""
-    global detection_running, camera
-    
-    detection_running = False
+    session = get_session(camera_id)
     
-    # Tunggu thread deteksi wajah berhenti
-    time.sleep(1)
+    # Tunggu thread deteksi wajah berhenti, lalu lepaskan sumber frame
+    session.stop()
     
-    # Reset kamera
-    if camera is not None:
-        camera.release()
-        camera = None
-    
-    return jsonify({"success": True, "message": "Deteksi wajah dihentikan"})
+    return jsonify({"success": True, "message": "Deteksi wajah dihentikan", "camera": session.camera_id})
+
+def select_upload_mode():
+    """Tentukan mode respons /upload dari parameter ?mode= atau header Accept"""
+    mode = request.args.get('mode')
+    if mode in UPLOAD_MODES:
+        return mode
+    # 'application/json' didahulukan agar Accept: */* tetap memakai mode bawaan
+    best = request.accept_mimetypes.best_match(list(UPLOAD_ACCEPT_MODES))
+    return UPLOAD_ACCEPT_MODES.get(best, 'full')
 
 @app.route('/upload', methods=['POST'])
 def upload_image():
     """Deteksi wajah dari gambar yang diunggah dengan akurasi yang sangat ditingkatkan"""
+    # Tolak seketika saat pipeline dan antrean penuh, sebelum body unggahan dibaca
+    if upload_admission.saturated():
+        return overloaded(upload_admission.reject('queue_full'))
+
     if 'file' not in request.files:
         return jsonify({"success": False, "message": "Tidak ada file yang diunggah"})
     
@@ -360,164 +436,362 @@ def upload_image():
     if file.filename == '':
         return jsonify({"success": False, "message": "Tidak ada file yang dipilih"})
     
-    # Baca gambar yang diunggah
-    image_stream = file.read()
-    nparr = np.frombuffer(image_stream, np.uint8)
-    image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+    start = time.perf_counter()
+    mode = select_upload_mode()
+    image_bytes = file.read()
     
     # Inisialisasi cascade classifier jika belum
-    if face_cascade is None:
-        if not download_cascade_if_needed():
+    if detector is None:
+        if not load_detector():
             return jsonify({"success": False, "message": "Gagal memuat cascade classifier"})
     
-    # Pra-pemrosesan gambar yang ditingkatkan
-    original_image = image.copy()
-    gray_image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-    
-    # 1. Ekualisasi histogram
-    gray_image_equalized = cv2.equalizeHist(gray_image)
-    
-    # 2. Penerapan filter bilateral untuk mengurangi noise dengan tetap mempertahankan tepi
-    filtered_image = cv2.bilateralFilter(gray_image_equalized, 9, 75, 75)
-    
-    # 3. Peningkatan kontras adaptif dengan CLAHE
-    clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-    enhanced_image = clahe.apply(filtered_image)
-    
-    # 4. Normalisasi gambar
-    normalized_image = cv2.normalize(enhanced_image, None, alpha=0, beta=255, 
-                                    norm_type=cv2.NORM_MINMAX)
-    
-    # Daftar untuk menyimpan hasil deteksi wajah dari berbagai classifier
-    all_faces_detected = []
-    
-    # Deteksi menggunakan cascade default dengan parameter yang berbeda
-    faces_default_sensitive = face_cascade.detectMultiScale(
-        enhanced_image,
-        scaleFactor=1.05,
-        minNeighbors=3,
-        minSize=(30, 30),
-        flags=cv2.CASCADE_SCALE_IMAGE
-    )
-    if len(faces_default_sensitive) > 0:
-        all_faces_detected.append(faces_default_sensitive)
-    
-    # Deteksi menggunakan cascade alt
-    faces_alt = face_cascade_alt.detectMultiScale(
-        enhanced_image,
-        scaleFactor=1.08,
-        minNeighbors=3,
-        minSize=(30, 30),
-        flags=cv2.CASCADE_SCALE_IMAGE
-    )
-    if len(faces_alt) > 0:
-        all_faces_detected.append(faces_alt)
-    
-    # Deteksi menggunakan cascade alt2
-    faces_alt2 = face_cascade_alt2.detectMultiScale(
-        enhanced_image, 
-        scaleFactor=1.08,
-        minNeighbors=4,
-        minSize=(35, 35),
-        flags=cv2.CASCADE_SCALE_IMAGE
-    )
-    if len(faces_alt2) > 0:
-        all_faces_detected.append(faces_alt2)
-    
-    # Deteksi wajah profil (dari samping)
-    # Deteksi wajah dari kiri ke kanan
-    profile_faces = profile_cascade.detectMultiScale(
-        enhanced_image,
-        scaleFactor=1.1,
-        minNeighbors=3,
-        minSize=(30, 30),
-        flags=cv2.CASCADE_SCALE_IMAGE
-    )
-    if len(profile_faces) > 0:
-        all_faces_detected.append(profile_faces)
-    
-    # Flip gambar secara horizontal dan deteksi profil lagi (untuk wajah dari sisi lain)
-    flipped_image = cv2.flip(enhanced_image, 1)
-    flipped_profile_faces = profile_cascade.detectMultiScale(
-        flipped_image,
-        scaleFactor=1.1,
-        minNeighbors=3,
-        minSize=(30, 30),
-        flags=cv2.CASCADE_SCALE_IMAGE
-    )
-    
-    # Konversi koordinat wajah pada gambar flipped kembali ke koordinat di gambar asli
-    if len(flipped_profile_faces) > 0:
-        width = enhanced_image.shape[1]
-        for i, (x, y, w, h) in enumerate(flipped_profile_faces):
-            flipped_profile_faces[i][0] = width - x - w  # Menyesuaikan koordinat x
-        all_faces_detected.append(flipped_profile_faces)
-    
-    # Jika masih belum ada wajah terdeteksi, coba dengan gambar asli yang dinormalisasi
-    if len(all_faces_detected) == 0:
-        faces_normalized = face_cascade.detectMultiScale(
-            normalized_image,
-            scaleFactor=1.05,
-            minNeighbors=2,
-            minSize=(25, 25),
-            flags=cv2.CASCADE_SCALE_IMAGE
-        )
-        if len(faces_normalized) > 0:
-            all_faces_detected.append(faces_normalized)
-    
-    # Jika masih belum ada wajah terdeteksi, coba dengan gambar asli (gray)
-    if len(all_faces_detected) == 0:
-        faces_original = face_cascade.detectMultiScale(
-            gray_image,
-            scaleFactor=1.05,
-            minNeighbors=2,
-            minSize=(20, 20),
-            flags=cv2.CASCADE_SCALE_IMAGE
-        )
-        if len(faces_original) > 0:
-            all_faces_detected.append(faces_original)
-    
-    # Gabungkan dan hapus wajah duplikat
-    if all_faces_detected:
-        merged_faces = merge_faces(all_faces_detected)
-        num_faces = len(merged_faces)
-    else:
-        merged_faces = np.array([])
-        num_faces = 0
-    
+    # Gambar yang sama dengan profil dan konfigurasi detektor yang sama dilayani dari cache.
+    # Fingerprint detektor ikut menjadi kunci sehingga perubahan cascade/parameter
+    # otomatis membuat entri lama tidak terpakai lagi.
+    cache_key = None
+    if result_cache.enabled:
+        cache_key = content_key(image_bytes, UPLOAD_PROFILE, detector.fingerprint(UPLOAD_PROFILE), mode)
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            body, mimetype, headers = cached
+            response = Response(body, mimetype=mimetype, headers=headers)
+            response.headers['X-Cache'] = 'HIT'
+            observe_upload(mode, 'hit', start)
+            return response
+    
+    # Deadline per permintaan (X-Request-Timeout) dihitung sejak permintaan mulai diproses
+    timeout = request.headers.get('X-Request-Timeout', type=float)
+    if timeout is not None:
+        timeout = max(0.0, timeout - (time.perf_counter() - start))
+    try:
+        with upload_admission.slot(timeout):
+            response, success = render_upload(image_bytes, mode)
+    except Overloaded as e:
+        return overloaded(e)
+    if cache_key is not None and success:
+        body = response.get_data()
+        headers = [(name, value) for name, value in response.headers.items() if name.startswith('X-')]
+        result_cache.put(cache_key, (body, response.mimetype, headers), len(body))
+        response.headers['X-Cache'] = 'MISS'
+    observe_upload(mode, 'miss' if cache_key is not None else 'off', start)
+    return response
+
+def overloaded(error):
+    """Respons 503 cepat dengan Retry-After saat pipeline unggahan penuh"""
+    response = jsonify({"success": False, "message": str(error), "reason": error.reason})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
+
+@app.errorhandler(413)
+def upload_too_large(error):
+    """Body permintaan melebihi FACE_MAX_UPLOAD_MB"""
+    return jsonify({
+        "success": False,
+        "message": f"Ukuran unggahan melebihi batas {app.config['MAX_UPLOAD_MB']} MB"
+    }), 413
+
+def observe_upload(mode, cache_status, start):
+    """Catat durasi total satu permintaan /upload"""
+    if metrics.enabled:
+        UPLOAD_SECONDS.observe(time.perf_counter() - start, mode=mode, cache=cache_status)
+
+def render_upload(image_bytes, mode):
+    """Jalankan deteksi untuk satu gambar unggahan dan buat respons sesuai mode.
+
+    Mengembalikan tuple (respons, berhasil).
+    """
+    try:
+        merged_faces = detect_upload(image_bytes, 'upload')
+    except ImageTooLarge as e:
+        return (jsonify({"success": False, "message": str(e)}), 413), False
+    if merged_faces is None:
+        return jsonify({"success": False, "message": "Gagal membaca gambar"}), False
+    num_faces = len(merged_faces)
+    if metrics.enabled:
+        FACES_PER_IMAGE.observe(num_faces, pipeline='upload')
+    
+    # Mode kotak saja: lewati menggambar, encode gambar, dan base64
+    if mode == 'boxes':
+        return jsonify({
+            "success": True,
+            "message": f"{num_faces} wajah terdeteksi",
+            "count": num_faces,
+            "faces": np.asarray(merged_faces).tolist()
+        }), True
+    
+    # Gambar berwarna resolusi penuh hanya di-decode untuk anotasi, setelah buffer deteksi dilepas
+    with metrics.time(PIPELINE_STAGE_SECONDS, pipeline='upload', stage='imdecode_color'):
+        image = decode_color(image_bytes)
+    if image is None:
+        return jsonify({"success": False, "message": "Gagal membaca gambar"}), False
+
     # Gambar kotak di sekitar wajah yang terdeteksi pada gambar asli
-    for (x, y, w, h) in merged_faces:
-        cv2.rectangle(image, (x, y), (x+w, y+h), (0, 255, 0), 2)
-        
-        # Tambahkan indikator confidence untuk warna bingkai (opsional)
-        # Semakin tinggi confidence, semakin hijau warnanya
-        # cv2.rectangle(image, (x, y), (x+w, y+h), (0, 255, 0), 2)
-    
-    # Tampilkan jumlah wajah yang terdeteksi
-    text_position = (10, 30)
-    font = cv2.FONT_HERSHEY_SIMPLEX
-    font_scale = 1
-    font_color = (255, 0, 0)  # Biru
-    thickness = 2
-    line_type = cv2.LINE_AA
-
-    cv2.putText(image, f'Wajah Terdeteksi: {num_faces}',
-                text_position,
-                font,
-                font_scale,
-                font_color,
-                thickness,
-                line_type)
+    with metrics.time(PIPELINE_STAGE_SECONDS, pipeline='upload', stage='draw'):
+        draw_faces(image, merged_faces)
+    
+    if mode in IMAGE_MIMETYPES:
+        # Kirim bytes gambar langsung; kotak wajah dikirim lewat header
+        extension, mimetype = IMAGE_MIMETYPES[mode]
+        with metrics.time(PIPELINE_STAGE_SECONDS, pipeline='upload', stage='imencode'):
+            flag, buffer = cv2.imencode(extension, image)
+        del image
+        if not flag:
+            return jsonify({"success": False, "message": "Gagal meng-encode gambar hasil"}), False
+        response = Response(buffer.tobytes(), mimetype=mimetype)
+        response.headers['X-Face-Count'] = str(num_faces)
+        response.headers['X-Faces'] = json.dumps(np.asarray(merged_faces).tolist())
+        return response, True
     
     # Konversi gambar hasil deteksi ke base64 untuk ditampilkan di halaman web
-    _, buffer = cv2.imencode('.jpg', image)
-    image_base64 = base64.b64encode(buffer).decode('utf-8')
+    with metrics.time(PIPELINE_STAGE_SECONDS, pipeline='upload', stage='imencode'):
+        _, buffer = cv2.imencode('.jpg', image)
+    # Gambar resolusi penuh tidak dibutuhkan lagi saat membuat base64
+    del image
+    with metrics.time(PIPELINE_STAGE_SECONDS, pipeline='upload', stage='base64'):
+        image_base64 = base64.b64encode(buffer).decode('utf-8')
     
     return jsonify({
         "success": True,
         "message": f"{num_faces} wajah terdeteksi",
         "image": image_base64
+    }), True
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Metrik dalam format teks Prometheus: latensi per tahap, wajah per gambar, FPS live, frame dibuang, penonton"""
+    if not metrics.enabled:
+        return Response("Metrik dinonaktifkan (FACE_METRICS=0)\n", status=404, mimetype='text/plain')
+    return Response(metrics.render(), content_type=METRICS_CONTENT_TYPE)
+
+@app.route('/detect_frame', methods=['POST'])
+def detect_frame():
+    """Deteksi cepat satu frame dari klien; hanya kotak wajah yang dikembalikan.
+
+    Body berisi JPEG/PNG, atau piksel mentah grayscale/BGR dengan ?width= dan
+    ?height=. ?scale= mengalikan koordinat jika klien sudah memperkecil frame,
+    dan ?client= mengaktifkan pelacakan wajah antar frame untuk klien tersebut.
+    """
+    start = time.perf_counter()
+    if detector is None:
+        if not load_detector():
+            return jsonify({"success": False, "message": "Gagal memuat cascade classifier"}), 503
+
+    client_id = request.args.get('client')
+    try:
+        scale = request.args.get('scale', 1.0, type=float)
+        if not scale > 0:
+            raise ValueError("Parameter scale harus positif")
+        if client_id is not None and not CLIENT_ID_PATTERN.match(client_id):
+            raise ValueError("Parameter client tidak valid")
+        with metrics.time(PIPELINE_STAGE_SECONDS, pipeline='frame', stage='imdecode'):
+            frame, scale_x, scale_y = decode_frame(request.get_data(cache=False),
+                                                   request.args.get('width', type=int),
+                                                   request.args.get('height', type=int),
+                                                   app.config['MAX_DETECTION_SIZE'], app.config['MAX_UPLOAD_PIXELS'])
+    except ImageTooLarge as e:
+        return jsonify({"success": False, "message": str(e)}), 413
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    with metrics.time(PIPELINE_STAGE_SECONDS, pipeline='frame', stage='detect'):
+        if client_id is None:
+            faces = detector.detect(frame, profile=FRAME_PROFILE)
+        else:
+            # Deteksi penuh pada keyframe, di antaranya hanya di sekitar wajah sebelumnya
+            with frame_trackers.use(client_id, frame.shape) as tracker:
+                faces = tracker.update(frame)
+    faces = scale_faces(faces, scale_x * scale, scale_y * scale)
+    if metrics.enabled:
+        FACES_PER_IMAGE.observe(len(faces), pipeline='frame')
+
+    response = jsonify({"success": True, "count": len(faces), "faces": np.asarray(faces).tolist()})
+    response.headers['Server-Timing'] = f"detect;dur={(time.perf_counter() - start) * 1000:.1f}"
+    return response
+
+@app.route('/upload_stats')
+def upload_stats():
+    """Kontrol penerimaan /upload: slot terpakai, antrean, jumlah diterima dan ditolak per alasan"""
+    return jsonify(upload_admission.stats())
+
+@app.route('/cache_stats')
+def cache_stats():
+    """Statistik cache hasil unggahan (hit, miss, ukuran)"""
+    return jsonify(result_cache.stats())
+
+def detect_batch_item(image_bytes):
+    """Deteksi wajah untuk satu gambar dalam batch. Mengembalikan dict hasil."""
+    try:
+        faces = detect_upload(image_bytes, 'batch')
+    except ImageTooLarge as e:
+        return {"success": False, "message": str(e)}
+    if faces is None:
+        return {"success": False, "message": "Gagal membaca gambar"}
+
+    if metrics.enabled:
+        FACES_PER_IMAGE.observe(len(faces), pipeline='batch')
+    return {
+        "success": True,
+        "message": f"{len(faces)} wajah terdeteksi",
+        "count": len(faces),
+        "faces": np.asarray(faces).tolist()
+    }
+
+def detach_uploads(files):
+    """Ambil alih stream file unggahan agar tetap terbuka selama respons streaming.
+
+    Flask menutup semua file request saat view selesai, sedangkan batch diproses
+    setelahnya di dalam generator respons.
+    """
+    uploads = []
+    for file in files:
+        if file.filename == '':
+            continue
+        uploads.append((file.filename, file.stream))
+        file.stream = BytesIO()
+    return uploads
+
+def iter_batch_images(uploads):
+    """Hasilkan (nama, bytes, error) untuk setiap gambar dari file unggahan atau arsip zip, satu per satu.
+
+    `error` berisi pesan (dan bytes None) untuk arsip yang rusak atau anggota
+    arsip yang melebihi FACE_MAX_UPLOAD_MB setelah diekstrak; file berikutnya
+    tetap diproses.
+    """
+    limit = app.config['MAX_CONTENT_LENGTH']
+    for filename, stream in uploads:
+        is_zip = filename.lower().endswith('.zip') or zipfile.is_zipfile(stream)
+        stream.seek(0)
+        if not is_zip:
+            yield filename, stream.read(), None
+            continue
+        try:
+            archive = zipfile.ZipFile(stream)
+        except zipfile.BadZipFile as e:
+            yield filename, None, f"Arsip zip tidak valid: {e}"
+            continue
+        with archive:
+            for info in archive.infolist():
+                if info.is_dir() or not info.filename.lower().endswith(IMAGE_EXTENSIONS):
+                    continue
+                yield (info.filename,) + read_archive_member(archive, info, limit)
+
+def read_archive_member(archive, info, limit):
+    """(bytes, None) untuk satu anggota arsip, atau (None, pesan) jika terlalu besar atau rusak.
+
+    Ukuran hasil ekstrak dibatasi seperti unggahan biasa: anggota yang mengaku
+    lebih besar dilewati, dan pembacaan berhenti di batas jika ukuran di
+    direktori arsip tidak jujur (zip bomb).
+    """
+    too_large = f"Gambar melebihi batas {app.config['MAX_UPLOAD_MB']} MB setelah diekstrak"
+    if limit and info.file_size > limit:
+        return None, too_large
+    try:
+        # Anggota arsip dibaca satu per satu hanya saat akan diproses
+        with archive.open(info) as member:
+            data = member.read(limit + 1 if limit else -1)
+    except (zipfile.BadZipFile, zlib.error, EOFError, NotImplementedError, RuntimeError) as e:
+        # Data rusak, metode kompresi tidak didukung, atau anggota terenkripsi
+        return None, f"Gagal mengekstrak dari arsip: {e}"
+    if limit and len(data) > limit:
+        return None, too_large
+    return data, None
+
+def generate_batch_results(uploads):
+    """Proses gambar dengan worker pool dan hasilkan baris NDJSON begitu setiap gambar selesai"""
+    executor = get_batch_executor()
+    # Batasi jumlah gambar yang sedang diproses agar memori tetap terbatas
+    max_in_flight = 2 * max(1, app.config['BATCH_WORKERS'])
+    pending = {}
+    total = 0
+    succeeded = 0
+
+    def result_line(future, index, filename):
+        try:
+            result = future.result()
+        except Exception as e:
+            result = {"success": False, "message": f"Gagal memproses gambar: {e}"}
+        result = dict(result, index=index, filename=filename)
+        return json.dumps(result) + "\n", result["success"]
+
+    try:
+        for filename, image_bytes, error in iter_batch_images(uploads):
+            if error is not None:
+                yield json.dumps({"success": False, "message": error, "index": total, "filename": filename}) + "\n"
+                total += 1
+                continue
+            pending[executor.submit(detect_batch_item, image_bytes)] = (total, filename)
+            total += 1
+            del image_bytes
+
+            while len(pending) >= max_in_flight:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    line, success = result_line(future, *pending.pop(future))
+                    succeeded += success
+                    yield line
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                line, success = result_line(future, *pending.pop(future))
+                succeeded += success
+                yield line
+
+        yield json.dumps({"done": True, "total": total, "succeeded": succeeded}) + "\n"
+    finally:
+        # Klien terputus: batalkan gambar yang belum mulai diproses
+        for future in pending:
+            future.cancel()
+        for _, stream in uploads:
+            stream.close()
+
+@app.route('/upload_batch', methods=['POST'])
+def upload_batch():
+    """Deteksi wajah pada banyak gambar (atau satu arsip zip) dan streaming hasil per gambar sebagai NDJSON"""
+    files = request.files.getlist('files') + request.files.getlist('file')
+    if not any(file.filename for file in files):
+        return jsonify({"success": False, "message": "Tidak ada file yang diunggah"})
+
+    # Inisialisasi cascade classifier jika belum
+    if detector is None:
+        if not load_detector():
+            return jsonify({"success": False, "message": "Gagal memuat cascade classifier"})
+
+    return Response(generate_batch_results(detach_uploads(files)),
+                    mimetype='application/x-ndjson')
+
+@app.route('/cascades')
+def cascades_info():
+    """Info cascade yang dimuat: path, ukuran, waktu muat per cascade, dan durasi warm-up"""
+    if detector is None:
+        return jsonify({"loaded": False})
+    return jsonify(dict(detector.load_stats(), loaded=True))
+
+@app.route('/healthz')
+def healthz():
+    """Readiness probe: 200 jika cascade sudah dimuat dan di-warm-up, 503 jika belum.
+
+    Tidak memuat cascade sendiri sehingga murah untuk di-poll (launcher desktop,
+    load balancer, orkestrator).
+    """
+    # Detektor global baru diisi setelah load() dan warm_up() selesai (lihat load_detector)
+    ready = detector is not None and bool(detector.warmup_ms)
+    response = jsonify({
+        "status": "ok" if ready else "starting",
+        "ready": ready,
+        "cascades": sorted(detector.cascades) if detector is not None else [],
+        "warmup_ms": dict(detector.warmup_ms) if detector is not None else {},
+        "pid": os.getpid(),
     })
+    response.status_code = 200 if ready else 503
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+# Muat cascade dan warm-up sekali saat proses dimulai, bukan saat permintaan pertama
+if app.config['EAGER_LOAD'] and detector is None:
+    load_detector()
 
 if __name__ == '__main__':
+    # Server pengembangan (satu proses); untuk produksi gunakan src/serve.py
     app.run(debug=True)
@@ -0,0 +1,485 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Mode server ASGI/asyncio untuk banyak penonton MJPEG
+Copyright (c) 2025, Ahmad Fadlilah (https://github.com/ahmadfadlilah)
+
+Pada server berthread, setiap penonton /video_feed menahan satu thread selama
+koneksinya terbuka. Di mode ini penonton dilayani sebagai coroutine ringan:
+satu thread per kamera mengambil JPEG dari `FrameBroadcaster` sesi kamera dan
+membagikannya ke semua coroutine penonton. Pelanggan /detections/stream (SSE)
+dilayani dengan cara yang sama. Route lain (unggahan, statistik,
+/metrics) tetap dijalankan oleh aplikasi Flask yang sama di thread pool
+terbatas, sehingga deteksi yang berat CPU tidak pernah berjalan di event loop.
+
+Menjalankan:
+    python src/asgi.py                       # server asyncio bawaan (tanpa dependensi)
+    uvicorn src.asgi:app --port 5000         # atau server ASGI apa pun
+"""
+
+import asyncio
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from io import BytesIO
+from urllib.parse import unquote
+
+try:
+    from . import app as webapp
+except ImportError:
+    import app as webapp
+
+# Jumlah thread untuk route Flask (unggahan, deteksi, statistik); 0 = bawaan ThreadPoolExecutor
+ASGI_WORKERS = int(os.environ.get('FACE_ASGI_WORKERS', '0'))
+# Batas ukuran header permintaan server bawaan (bytes)
+MAX_HEADER_BYTES = 64 * 1024
+MJPEG_CONTENT_TYPE = b'multipart/x-mixed-replace; boundary=frame'
+SSE_CONTENT_TYPE = b'text/event-stream'
+# Route streaming yang dilayani sebagai coroutine: jalur -> (broadcaster sesi, content type)
+STREAM_ROUTES = {
+    'video_feed': ('broadcaster', MJPEG_CONTENT_TYPE),
+    'detections/stream': ('detections', SSE_CONTENT_TYPE),
+}
+
+
+class AsyncFrameFeed:
+    """Bagikan JPEG satu `FrameBroadcaster` ke banyak coroutine penonton.
+
+    Satu thread pompa (hanya selama ada penonton) menunggu frame baru pada
+    broadcaster, yang juga meng-encode-nya sekali, lalu meneruskannya ke event
+    loop. Penonton hanya menunggu future "frame berikutnya", jadi biaya per
+    penonton hanyalah satu coroutine dan penulisan socket.
+    """
+
+    def __init__(self, broadcaster, loop):
+        self.broadcaster = broadcaster
+        self.loop = loop
+        self.viewers = 0
+        self._jpeg = None
+        self._version = 0
+        self._ended = False
+        self._next = loop.create_future()
+        self._pump = None
+
+    def _ensure_pump(self):
+        if self._pump is None:
+            self._ended = False
+            self._pump = threading.Thread(target=self._run_pump, name='asgi-feed', daemon=True)
+            self._pump.start()
+
+    def _run_pump(self):
+        version = 0
+        while self.viewers > 0:
+            result = self.broadcaster.wait_for_jpeg(version, timeout=1.0)
+            if result is None:
+                if self.broadcaster.closed:
+                    break
+                continue
+            version, jpeg = result
+            self.loop.call_soon_threadsafe(self._publish, jpeg)
+        self.loop.call_soon_threadsafe(self._finish, self.broadcaster.closed)
+
+    def _wake(self):
+        waiter, self._next = self._next, self.loop.create_future()
+        waiter.set_result(None)
+
+    def _publish(self, jpeg):
+        self._jpeg = jpeg
+        self._version += 1
+        self._wake()
+
+    def _finish(self, closed):
+        self._pump = None
+        if closed:
+            # Siaran ditutup (deteksi berhenti): akhiri semua stream seperti di server berthread
+            self._ended = True
+            self._jpeg = None
+            self._wake()
+        elif self.viewers > 0:
+            # Penonton baru datang tepat saat pompa berhenti
+            self._ensure_pump()
+
+    async def frames(self):
+        """JPEG untuk satu penonton; berhenti ketika siaran ditutup"""
+        self.viewers += 1
+        self.broadcaster.add_viewers(1)
+        self._ensure_pump()
+        try:
+            version = 0
+            while True:
+                if self._jpeg is not None and self._version > version:
+                    version = self._version
+                    yield self._jpeg
+                    continue
+                if self._ended:
+                    return
+                await self._next
+        finally:
+            self.viewers -= 1
+            self.broadcaster.add_viewers(-1)
+
+
+class FaceDetectionASGI:
+    """Aplikasi ASGI: /video_feed dan /detections/stream sebagai coroutine, route lain ke aplikasi Flask di thread pool"""
+
+    def __init__(self, flask_app=None, sessions=None, workers=ASGI_WORKERS):
+        self.flask_app = flask_app or webapp.app
+        self.sessions = sessions or webapp.sessions
+        self.workers = workers
+        self.executor = None
+        self.feeds = {}
+
+    @property
+    def max_body_bytes(self):
+        """Batas body permintaan dari MAX_CONTENT_LENGTH Flask (None = tanpa batas)"""
+        return self.flask_app.config.get('MAX_CONTENT_LENGTH')
+
+    def get_executor(self):
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.workers or None, thread_name_prefix='asgi-worker')
+        return self.executor
+
+    def shutdown(self):
+        self.sessions.stop_all()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif scope['type'] == 'http':
+            route = self.stream_route(scope)
+            if route is not None:
+                await self.stream(*route, send)
+            else:
+                await self.call_wsgi(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                self.get_executor()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await asyncio.get_running_loop().run_in_executor(None, self.shutdown)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    @staticmethod
+    def stream_route(scope):
+        """(route, camera_id) untuk GET /video_feed[/<camera_id>] atau /detections/stream[/<camera_id>].
+
+        camera_id None berarti kamera bawaan; None untuk route lain.
+        """
+        if scope['method'] != 'GET':
+            return None
+        path = scope['path'].strip('/')
+        for route in STREAM_ROUTES:
+            if path == route:
+                return route, None
+            camera_id = path[len(route) + 1:] if path.startswith(route + '/') else ''
+            if camera_id and '/' not in camera_id:
+                return route, camera_id
+        return None
+
+    def get_feed(self, route, session):
+        key = (route, session.camera_id)
+        feed = self.feeds.get(key)
+        if feed is None:
+            broadcaster = getattr(session, STREAM_ROUTES[route][0])
+            feed = self.feeds[key] = AsyncFrameFeed(broadcaster, asyncio.get_running_loop())
+        return feed
+
+    async def stream(self, route, camera_id, send):
+        """Streaming MJPEG (atau SSE) untuk satu penonton sebagai coroutine"""
+        session = self.sessions.get(camera_id)
+        if session is None:
+            await send_text(send, 404, f"Kamera '{camera_id}' tidak dikonfigurasi")
+            return
+
+        content_type = STREAM_ROUTES[route][1]
+        await send({'type': 'http.response.start', 'status': 200,
+                    'headers': [(b'content-type', content_type), (b'cache-control', b'no-cache')]})
+        frames = self.get_feed(route, session).frames()
+        try:
+            if content_type == SSE_CONTENT_TYPE:
+                # Sama dengan generate_events di app.py: sambung ulang 1 detik setelah stream berakhir
+                await send({'type': 'http.response.body', 'body': b'retry: 1000\n\n', 'more_body': True})
+            async for payload in frames:
+                if content_type == MJPEG_CONTENT_TYPE:
+                    payload = b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + payload + b'\r\n'
+                await send({'type': 'http.response.body', 'more_body': True, 'body': payload})
+            await send({'type': 'http.response.body', 'body': b''})
+        except OSError:
+            # Penonton menutup koneksi
+            pass
+        finally:
+            # Lepaskan penonton segera, bukan saat generator dibersihkan GC
+            await frames.aclose()
+
+    async def call_wsgi(self, scope, receive, send):
+        """Jalankan aplikasi Flask untuk satu permintaan di thread pool"""
+        # Body dikumpulkan di memori sebelum Flask melihatnya, jadi MAX_CONTENT_LENGTH diterapkan di sini
+        limit = self.max_body_bytes
+        try:
+            declared = content_length(scope.get('headers', []))
+        except ValueError:
+            await send_json(send, 400, bad_request_payload())
+            return
+        if limit and declared is not None and declared > limit:
+            await send_json(send, 413, too_large_payload(limit))
+            return
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+            body += message.get('body', b'')
+            if limit and len(body) > limit:
+                await send_json(send, 413, too_large_payload(limit))
+                return
+            if not message.get('more_body'):
+                break
+
+        loop = asyncio.get_running_loop()
+        executor = self.get_executor()
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                                   for name, value in headers]
+
+        def run():
+            result = self.flask_app.wsgi_app(wsgi_environ(scope, bytes(body)), start_response)
+            iterator = iter(result)
+            if any(name == b'content-length' for name, _ in response['headers']):
+                # Respons biasa sudah ada di memori: kumpulkan sekaligus, tanpa bolak-balik ke pool
+                chunks = b''.join(iterator)
+                close_result(result)
+                return None, None, chunks
+            return result, iterator, next(iterator, None)
+
+        result, iterator, chunk = await loop.run_in_executor(executor, run)
+        await send({'type': 'http.response.start', 'status': response['status'], 'headers': response['headers']})
+        if iterator is None:
+            await send({'type': 'http.response.body', 'body': chunk})
+            return
+
+        # Respons streaming (misalnya NDJSON /upload_batch): setiap potongan dibuat di thread pool
+        try:
+            while chunk is not None:
+                if chunk:
+                    await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+                chunk = await loop.run_in_executor(executor, next, iterator, None)
+            await send({'type': 'http.response.body', 'body': b''})
+        except OSError:
+            pass
+        finally:
+            await loop.run_in_executor(executor, close_result, result)
+
+
+def close_result(result):
+    if hasattr(result, 'close'):
+        result.close()
+
+
+def wsgi_environ(scope, body):
+    """Environ WSGI (PEP 3333) dari scope ASGI dan body permintaan"""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': str(server[0]),
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value
+        elif name != 'CONTENT_LENGTH':
+            key = 'HTTP_' + name
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+def content_length(headers):
+    """Nilai header Content-Length (None jika tidak ada). Melempar ValueError jika bukan bilangan bulat >= 0."""
+    for name, value in headers:
+        if name.lower() == b'content-length':
+            length = int(value.strip() or b'0')
+            if length < 0:
+                raise ValueError("Content-Length negatif")
+            return length
+    return None
+
+
+def too_large_payload(limit):
+    # Sama dengan handler 413 aplikasi Flask
+    return {"success": False, "message": f"Ukuran unggahan melebihi batas {limit / (1024 * 1024):g} MB"}
+
+
+def bad_request_payload():
+    return {"success": False, "message": "Header Content-Length tidak valid"}
+
+
+def json_response(status, payload):
+    """Respons HTTP/1.1 mentah berisi JSON untuk server bawaan, sebelum permintaan diteruskan ke aplikasi"""
+    body = json.dumps(payload).encode('utf-8')
+    return (f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n").encode('latin-1') + body
+
+
+async def send_json(send, status, payload):
+    body = json.dumps(payload).encode('utf-8')
+    await send({'type': 'http.response.start', 'status': status,
+                'headers': [(b'content-type', b'application/json'),
+                            (b'content-length', str(len(body)).encode())]})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def send_text(send, status, text):
+    body = text.encode('utf-8')
+    await send({'type': 'http.response.start', 'status': status,
+                'headers': [(b'content-type', b'text/plain; charset=utf-8'),
+                            (b'content-length', str(len(body)).encode())]})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+# Server HTTP/1.1 asyncio minimal untuk menjalankan aplikasi ASGI tanpa dependensi tambahan.
+# Satu permintaan per koneksi (Connection: close); respons tanpa Content-Length dikirim chunked.
+
+async def read_request(reader):
+    """Baca baris permintaan dan header. Mengembalikan (method, target, headers) atau None."""
+    data = await reader.readuntil(b'\r\n\r\n')
+    if len(data) > MAX_HEADER_BYTES:
+        raise ValueError("Header terlalu besar")
+    lines = data.decode('latin-1').split('\r\n')
+    method, target, _ = lines[0].split(' ', 2)
+    headers = []
+    for line in lines[1:]:
+        if line:
+            name, _, value = line.partition(':')
+            headers.append((name.strip().lower().encode('latin-1'), value.strip().encode('latin-1')))
+    return method, target, headers
+
+
+async def handle_connection(asgi_app, reader, writer):
+    try:
+        try:
+            method, target, headers = await read_request(reader)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            return
+        header_map = dict(headers)
+        if header_map.get(b'transfer-encoding'):
+            writer.write(b'HTTP/1.1 501 Not Implemented\r\nContent-Length: 0\r\nConnection: close\r\n\r\n')
+            return
+        try:
+            length = content_length(headers) or 0
+        except ValueError:
+            writer.write(json_response(400, bad_request_payload()))
+            await writer.drain()
+            return
+        # Tolak body yang terlalu besar sebelum dibaca, bukan setelah seluruhnya ada di memori
+        limit = getattr(asgi_app, 'max_body_bytes', None)
+        if limit and length > limit:
+            writer.write(json_response(413, too_large_payload(limit)))
+            await writer.drain()
+            return
+        if header_map.get(b'expect', b'').lower() == b'100-continue':
+            writer.write(b'HTTP/1.1 100 Continue\r\n\r\n')
+        body = await reader.readexactly(length)
+
+        path, _, query = target.partition('?')
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': method.upper(),
+            'scheme': 'http', 'path': unquote(path), 'raw_path': path.encode('latin-1'),
+            'query_string': query.encode('latin-1'), 'root_path': '', 'headers': headers,
+            'client': writer.get_extra_info('peername'), 'server': writer.get_extra_info('sockname'),
+        }
+        request_sent = False
+        state = {'chunked': False}
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {'type': 'http.request', 'body': body, 'more_body': False}
+            # Setelah body, tunggu sampai klien menutup koneksi
+            while await reader.read(65536):
+                pass
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                response_headers = list(message.get('headers', []))
+                if not any(name.lower() == b'content-length' for name, _ in response_headers):
+                    state['chunked'] = True
+                    response_headers.append((b'transfer-encoding', b'chunked'))
+                response_headers.append((b'connection', b'close'))
+                lines = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}".encode('latin-1')]
+                lines += [name + b': ' + value for name, value in response_headers]
+                writer.write(b'\r\n'.join(lines) + b'\r\n\r\n')
+            elif message['type'] == 'http.response.body':
+                chunk = message.get('body', b'')
+                if state['chunked']:
+                    if chunk:
+                        writer.write(f"{len(chunk):x}\r\n".encode() + chunk + b'\r\n')
+                    if not message.get('more_body'):
+                        writer.write(b'0\r\n\r\n')
+                else:
+                    writer.write(chunk)
+            if writer.is_closing():
+                raise ConnectionResetError("Koneksi ditutup oleh klien")
+            await writer.drain()
+
+        await asgi_app(scope, receive, send)
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(asgi_app, host='127.0.0.1', port=5000, ready=None):
+    """Jalankan aplikasi ASGI dengan server asyncio bawaan sampai dibatalkan"""
+    server = await asyncio.start_server(lambda r, w: handle_connection(asgi_app, r, w), host, port,
+                                        limit=MAX_HEADER_BYTES, backlog=1024)
+    print(f"Server ASGI berjalan di http://{host}:{port}")
+    if ready is not None:
+        ready.set()
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        if hasattr(asgi_app, 'shutdown'):
+            asgi_app.shutdown()
+
+
+app = FaceDetectionASGI()
+
+if __name__ == '__main__':
+    try:
+        asyncio.run(serve(app, host=os.environ.get('FACE_HOST', '127.0.0.1'),
+                          port=int(os.environ.get('FACE_PORT', '5000'))))
+    except KeyboardInterrupt:
+        print("Server dihentikan.")
@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Pool buffer gambar yang dipakai ulang antar frame (tujuan `dst=` OpenCV)
+Copyright (c) 2025, Ahmad Fadlilah (https://github.com/ahmadfadlilah)
+"""
+
+import numpy as np
+
+# Buffer yang lebih besar dari ini (piksel) tidak disimpan di pool: gambar unggahan
+# yang sangat besar dialokasikan biasa agar memorinya bisa dibebaskan
+MAX_POOLED_PIXELS = 1920 * 1080
+
+
+class BufferPool:
+    """Buffer bernama yang dialokasikan sekali lalu dipakai ulang.
+
+    Setiap nama (misalnya 'gray' atau 'enhanced') memiliki satu buffer per
+    dtype dan jumlah kanal. Buffer tumbuh ke ukuran terbesar yang pernah
+    diminta; permintaan yang lebih kecil (misalnya area pencarian pelacak yang
+    ukurannya berubah-ubah) mendapat view dari buffer tersebut, sehingga pada
+    keadaan stabil tidak ada alokasi baru. Isi buffer ditimpa oleh permintaan
+    berikutnya dengan nama yang sama, jadi pool tidak boleh dipakai bersama
+    antar thread.
+    """
+
+    def __init__(self, max_pixels=MAX_POOLED_PIXELS):
+        self.max_pixels = max_pixels
+        self._buffers = {}
+        self.allocations = 0
+
+    def get(self, name, shape, dtype=np.uint8):
+        """Array dengan bentuk `shape` (tinggi, lebar[, kanal]) untuk dipakai sebagai dst"""
+        height, width = shape[:2]
+        if height * width > self.max_pixels:
+            return np.empty(shape, dtype=dtype)
+
+        key = (name, np.dtype(dtype).str, tuple(shape[2:]))
+        buffer = self._buffers.get(key)
+        if buffer is None or buffer.shape[0] < height or buffer.shape[1] < width:
+            capacity = (height, width) if buffer is None else (max(height, buffer.shape[0]), max(width, buffer.shape[1]))
+            buffer = self._buffers[key] = np.empty(capacity + tuple(shape[2:]), dtype=dtype)
+            self.allocations += 1
+        return buffer[:height, :width]
+
+    def clear(self):
+        self._buffers.clear()
+
+    @property
+    def nbytes(self):
+        return sum(buffer.nbytes for buffer in self._buffers.values())
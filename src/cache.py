@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Cache hasil deteksi berbasis isi (content-addressed) untuk unggahan berulang
+Copyright (c) 2025, Ahmad Fadlilah (https://github.com/ahmadfadlilah)
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+def content_key(data, *parts):
+    """Buat kunci cache dari hash isi bytes ditambah bagian lain (profil, fingerprint detektor, mode)"""
+    digest = hashlib.sha256(data).hexdigest()
+    return (digest,) + tuple(parts)
+
+
+class ResultCache:
+    """Cache LRU dengan batas total ukuran (bytes), kedaluwarsa TTL, dan penghitung hit/miss.
+
+    Setiap entri menyimpan nilai beserta ukurannya. Entri yang paling lama
+    tidak dipakai dibuang saat total ukuran melebihi `max_bytes`, dan entri
+    yang lebih tua dari `ttl` detik dianggap tidak ada. `max_bytes=0`
+    menonaktifkan cache.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, ttl=3600, clock=time.monotonic):
+        self.max_bytes = max(0, int(max_bytes))
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self.current_bytes -= size
+
+    def get(self, key):
+        """Ambil nilai dari cache (None jika tidak ada atau sudah kedaluwarsa)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl and self.clock() - entry[2] > self.ttl:
+                self._remove(key)
+                self.evictions += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, size):
+        """Simpan nilai; entri yang lebih besar dari seluruh kapasitas tidak disimpan"""
+        if not self.enabled or size > self.max_bytes:
+            return False
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, self.clock())
+            self.current_bytes += size
+            # Buang entri yang paling lama tidak dipakai sampai muat lagi
+            while self.current_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+        return True
+
+    def clear(self):
+        """Kosongkan cache dan reset penghitung"""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self):
+        """Statistik cache untuk pemantauan"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Thread penangkap kamera dengan buffer satu slot "frame terbaru"
+Copyright (c) 2025, Ahmad Fadlilah (https://github.com/ahmadfadlilah)
+"""
+
+import threading
+import time
+
+
+class LatestFrameCapture:
+    """Kuras `VideoCapture` di thread tersendiri dan simpan hanya frame terbaru.
+
+    Jika deteksi lebih lambat dari kamera, frame yang belum sempat diambil
+    ditimpa oleh frame yang lebih baru (dihitung sebagai `dropped`), sehingga
+    frame tidak menumpuk di buffer driver dan stream tidak tertinggal dari
+    kenyataan.
+
+    Untuk sumber yang tidak berjalan sesuai waktu nyata (misalnya file video
+    dengan `realtime=False`, lihat `src/sources.py`), thread penangkap menunggu
+    sampai frame sebelumnya diambil: tidak ada frame yang dibuang dan setiap
+    frame diproses secepat mungkin. Atur dengan `lossless`; bawaannya mengikuti
+    atribut `live` sumber (VideoCapture biasa dianggap live).
+
+    Frame yang sudah selesai dipakai dapat dikembalikan dengan `recycle()`;
+    frame berikutnya dibaca ke buffer tersebut (`source.read(buffer)`) sehingga
+    loop live tidak mengalokasikan array frame baru. Bawaannya aktif jika sumber
+    memiliki atribut `reuses_buffers` (semua sumber di `src/sources.py`).
+    """
+
+    # Batas buffer cadangan yang disimpan; frame lain dibiarkan dibebaskan
+    MAX_SPARE_FRAMES = 3
+
+    def __init__(self, source, lossless=None, reuse_buffers=None):
+        self.source = source
+        if lossless is None:
+            lossless = not getattr(source, 'live', True)
+        self.lossless = lossless
+        if reuse_buffers is None:
+            reuse_buffers = getattr(source, 'reuses_buffers', False)
+        self.reuse_buffers = reuse_buffers
+        self._spare = []
+        self._condition = threading.Condition()
+        self._thread = None
+        self._frame = None
+        self._frame_time = None
+        self._running = False
+        self.failed = False
+        self.captured = 0
+        self.processed = 0
+        self.dropped = 0
+        # Umur frame terakhir saat diambil oleh pemroses (detik)
+        self.last_frame_age = 0.0
+
+    @property
+    def running(self):
+        return self._running
+
+    def start(self):
+        """Mulai thread penangkap. Mengembalikan objek ini agar bisa dirangkai."""
+        with self._condition:
+            if self._running:
+                return self
+            self._running = True
+            self.failed = False
+        self._thread = threading.Thread(target=self._run, name='camera-capture', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=2.0):
+        """Hentikan thread penangkap dan bangunkan pemroses yang sedang menunggu"""
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        while self._running:
+            with self._condition:
+                buffer = self._spare.pop() if self._spare else None
+            success, frame = self.source.read(buffer) if buffer is not None else self.source.read()
+            with self._condition:
+                if self.lossless:
+                    # Tunggu pemroses mengambil frame sebelumnya, jangan ditimpa
+                    self._condition.wait_for(lambda: self._frame is None or not self._running)
+                    if not self._running:
+                        return
+                now = time.monotonic()
+                if not success:
+                    print("Gagal membaca frame dari sumber video (atau sumber sudah habis).")
+                    self.failed = True
+                    self._running = False
+                    self._condition.notify_all()
+                    return
+                if self._frame is not None:
+                    # Frame sebelumnya belum sempat diproses: buang, simpan yang terbaru
+                    self.dropped += 1
+                    self._keep_spare(self._frame)
+                self._frame = frame
+                self._frame_time = now
+                self.captured += 1
+                self._condition.notify_all()
+
+    def read(self, timeout=None):
+        """Ambil frame terbaru yang belum diproses; tunggu jika belum ada.
+
+        Mengembalikan None jika penangkapan berhenti (gagal membaca atau
+        dihentikan) atau batas waktu habis.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._frame is not None or not self._running, timeout)
+            if self._frame is None:
+                return None
+            frame = self._frame
+            self._frame = None
+            self.processed += 1
+            # Bangunkan thread penangkap yang menunggu slot kosong (mode lossless)
+            self._condition.notify_all()
+            self.last_frame_age = time.monotonic() - self._frame_time
+            return frame
+
+    def recycle(self, frame):
+        """Kembalikan frame yang tidak dipakai lagi (oleh siapa pun) untuk diisi frame berikutnya"""
+        if frame is None or not self.reuse_buffers:
+            return
+        with self._condition:
+            self._keep_spare(frame)
+
+    def _keep_spare(self, frame):
+        if self.reuse_buffers and len(self._spare) < self.MAX_SPARE_FRAMES:
+            self._spare.append(frame)
+
+    def stats(self):
+        """Penghitung frame untuk pemantauan"""
+        with self._condition:
+            return {
+                "running": self._running,
+                "failed": self.failed,
+                "lossless": self.lossless,
+                "captured": self.captured,
+                "processed": self.processed,
+                "dropped": self.dropped,
+                "last_frame_age_ms": round(self.last_frame_age * 1000, 1),
+            }
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Registri file cascade Haar: dicari secara lokal, dimuat sekali, dan diukur waktu muatnya
+Copyright (c) 2025, Ahmad Fadlilah (https://github.com/ahmadfadlilah)
+"""
+
+import os
+import time
+
+import cv2
+
+# File cascade yang digunakan, dengan nama pendek sebagai kunci
+CASCADE_FILES = {
+    'default': 'haarcascade_frontalface_default.xml',
+    'alt': 'haarcascade_frontalface_alt.xml',
+    'alt2': 'haarcascade_frontalface_alt2.xml',
+    'profile': 'haarcascade_profileface.xml'
+}
+
+# Cascade yang wajib ada; cascade lain dilewati jika tidak ditemukan
+REQUIRED_CASCADES = ('default',)
+
+CASCADE_URL = 'https://raw.githubusercontent.com/opencv/opencv/master/data/haarcascades/{}'
+
+
+def bundled_cascade_dir():
+    """Folder cascade bawaan paket opencv-python (None jika tidak tersedia)"""
+    data = getattr(cv2, 'data', None)
+    return getattr(data, 'haarcascades', None)
+
+
+def download_cascades(cascade_dir='.'):
+    """Download file cascade yang belum ada. Mengembalikan False jika cascade utama gagal diunduh."""
+    import requests
+
+    for cascade_name, cascade_file in CASCADE_FILES.items():
+        path = os.path.join(cascade_dir, cascade_file)
+        if os.path.exists(path):
+            continue
+
+        print(f"File cascade '{cascade_file}' tidak ditemukan, mengunduh...")
+        try:
+            response = requests.get(CASCADE_URL.format(cascade_file), timeout=10)
+            response.raise_for_status()
+            with open(path, 'wb') as f:
+                f.write(response.content)
+            print(f"Unduhan {cascade_file} selesai.")
+        except Exception as e:
+            print(f"Gagal mengunduh file cascade: {e}")
+            # Lanjutkan meskipun gagal mengunduh file tambahan
+            if cascade_name in REQUIRED_CASCADES:
+                return False
+    return True
+
+
+class CascadeRegistry:
+    """Cari file cascade tanpa akses jaringan, muat dan validasi sekali, dan catat waktu muat.
+
+    Urutan pencarian: folder yang dikonfigurasi (jika ada), lalu folder
+    bawaan `cv2.data.haarcascades`. File pertama yang ditemukan dipakai.
+    """
+
+    def __init__(self, search_dirs=None, files=None):
+        if search_dirs is None:
+            search_dirs = [bundled_cascade_dir()]
+        self.search_dirs = [d for d in search_dirs if d]
+        self.files = dict(files) if files else dict(CASCADE_FILES)
+        self.cascades = {}
+        self.info = {}
+        self.errors = {}
+
+    def find(self, filename):
+        """Path file cascade pertama yang ditemukan di folder pencarian (None jika tidak ada)"""
+        for directory in self.search_dirs:
+            path = os.path.join(directory, filename)
+            if os.path.isfile(path):
+                return path
+        return None
+
+    def load(self):
+        """Muat dan validasi semua cascade. Mengembalikan True jika semua cascade wajib berhasil dimuat."""
+        self.cascades.clear()
+        self.info.clear()
+        self.errors.clear()
+
+        for name, filename in self.files.items():
+            path = self.find(filename)
+            if path is None:
+                self.errors[name] = f"File '{filename}' tidak ditemukan di {self.search_dirs}"
+                continue
+
+            start = time.perf_counter()
+            try:
+                classifier = cv2.CascadeClassifier(path)
+            except Exception as e:
+                self.errors[name] = f"File '{path}' gagal diparse: {e}"
+                continue
+            load_time = time.perf_counter() - start
+            if classifier.empty():
+                self.errors[name] = f"File '{path}' bukan cascade yang valid"
+                continue
+
+            stat = os.stat(path)
+            self.cascades[name] = classifier
+            self.info[name] = {
+                'path': path,
+                'size': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns,
+                'load_ms': round(load_time * 1000, 2),
+            }
+
+        return all(name in self.cascades for name in REQUIRED_CASCADES if name in self.files)
+
+    def stats(self):
+        """Informasi per cascade (path, ukuran, waktu muat) dan error yang terjadi"""
+        return {
+            "search_dirs": list(self.search_dirs),
+            "cascades": {name: dict(info) for name, info in self.info.items()},
+            "errors": dict(self.errors),
+        }
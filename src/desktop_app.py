@@ -5,23 +5,76 @@ Aplikasi Desktop untuk Menjalankan Deteksi Wajah dengan Web Interface
 Copyright (c) 2025, Ahmad Fadlilah (https://github.com/ahmadfadlilah)
 """
 
+import json
 import os
+import queue
 import sys
 import tkinter as tk
-from tkinter import messagebox, ttk
+from tkinter import messagebox, scrolledtext, ttk
 import threading
+import urllib.error
+import urllib.request
 import webbrowser
 import subprocess
 import time
 
-class FaceDetectionApp(tk.Tk):    def __init__(self):
+SERVER_URL = "http://127.0.0.1:5000"
+# Readiness probe server web: 200 setelah cascade dimuat dan di-warm-up
+HEALTH_URL = SERVER_URL + "/healthz"
+# Batas waktu menunggu server siap (detik); jalankan pertama bisa mengunduh cascade
+READY_TIMEOUT = 120
+# Jumlah baris log server yang disimpan di jendela; baris terlama dibuang
+MAX_LOG_LINES = 500
+
+
+def check_ready(url=HEALTH_URL, timeout=1.0):
+    """Data /healthz jika server siap, None jika belum (503) atau belum bisa dihubungi"""
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            data = json.loads(response.read())
+    except (urllib.error.URLError, OSError, ValueError):
+        return None
+    return data if data.get("ready") else None
+
+
+def pump_output(process, events):
+    """Baca output subprocess baris per baris ke antrean event sampai proses selesai.
+
+    Dijalankan di thread latar agar pipe tidak pernah penuh: server yang banyak
+    menulis log tidak akan macet menunggu pipe dibaca.
+    """
+    for line in process.stdout:
+        events.put(("log", process, line))
+    process.stdout.close()
+    events.put(("exited", process, process.wait()))
+
+
+def wait_until_ready(process, events, url=HEALTH_URL, timeout=READY_TIMEOUT, interval=0.25):
+    """Poll readiness probe di thread latar sampai server siap, proses berhenti, atau batas waktu habis"""
+    deadline = time.monotonic() + timeout
+    while process.poll() is None:
+        data = check_ready(url)
+        if data is not None:
+            events.put(("ready", process, data))
+            return
+        if time.monotonic() > deadline:
+            events.put(("timeout", process, timeout))
+            return
+        time.sleep(interval)
+    # Proses yang berhenti dilaporkan oleh pump_output
+
+
+class FaceDetectionApp(tk.Tk):
+    def __init__(self):
         super().__init__()
         self.title("Deteksi Wajah dengan Haar Cascade")
-        self.geometry("500x400")
+        self.geometry("500x560")
         self.configure(bg="#f0f0f0")
         
         self.server_process = None
         self.server_running = False
+        # Event dari thread latar (baris log, server siap, server berhenti); widget Tk hanya diubah di thread utama
+        self.events = queue.Queue()
         
         # Tampilkan copyright di konsol saat aplikasi dijalankan
         print("Deteksi Wajah dengan Haar Cascade")
@@ -30,6 +83,7 @@ class FaceDetectionApp(tk.Tk):    def __init__(self):
         
         self.create_widgets()
         self.protocol("WM_DELETE_WINDOW", self.on_closing)
+        self.after(100, self.process_events)
     
     def create_widgets(self):
         # Header
@@ -113,6 +167,25 @@ class FaceDetectionApp(tk.Tk):    def __init__(self):
         )
         self.open_browser_button.pack(side=tk.LEFT, padx=5)
         
+        # Log server
+        log_frame = tk.LabelFrame(
+            content_frame, 
+            text="Log Server", 
+            padx=10, 
+            pady=10,
+            bg="#f0f0f0",
+            font=("Arial", 12)
+        )
+        log_frame.pack(fill=tk.BOTH, expand=True, pady=10)
+        
+        self.log_text = scrolledtext.ScrolledText(
+            log_frame, 
+            height=10, 
+            font=("Courier", 9),
+            state=tk.DISABLED
+        )
+        self.log_text.pack(fill=tk.BOTH, expand=True)
+        
         # Status
         self.status_frame = tk.Frame(self, bg="#f8f9fa", padx=10, pady=5)
         self.status_frame.pack(fill=tk.X, side=tk.BOTTOM)
@@ -154,34 +227,72 @@ class FaceDetectionApp(tk.Tk):    def __init__(self):
                 self.progress_bar.pack_forget()
                 return
         
-        # Jalankan server di thread terpisah
-        server_thread = threading.Thread(target=self._run_server, args=(app_path,))
-        server_thread.daemon = True
-        server_thread.start()
-        
-        # Tunggu sebentar hingga server berjalan
-        time.sleep(2)
-        
-        self.server_running = True
-        self.start_button.config(state=tk.DISABLED)
-        self.stop_button.config(state=tk.NORMAL)
-        self.open_browser_button.config(state=tk.NORMAL)
-        
-        self.set_status("Server web sedang berjalan di http://127.0.0.1:5000")
-        self.progress_bar.stop()
-        self.progress_bar.pack_forget()
-    
-    def _run_server(self, app_path):
         try:
+            # stderr digabung ke stdout sehingga satu thread cukup untuk menguras keduanya
             self.server_process = subprocess.Popen(
                 [sys.executable, app_path],
                 stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
+                stderr=subprocess.STDOUT,
+                text=True,
+                bufsize=1,
+                env=dict(os.environ, PYTHONUNBUFFERED="1")
             )
-            self.server_process.wait()
         except Exception as e:
             self.set_status(f"Error: {str(e)}")
+            self.progress_bar.stop()
+            self.progress_bar.pack_forget()
+            return
+        
+        # Output dibaca dan readiness di-poll di thread latar; jendela tetap responsif
+        for target in (pump_output, wait_until_ready):
+            threading.Thread(target=target, args=(self.server_process, self.events), daemon=True).start()
+        
+        self.server_running = True
+        self.start_button.config(state=tk.DISABLED)
+        self.stop_button.config(state=tk.NORMAL)
+        self.append_log(f"$ {sys.executable} {app_path}\n")
+    
+    def process_events(self):
+        """Terapkan event dari thread latar ke widget, lalu jadwalkan ulang"""
+        for _ in range(200):
+            try:
+                kind, process, payload = self.events.get_nowait()
+            except queue.Empty:
+                break
+            # Abaikan event dari server yang sudah dihentikan
+            if process is not self.server_process:
+                continue
+            if kind == "log":
+                self.append_log(payload)
+            elif kind == "ready":
+                self.open_browser_button.config(state=tk.NORMAL)
+                self.set_status(f"Server web siap di {SERVER_URL}")
+                self.progress_bar.stop()
+                self.progress_bar.pack_forget()
+            elif kind == "timeout":
+                self.set_status(f"Server web belum siap setelah {payload} detik, lihat log server")
+                self.progress_bar.stop()
+                self.progress_bar.pack_forget()
+            elif kind == "exited":
+                self.server_process = None
+                self.server_running = False
+                self.start_button.config(state=tk.NORMAL)
+                self.stop_button.config(state=tk.DISABLED)
+                self.open_browser_button.config(state=tk.DISABLED)
+                self.set_status(f"Server web berhenti (kode {payload}), lihat log server")
+                self.progress_bar.stop()
+                self.progress_bar.pack_forget()
+        self.after(100, self.process_events)
+    
+    def append_log(self, line):
+        self.log_text.config(state=tk.NORMAL)
+        self.log_text.insert(tk.END, line)
+        # Batasi jumlah baris agar memori dan widget tidak tumbuh tanpa batas
+        excess = int(self.log_text.index("end-1c").split(".")[0]) - MAX_LOG_LINES
+        if excess > 0:
+            self.log_text.delete("1.0", f"{excess + 1}.0")
+        self.log_text.see(tk.END)
+        self.log_text.config(state=tk.DISABLED)
     
     def stop_web_server(self):
         if not self.server_running:
@@ -203,11 +314,13 @@ class FaceDetectionApp(tk.Tk):    def __init__(self):
         self.start_button.config(state=tk.NORMAL)
         self.stop_button.config(state=tk.DISABLED)
         self.open_browser_button.config(state=tk.DISABLED)
+        self.progress_bar.stop()
+        self.progress_bar.pack_forget()
         
         self.set_status("Server web dihentikan")
     
     def open_browser(self):
-        webbrowser.open("http://127.0.0.1:5000", new=2)
+        webbrowser.open(SERVER_URL, new=2)
     
     def set_status(self, message):
         self.status_label.config(text=message)
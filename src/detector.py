@@ -0,0 +1,428 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Mesin Deteksi Wajah bersama (pra-pemrosesan -> multi-cascade -> penggabungan)
+Copyright (c) 2025, Ahmad Fadlilah (https://github.com/ahmadfadlilah)
+
+Semua titik masuk (aplikasi web, skrip webcam lokal, dan notebook) memakai
+`FaceDetector` agar setiap optimasi cukup dilakukan di satu tempat.
+"""
+
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+try:
+    from .buffers import BufferPool
+    from .cascades import CASCADE_FILES, CascadeRegistry, bundled_cascade_dir, download_cascades
+    from .nms import merge_faces
+except ImportError:
+    from buffers import BufferPool
+    from cascades import CASCADE_FILES, CascadeRegistry, bundled_cascade_dir, download_cascades
+    from nms import merge_faces
+
+# Setiap berapa frame mode live menggunakan deteksi yang lebih akurat
+ENHANCED_DETECTION_INTERVAL = 10
+
+# Profil parameter bernama.
+# - 'preprocess': urutan langkah pra-pemrosesan setelah ekualisasi histogram
+# - 'stages': daftar tahap; tahap berikutnya hanya dijalankan jika tahap
+#   sebelumnya tidak menemukan wajah sama sekali
+# - setiap pass memilih cascade, gambar sumber ('enhanced', 'normalized',
+#   atau 'gray'), opsi flip horizontal, dan parameter detectMultiScale
+PROFILES = {
+    'live-fast': {
+        'preprocess': [],
+        'stages': [
+            [
+                {'cascade': 'default', 'params': {'scaleFactor': 1.1, 'minNeighbors': 5, 'minSize': (50, 50)}},
+            ],
+        ],
+    },
+    'live-enhanced': {
+        'preprocess': ['clahe', 'bilateral'],
+        'stages': [
+            [
+                {'cascade': 'default', 'params': {'scaleFactor': 1.08, 'minNeighbors': 4, 'minSize': (30, 30)}},
+                {'cascade': 'alt', 'params': {'scaleFactor': 1.08, 'minNeighbors': 3, 'minSize': (30, 30)}},
+                {'cascade': 'alt2', 'params': {'scaleFactor': 1.1, 'minNeighbors': 4, 'minSize': (35, 35)}},
+            ],
+            [
+                {'cascade': 'profile', 'params': {'scaleFactor': 1.1, 'minNeighbors': 3, 'minSize': (35, 35)}},
+                {'cascade': 'profile', 'flip': True,
+                 'params': {'scaleFactor': 1.1, 'minNeighbors': 3, 'minSize': (35, 35)}},
+            ],
+        ],
+    },
+    'upload-accurate': {
+        'preprocess': ['bilateral', 'clahe'],
+        'stages': [
+            [
+                {'cascade': 'default', 'params': {'scaleFactor': 1.05, 'minNeighbors': 3, 'minSize': (30, 30),
+                                                  'flags': cv2.CASCADE_SCALE_IMAGE}},
+                {'cascade': 'alt', 'params': {'scaleFactor': 1.08, 'minNeighbors': 3, 'minSize': (30, 30),
+                                              'flags': cv2.CASCADE_SCALE_IMAGE}},
+                {'cascade': 'alt2', 'params': {'scaleFactor': 1.08, 'minNeighbors': 4, 'minSize': (35, 35),
+                                               'flags': cv2.CASCADE_SCALE_IMAGE}},
+                {'cascade': 'profile', 'params': {'scaleFactor': 1.1, 'minNeighbors': 3, 'minSize': (30, 30),
+                                                  'flags': cv2.CASCADE_SCALE_IMAGE}},
+                {'cascade': 'profile', 'flip': True,
+                 'params': {'scaleFactor': 1.1, 'minNeighbors': 3, 'minSize': (30, 30),
+                            'flags': cv2.CASCADE_SCALE_IMAGE}},
+            ],
+            [
+                {'cascade': 'default', 'image': 'normalized',
+                 'params': {'scaleFactor': 1.05, 'minNeighbors': 2, 'minSize': (25, 25),
+                            'flags': cv2.CASCADE_SCALE_IMAGE}},
+            ],
+            [
+                {'cascade': 'default', 'image': 'gray',
+                 'params': {'scaleFactor': 1.05, 'minNeighbors': 2, 'minSize': (20, 20),
+                            'flags': cv2.CASCADE_SCALE_IMAGE}},
+            ],
+        ],
+    },
+}
+
+
+def live_profile(frame_count):
+    """Pilih profil live: 'live-enhanced' setiap ENHANCED_DETECTION_INTERVAL frame, selain itu 'live-fast'"""
+    if frame_count % ENHANCED_DETECTION_INTERVAL == 0:
+        return 'live-enhanced'
+    return 'live-fast'
+
+
+def draw_faces(image, faces):
+    """Gambar kotak di sekitar wajah dan tampilkan jumlah wajah yang terdeteksi"""
+    for (x, y, w, h) in faces:
+        cv2.rectangle(image, (int(x), int(y)), (int(x + w), int(y + h)), (0, 255, 0), 2)
+
+    # Tampilkan informasi jumlah wajah terdeteksi
+    text_position = (10, 30)
+    font = cv2.FONT_HERSHEY_SIMPLEX
+    font_scale = 1
+    font_color = (255, 0, 0)  # Biru
+    thickness = 2
+    line_type = cv2.LINE_AA
+
+    cv2.putText(image, f'Wajah Terdeteksi: {len(faces)}',
+                text_position,
+                font,
+                font_scale,
+                font_color,
+                thickness,
+                line_type)
+    return image
+
+
+class FaceDetector:
+    """Pipeline deteksi wajah yang dapat dipakai ulang oleh semua titik masuk aplikasi"""
+
+    def __init__(self, cascade_dir=None, cascades=None, profiles=None, default_profile='upload-accurate',
+                 max_workers=1, max_detection_size=None, stage_observer=None):
+        self.cascade_dir = cascade_dir
+        self.cascades = dict(cascades) if cascades else {}
+        self.profiles = dict(profiles) if profiles else dict(PROFILES)
+        self.default_profile = default_profile
+        # Jumlah pass cascade yang boleh berjalan bersamaan dalam satu tahap (1 = berurutan)
+        self.max_workers = max(1, int(max_workers))
+        # Sisi terpanjang (piksel) gambar yang dideteksi; gambar lebih besar diperkecil
+        # dulu lalu koordinat wajah dikembalikan ke ukuran asli (None/0 = tanpa batas)
+        self.max_detection_size = max_detection_size
+        # Fungsi opsional observer(profil, tahap, detik) yang dipanggil setelah setiap
+        # langkah pipeline (pra-pemrosesan, setiap detectMultiScale, penggabungan)
+        self.stage_observer = stage_observer
+        self._executor = None
+        # Objek CLAHE tidak thread-safe, jadi satu instance dibuat per thread lalu dipakai ulang;
+        # begitu juga pool buffer tujuan pra-pemrosesan (lihat src/buffers.py)
+        self._local = threading.local()
+        # CascadeClassifier juga tidak thread-safe: setiap pass meminjam instance dari pool
+        # sehingga satu instance tidak pernah dipakai dua thread sekaligus
+        self._cascade_paths = {}
+        self._idle_cascades = {}
+        self._pool_lock = threading.Lock()
+        # Identitas file cascade yang dimuat (path, ukuran, waktu ubah) untuk fingerprint
+        self._cascade_stamps = {}
+        self.registry = None
+        self.warmup_ms = {}
+
+    def load(self, download=False):
+        """Muat dan validasi semua cascade dari cascade_dir atau folder bawaan OpenCV.
+
+        Tidak membutuhkan jaringan; file hanya diunduh ke cascade_dir jika
+        `download=True` dan cascade utama tidak ditemukan di mana pun.
+        Mengembalikan True jika cascade utama siap.
+        """
+        registry = CascadeRegistry([self.cascade_dir, bundled_cascade_dir()])
+        if download and registry.find(CASCADE_FILES['default']) is None:
+            download_cascades(self.cascade_dir or '.')
+            registry.search_dirs.append(self.cascade_dir or '.')
+
+        loaded = registry.load()
+        self.registry = registry
+        for name, classifier in registry.cascades.items():
+            info = registry.info[name]
+            self.cascades[name] = classifier
+            self._cascade_paths[name] = info['path']
+            self._idle_cascades[name] = [classifier]
+            self._cascade_stamps[name] = (info['path'], info['size'], info['mtime_ns'])
+
+        for name, error in registry.errors.items():
+            print(f"Peringatan: cascade '{name}' tidak dimuat: {error}")
+        if not loaded:
+            print("Error: Gagal memuat file cascade utama.")
+            return False
+
+        print("Semua classifier cascade berhasil dimuat.")
+        return True
+
+    def warm_up(self, profiles=None, size=(240, 320)):
+        """Jalankan deteksi pada gambar sintetis untuk setiap profil.
+
+        Inisialisasi malas OpenCV (alokasi piramida, thread pool, salinan
+        cascade untuk mode paralel) terjadi di sini, bukan pada permintaan
+        pertama. Mengembalikan durasi per profil dalam milidetik.
+        """
+        image = np.random.default_rng(0).integers(0, 256, size=tuple(size) + (3,), dtype=np.uint8)
+        self.warmup_ms = {}
+        for profile in profiles or list(self.profiles):
+            start = time.perf_counter()
+            self.detect(image, profile)
+            self.warmup_ms[profile] = round((time.perf_counter() - start) * 1000, 2)
+        return self.warmup_ms
+
+    def load_stats(self):
+        """Info pemuatan cascade (path, waktu muat per cascade) dan durasi warm-up"""
+        stats = self.registry.stats() if self.registry is not None else {"cascades": {}, "errors": {}}
+        stats["warmup_ms"] = dict(self.warmup_ms)
+        return stats
+
+    @property
+    def is_loaded(self):
+        return 'default' in self.cascades
+
+    def fingerprint(self, profile=None):
+        """Sidik jari konfigurasi deteksi: berubah jika parameter profil atau cascade yang dimuat berubah"""
+        spec = self.profiles[profile or self.default_profile]
+        cascades = sorted((name, self._cascade_stamps.get(name, id(cascade)))
+                          for name, cascade in self.cascades.items())
+        return hashlib.sha1(repr((spec, cascades, self.max_detection_size)).encode('utf-8')).hexdigest()
+
+    def _checkout_cascade(self, name):
+        """Pinjam instance cascade yang sedang tidak dipakai; buat salinan baru jika semua sedang dipakai"""
+        path = self._cascade_paths.get(name)
+        if path is None:
+            # Cascade yang diberikan langsung (tanpa path) tidak bisa digandakan
+            return self.cascades.get(name)
+        with self._pool_lock:
+            idle = self._idle_cascades[name]
+            if idle:
+                return idle.pop()
+        return cv2.CascadeClassifier(path)
+
+    def _checkin_cascade(self, name, cascade):
+        """Kembalikan instance cascade ke pool"""
+        if name in self._cascade_paths:
+            with self._pool_lock:
+                self._idle_cascades[name].append(cascade)
+
+    @property
+    def executor(self):
+        """Executor terbatas untuk mode ensemble paralel (dibuat saat pertama kali dibutuhkan)"""
+        if self._executor is None and self.max_workers > 1:
+            with self._pool_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                        thread_name_prefix='cascade')
+        return self._executor
+
+    def close(self):
+        """Hentikan executor ensemble paralel"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    @property
+    def clahe(self):
+        clahe = getattr(self._local, 'clahe', None)
+        if clahe is None:
+            clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+            self._local.clahe = clahe
+        return clahe
+
+    @property
+    def buffers(self):
+        """Pool buffer pra-pemrosesan milik thread pemanggil"""
+        buffers = getattr(self._local, 'buffers', None)
+        if buffers is None:
+            buffers = self._local.buffers = BufferPool()
+        return buffers
+
+    def _observe(self, profile, stage, start):
+        """Laporkan durasi satu langkah pipeline ke stage_observer (jika ada)"""
+        if self.stage_observer is not None:
+            self.stage_observer(profile or self.default_profile, stage, time.perf_counter() - start)
+
+    def prepare(self, image, profile=None):
+        """Pra-pemrosesan gambar sesuai profil. Mengembalikan dict gambar bernama untuk pass cascade.
+
+        Gambar hasil ditulis ke pool buffer thread pemanggil dan akan ditimpa
+        oleh pemanggilan berikutnya di thread yang sama.
+        """
+        spec = self.profiles[profile or self.default_profile]
+        buffers = self.buffers
+        shape = image.shape[:2]
+
+        start = time.perf_counter()
+        if image.ndim == 2:
+            gray = image
+        else:
+            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY, dst=buffers.get('gray', shape))
+            self._observe(profile, 'cvtColor', start)
+
+        # Ekualisasi histogram selalu dilakukan lebih dahulu
+        start = time.perf_counter()
+        enhanced = cv2.equalizeHist(gray, dst=buffers.get('equalized', shape))
+        self._observe(profile, 'equalizeHist', start)
+        for step in spec['preprocess']:
+            start = time.perf_counter()
+            if step == 'clahe':
+                # Peningkatan kontras adaptif dengan CLAHE
+                enhanced = self.clahe.apply(enhanced, buffers.get('clahe', shape))
+            elif step == 'bilateral':
+                # Filter bilateral untuk mengurangi noise dengan tetap mempertahankan tepi
+                enhanced = cv2.bilateralFilter(enhanced, 9, 75, 75, dst=buffers.get('bilateral', shape))
+            else:
+                raise ValueError(f"Langkah pra-pemrosesan tidak dikenal: {step}")
+            self._observe(profile, step, start)
+
+        return {'gray': gray, 'enhanced': enhanced}
+
+    def _source_image(self, images, name, profile=None):
+        """Ambil gambar sumber bernama; gambar turunan dihitung saat pertama kali dibutuhkan"""
+        if name not in images:
+            if name == 'normalized':
+                start = time.perf_counter()
+                enhanced = images['enhanced']
+                images[name] = cv2.normalize(enhanced, self.buffers.get(name, enhanced.shape), alpha=0, beta=255,
+                                             norm_type=cv2.NORM_MINMAX)
+                self._observe(profile, 'normalize', start)
+            elif name.endswith(':flipped'):
+                source = self._source_image(images, name.split(':')[0], profile)
+                start = time.perf_counter()
+                images[name] = cv2.flip(source, 1, dst=self.buffers.get(name, source.shape))
+                self._observe(profile, 'flip', start)
+            else:
+                raise ValueError(f"Gambar sumber tidak dikenal: {name}")
+        return images[name]
+
+    @staticmethod
+    def _source_name(detection_pass):
+        source = detection_pass.get('image', 'enhanced')
+        if detection_pass.get('flip'):
+            source += ':flipped'
+        return source
+
+    def run_stage(self, images, stage, profile=None):
+        """Jalankan semua pass dalam satu tahap, paralel jika max_workers > 1. Urutan hasil tetap."""
+        executor = self.executor
+        if executor is None or len(stage) < 2:
+            return [self.run_pass(images, detection_pass, profile) for detection_pass in stage]
+
+        # Siapkan gambar turunan lebih dulu agar thread pekerja hanya membaca
+        for detection_pass in stage:
+            if detection_pass['cascade'] in self.cascades:
+                self._source_image(images, self._source_name(detection_pass), profile)
+
+        futures = [executor.submit(self.run_pass, images, detection_pass, profile) for detection_pass in stage]
+        return [future.result() for future in futures]
+
+    def run_pass(self, images, detection_pass, profile=None):
+        """Jalankan satu pass detectMultiScale. Mengembalikan array wajah (bisa kosong)."""
+        name = detection_pass['cascade']
+        if name not in self.cascades:
+            return ()
+
+        source_name = self._source_name(detection_pass)
+        source = self._source_image(images, source_name, profile)
+        cascade = self._checkout_cascade(name)
+        start = time.perf_counter()
+        try:
+            faces = cascade.detectMultiScale(source, **detection_pass['params'])
+        finally:
+            self._checkin_cascade(name, cascade)
+        # Nama tahap memuat cascade dan gambar sumber, misalnya detectMultiScale:profile:enhanced:flipped
+        self._observe(profile, f'detectMultiScale:{name}:{source_name}', start)
+
+        # Konversi koordinat wajah pada gambar flipped kembali ke koordinat di gambar asli
+        if detection_pass.get('flip') and len(faces) > 0:
+            width = images['enhanced'].shape[1]
+            faces[:, 0] = width - faces[:, 0] - faces[:, 2]
+        return faces
+
+    def downscale(self, image):
+        """Perkecil gambar (ke grayscale) jika melebihi max_detection_size.
+
+        Mengembalikan tuple (gambar, skala_x, skala_y) dengan skala untuk
+        mengembalikan koordinat ke gambar asli, atau (gambar, None, None) jika
+        ukuran gambar sudah di bawah batas.
+        """
+        if not self.max_detection_size:
+            return image, None, None
+        height, width = image.shape[:2]
+        if max(height, width) <= self.max_detection_size:
+            return image, None, None
+
+        scale = self.max_detection_size / max(height, width)
+        size = (max(1, int(round(width * scale))), max(1, int(round(height * scale))))
+        # Konversi ke grayscale dulu agar resize hanya memproses satu kanal
+        buffers = self.buffers
+        if image.ndim == 2:
+            gray = image
+        else:
+            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY, dst=buffers.get('full-gray', (height, width)))
+        small = cv2.resize(gray, size, dst=buffers.get('resized', size[::-1]), interpolation=cv2.INTER_AREA)
+        return small, width / size[0], height / size[1]
+
+    def detect(self, image, profile=None):
+        """Deteksi wajah pada satu gambar (BGR atau grayscale). Mengembalikan array N x 4 [x, y, w, h]."""
+        start = time.perf_counter()
+        image, scale_x, scale_y = self.downscale(image)
+        if scale_x is not None:
+            self._observe(profile, 'resize', start)
+        faces = self._detect(image, profile)
+        if scale_x is None or len(faces) == 0:
+            return faces
+
+        # Kembalikan koordinat dari gambar yang diperkecil ke gambar asli
+        scaled = np.rint(faces * np.array([scale_x, scale_y, scale_x, scale_y]))
+        return scaled.astype(faces.dtype)
+
+    def _detect(self, image, profile=None):
+        spec = self.profiles[profile or self.default_profile]
+        images = self.prepare(image, profile)
+
+        all_faces_detected = []
+        for stage in spec['stages']:
+            # Tahap lanjutan hanya dijalankan jika belum ada wajah terdeteksi
+            if all_faces_detected:
+                break
+            for faces in self.run_stage(images, stage, profile):
+                if len(faces) > 0:
+                    all_faces_detected.append(faces)
+
+        # Gabungkan dan hapus wajah duplikat
+        if not all_faces_detected:
+            return np.empty((0, 4), dtype=np.int32)
+        start = time.perf_counter()
+        faces = merge_faces(all_faces_detected)
+        self._observe(profile, 'merge_faces', start)
+        return faces
+
+    def detect_many(self, images, profile=None):
+        """Deteksi wajah pada beberapa gambar sekaligus. Mengembalikan list array wajah."""
+        return [self.detect(image, profile) for image in images]
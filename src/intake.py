@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Penerimaan gambar unggahan yang hemat memori
+Copyright (c) 2025, Ahmad Fadlilah (https://github.com/ahmadfadlilah)
+
+Ukuran gambar dibaca dari header (PNG, JPEG, WebP, BMP, TIFF) sebelum decode
+sehingga gambar dengan jumlah piksel berlebihan ditolak tanpa dialokasikan.
+Gambar besar dideteksi pada decode grayscale beresolusi rendah
+(IMREAD_REDUCED_GRAYSCALE_*; untuk JPEG penskalaan terjadi di dalam decoder),
+dan gambar berwarna resolusi penuh hanya di-decode jika memang dibutuhkan
+untuk anotasi.
+"""
+
+import struct
+
+import cv2
+import numpy as np
+
+# Faktor reduksi decoder yang didukung OpenCV, dari yang terbesar
+REDUCED_GRAYSCALE = {
+    8: cv2.IMREAD_REDUCED_GRAYSCALE_8,
+    4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    1: cv2.IMREAD_GRAYSCALE,
+}
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+# Marker JPEG start-of-frame yang memuat ukuran gambar (C4, C8, dan CC bukan SOF)
+JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+class ImageTooLarge(ValueError):
+    """Jumlah piksel gambar melebihi batas unggahan"""
+
+    def __init__(self, pixels, max_pixels):
+        self.pixels = pixels
+        self.max_pixels = max_pixels
+        super().__init__(f"Gambar terlalu besar: {pixels / 1e6:.1f} MP (maksimal {max_pixels / 1e6:.1f} MP)")
+
+
+def image_size(data):
+    """(lebar, tinggi) dari header PNG, JPEG, WebP, BMP, atau TIFF tanpa decode. None jika format lain atau header rusak."""
+    if data[:8] == PNG_SIGNATURE and len(data) >= 24:
+        width, height = struct.unpack('>II', data[16:24])
+        return width, height
+    try:
+        if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+            return webp_size(data)
+        if data[:2] == b'BM':
+            return bmp_size(data)
+        if data[:4] in (b'II*\x00', b'MM\x00*'):
+            return tiff_size(data)
+    except struct.error:
+        # Header terpotong
+        return None
+    if data[:2] != b'\xff\xd8':
+        return None
+
+    offset = 2
+    while offset + 4 <= len(data):
+        if data[offset] != 0xFF:
+            return None
+        marker = data[offset + 1]
+        if marker == 0xFF:
+            # Byte pengisi di antara segmen
+            offset += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            # Marker tanpa panjang segmen
+            offset += 2
+            continue
+        if marker in JPEG_SOF_MARKERS:
+            if offset + 9 > len(data):
+                return None
+            height, width = struct.unpack('>HH', data[offset + 5:offset + 9])
+            return width, height
+        offset += 2 + struct.unpack('>H', data[offset + 2:offset + 4])[0]
+    return None
+
+
+def webp_size(data):
+    chunk = data[12:16]
+    if chunk == b'VP8X':
+        # Ukuran kanvas (24 bit, dikurangi satu)
+        width = int.from_bytes(data[24:27], 'little') + 1
+        height = int.from_bytes(data[27:30], 'little') + 1
+        return width, height
+    if chunk == b'VP8L' and data[20:21] == b'\x2f':
+        bits = struct.unpack('<I', data[21:25])[0]
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b'VP8 ' and data[23:26] == b'\x9d\x01\x2a':
+        width, height = struct.unpack('<HH', data[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    return None
+
+
+def bmp_size(data):
+    if struct.unpack('<I', data[14:18])[0] == 12:
+        # BITMAPCOREHEADER (OS/2): ukuran 16 bit
+        return struct.unpack('<HH', data[18:22])
+    width, height = struct.unpack('<ii', data[18:26])
+    # Tinggi negatif berarti baris disimpan dari atas ke bawah
+    return abs(width), abs(height)
+
+
+def tiff_size(data):
+    """Ukuran dari tag ImageWidth (256) dan ImageLength (257) di IFD pertama"""
+    order = '<' if data[:2] == b'II' else '>'
+    offset = struct.unpack(order + 'I', data[4:8])[0]
+    count = struct.unpack(order + 'H', data[offset:offset + 2])[0]
+    tags = {}
+    for entry in range(offset + 2, offset + 2 + 12 * count, 12):
+        tag, kind = struct.unpack(order + 'HH', data[entry:entry + 4])
+        if tag in (256, 257):
+            # Tipe 3 = SHORT (2 byte), selain itu LONG (4 byte)
+            fmt, length = ('H', 2) if kind == 3 else ('I', 4)
+            tags[tag] = struct.unpack(order + fmt, data[entry + 8:entry + 8 + length])[0]
+    if 256 not in tags or 257 not in tags:
+        return None
+    return tags[256], tags[257]
+
+
+def reduction_factor(size, min_side):
+    """Faktor reduksi decode terbesar yang tetap menyisakan sisi terpanjang >= min_side (1 = tanpa reduksi)"""
+    if size is None or not min_side:
+        return 1
+    longest = max(size)
+    for factor in REDUCED_GRAYSCALE:
+        if longest / factor >= min_side:
+            return factor
+    return 1
+
+
+def check_pixels(size, max_pixels):
+    """Tolak ukuran (lebar, tinggi) yang melebihi max_pixels dengan ImageTooLarge"""
+    if max_pixels and size is not None and size[0] * size[1] > max_pixels:
+        raise ImageTooLarge(size[0] * size[1], max_pixels)
+
+
+def decode_for_detection(data, min_side=None, max_pixels=None):
+    """Decode gambar unggahan sebagai grayscale untuk deteksi, diperkecil oleh decoder jika bisa.
+
+    `min_side` adalah sisi terpanjang minimum gambar hasil (biasanya
+    max_detection_size detektor, sehingga resolusi deteksi tidak berubah).
+    Mengembalikan tuple (gray, skala_x, skala_y) dengan skala untuk
+    mengembalikan koordinat ke gambar asli, atau (None, None, None) jika gambar
+    tidak dapat dibaca. Melempar ImageTooLarge jika melebihi max_pixels.
+    """
+    size = image_size(data)
+    check_pixels(size, max_pixels)
+
+    factor = reduction_factor(size, min_side)
+    buffer = np.frombuffer(data, np.uint8)
+    if factor == 1:
+        # Tanpa reduksi, grayscale dihitung seperti sebelumnya (decode berwarna lalu cvtColor): luma
+        # grayscale libjpeg sedikit berbeda sehingga hasil deteksi gambar kecil akan ikut berubah
+        color = cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+        gray = cv2.cvtColor(color, cv2.COLOR_BGR2GRAY) if color is not None else None
+        del color
+    else:
+        gray = cv2.imdecode(buffer, REDUCED_GRAYSCALE[factor])
+    if gray is None:
+        return None, None, None
+    if size is None:
+        # Format tanpa ukuran di header: periksa setelah decode
+        check_pixels(gray.shape[1::-1], max_pixels)
+        return gray, 1.0, 1.0
+
+    width, height = size
+    if (gray.shape[1] < gray.shape[0]) != (width < height):
+        # Orientasi EXIF diterapkan oleh decoder: lebar dan tinggi tertukar
+        width, height = height, width
+    return gray, width / gray.shape[1], height / gray.shape[0]
+
+
+def decode_color(data):
+    """Decode gambar berwarna resolusi penuh untuk anotasi (None jika gagal)"""
+    return cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+
+
+def decode_frame(data, width=None, height=None, min_side=None, max_pixels=None):
+    """Frame dari klien: piksel mentah (jika `width` dan `height` diberikan) atau gambar ter-encode.
+
+    Frame mentah berisi baris piksel uint8 tanpa header, grayscale (1 kanal)
+    atau BGR (3 kanal) menurut panjang data, dan dipakai langsung tanpa
+    disalin. Gambar ter-encode (JPEG/PNG) di-decode seperti unggahan. Mengembalikan
+    tuple (gambar, skala_x, skala_y). Melempar ValueError jika frame tidak valid
+    atau ImageTooLarge jika melebihi max_pixels.
+    """
+    if width is None and height is None:
+        frame, scale_x, scale_y = decode_for_detection(data, min_side, max_pixels)
+        if frame is None:
+            raise ValueError("Gagal membaca frame")
+        return frame, scale_x, scale_y
+
+    if not width or not height or width < 0 or height < 0:
+        raise ValueError("Frame mentah membutuhkan width dan height yang positif")
+    check_pixels((width, height), max_pixels)
+    channels, remainder = divmod(len(data), width * height)
+    if remainder or channels not in (1, 3):
+        raise ValueError(f"Panjang frame mentah ({len(data)} byte) tidak cocok dengan {width}x{height} "
+                         "grayscale atau BGR")
+    frame = np.frombuffer(data, np.uint8).reshape((height, width) if channels == 1 else (height, width, 3))
+    return frame, 1.0, 1.0
+
+
+def scale_faces(faces, scale_x, scale_y):
+    """Kembalikan kotak wajah dari gambar yang diperkecil ke koordinat gambar asli"""
+    if len(faces) == 0 or (scale_x == 1.0 and scale_y == 1.0):
+        return faces
+    scaled = np.rint(faces * np.array([scale_x, scale_y, scale_x, scale_y]))
+    return scaled.astype(faces.dtype)
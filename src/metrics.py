@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Metrik ringan dalam format teks Prometheus (tanpa dependensi tambahan)
+Copyright (c) 2025, Ahmad Fadlilah (https://github.com/ahmadfadlilah)
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Batas bucket bawaan untuk latensi (detik)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value)) if abs(value) < 1e15 else repr(value)
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+class _Metric:
+    """Dasar metrik berlabel; nilai disimpan per tuple nilai label"""
+
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"Label untuk {self.name} harus {self.labelnames}, bukan {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def header(self):
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type}']
+
+
+class Counter(_Metric):
+    """Penghitung yang hanya bertambah"""
+
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}'
+                                for key, value in items]
+
+
+class Gauge(Counter):
+    """Nilai yang bisa naik turun"""
+
+    type = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    """Histogram kumulatif dengan bucket tetap, ditambah _sum dan _count"""
+
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Hitungan per bucket (non-kumulatif) + bucket +Inf, jumlah nilai
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def count(self, **labels):
+        state = self._values.get(self._key(labels))
+        return sum(state[0]) if state else 0
+
+    def render(self):
+        with self._lock:
+            items = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        lines = self.header()
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, [('le', _format_value(float(bound)))])
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+            lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+class CallbackMetric(_Metric):
+    """Metrik yang nilainya dibaca dari fungsi saat /metrics diminta (tanpa biaya di jalur panas).
+
+    Dengan `labelnames`, callback mengembalikan dict {nilai label (atau tuple): nilai};
+    entri bernilai None dilewati.
+    """
+
+    def __init__(self, name, documentation, callback, metric_type='gauge', labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+        self.type = metric_type
+
+    def render(self):
+        value = self.callback()
+        if value is None:
+            return self.header()
+        if not self.labelnames:
+            return self.header() + [f'{self.name} {_format_value(value)}']
+
+        lines = self.header()
+        for key, item in sorted(value.items()):
+            if item is None:
+                continue
+            key = key if isinstance(key, tuple) else (key,)
+            lines.append(f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(item)}')
+        return lines
+
+
+class MetricsRegistry:
+    """Kumpulan metrik yang dirender bersama dalam format teks Prometheus"""
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._metrics = {}
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metrik {metric.name} sudah terdaftar")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback(self, name, documentation, callback, metric_type='gauge', labelnames=()):
+        return self._register(CallbackMetric(name, documentation, callback, metric_type, labelnames))
+
+    @contextmanager
+    def time(self, histogram, **labels):
+        """Ukur durasi blok kode ke dalam histogram (tidak melakukan apa-apa jika dinonaktifkan)"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            histogram.observe(time.perf_counter() - start, **labels)
+
+    def render(self):
+        """Semua metrik dalam format teks Prometheus 0.0.4"""
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
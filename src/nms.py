@@ -0,0 +1,229 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Non-Maximum Suppression (NMS) bersama untuk hasil deteksi wajah
+Copyright (c) 2025, Ahmad Fadlilah (https://github.com/ahmadfadlilah)
+
+Modul ini menggantikan loop Python bersarang pada `merge_faces` dengan
+perhitungan IoU berbasis broadcasting NumPy. Hasilnya identik dengan
+implementasi lama: kotak diurutkan berdasarkan area (besar ke kecil) dan
+sebuah kotak dibuang jika IoU-nya dengan kotak yang sudah disimpan > 0.3.
+"""
+
+import numpy as np
+
+# Ambang batas overlap bawaan (sama dengan implementasi sebelumnya)
+OVERLAP_THRESHOLD = 0.3
+
+# Di bawah jumlah kotak ini, matriks IoU penuh lebih murah daripada sorted sweep
+DENSE_LIMIT = 64
+
+# Jumlah baris yang diproses per blok saat menghitung pasangan yang overlap.
+# Membatasi memori matriks sementara menjadi BLOCK_SIZE x lebar jendela sweep.
+BLOCK_SIZE = 128
+
+
+def _intersection(boxes_a, boxes_b):
+    """Hitung luas irisan antar kotak [x, y, w, h] dengan broadcasting.
+
+    Bentuk keluaran mengikuti broadcasting kedua masukan, sehingga fungsi ini
+    dipakai baik untuk matriks (a[:, None] vs b[None, :]) maupun per pasangan.
+    """
+    ax1, ay1 = boxes_a[..., 0], boxes_a[..., 1]
+    bx1, by1 = boxes_b[..., 0], boxes_b[..., 1]
+    x_overlap = np.maximum(0, np.minimum(ax1 + boxes_a[..., 2], bx1 + boxes_b[..., 2]) - np.maximum(ax1, bx1))
+    y_overlap = np.maximum(0, np.minimum(ay1 + boxes_a[..., 3], by1 + boxes_b[..., 3]) - np.maximum(ay1, by1))
+    return x_overlap * y_overlap
+
+
+def _iou(boxes_a, boxes_b, overlap_area):
+    """Hitung IoU dari luas irisan dengan rumus yang sama persis seperti implementasi lama"""
+    area_a = boxes_a[..., 2] * boxes_a[..., 3]
+    area_b = boxes_b[..., 2] * boxes_b[..., 3]
+    union = (area_a + area_b - overlap_area).astype(np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return overlap_area / union
+
+
+def _overlap_pairs(boxes, overlap_threshold):
+    """Cari semua pasangan (i, j) dengan IoU > ambang batas.
+
+    Menggunakan sorted sweep pada sumbu x: kotak diurutkan berdasarkan x1,
+    sehingga pasangan untuk satu blok baris hanya perlu dicari di antara
+    kotak yang x1-nya lebih kecil dari x2 terbesar di blok tersebut. IoU
+    (dengan pembagian float) hanya dihitung untuk pasangan yang beririsan.
+    """
+    n = len(boxes)
+    order = np.argsort(boxes[:, 0], kind='stable')
+    sorted_boxes = boxes[order]
+    sx1 = np.ascontiguousarray(sorted_boxes[:, 0])
+    sy1 = np.ascontiguousarray(sorted_boxes[:, 1])
+    sx2 = sx1 + sorted_boxes[:, 2]
+    sy2 = sy1 + sorted_boxes[:, 3]
+
+    rows_list = []
+    cols_list = []
+    for start in range(0, n, BLOCK_SIZE):
+        stop = min(start + BLOCK_SIZE, n)
+        # Kotak di luar jendela ini tidak mungkin overlap pada sumbu x
+        end = int(np.searchsorted(sx1, sx2[start:stop].max(), side='left'))
+        if end <= start + 1:
+            continue
+
+        # Uji irisan tanpa perkalian: cukup perbandingan min/max per sumbu
+        rows_x1, rows_y1 = sx1[start:stop, None], sy1[start:stop, None]
+        rows_x2, rows_y2 = sx2[start:stop, None], sy2[start:stop, None]
+        candidates = np.minimum(rows_x2, sx2[None, start:end]) > np.maximum(rows_x1, sx1[None, start:end])
+        candidates &= np.minimum(rows_y2, sy2[None, start:end]) > np.maximum(rows_y1, sy1[None, start:end])
+
+        # Hanya pasangan j > i (dalam urutan sweep) agar tiap pasangan muncul sekali
+        candidates &= (np.arange(start, end)[None, :] > np.arange(start, stop)[:, None])
+
+        rows, cols = np.nonzero(candidates)
+        if len(rows) == 0:
+            continue
+        rows += start
+        cols += start
+
+        box_a = sorted_boxes[rows]
+        box_b = sorted_boxes[cols]
+        over = _iou(box_a, box_b, _intersection(box_a, box_b)) > overlap_threshold
+        rows_list.append(order[rows[over]])
+        cols_list.append(order[cols[over]])
+
+    if not rows_list:
+        empty = np.empty(0, dtype=np.intp)
+        return empty, empty
+    return np.concatenate(rows_list), np.concatenate(cols_list)
+
+
+def non_max_suppression(boxes, overlap_threshold=OVERLAP_THRESHOLD):
+    """Kembalikan indeks kotak [x, y, w, h] yang dipertahankan, diurutkan berdasarkan area.
+
+    Hasilnya sama dengan algoritma greedy lama: kotak diproses dari area
+    terbesar, dan dipertahankan hanya jika IoU-nya terhadap semua kotak yang
+    sudah dipertahankan tidak melebihi `overlap_threshold`.
+    """
+    boxes = np.asarray(boxes)
+    n = len(boxes)
+    if n == 0:
+        return np.empty(0, dtype=np.intp)
+
+    # Urutan pemrosesan sama dengan implementasi lama (argsort yang sama,
+    # pada dtype yang sama, sehingga urutan kotak dengan area sama tidak berubah)
+    areas = boxes[:, 2] * boxes[:, 3]
+    indices = np.argsort(-areas)
+    if n == 1:
+        return indices
+
+    # Hindari overflow int32 pada perkalian area di dalam perhitungan IoU
+    boxes = boxes.astype(np.int64, copy=False)
+
+    if n <= DENSE_LIMIT:
+        # Jumlah kotak sedikit (kasus umum): matriks IoU penuh dalam urutan pemrosesan
+        ordered = boxes[indices]
+        block = ordered[:, None, :]
+        window = ordered[None, :, :]
+        overlaps = _iou(block, window, _intersection(block, window)) > overlap_threshold
+        suppressed = np.zeros(n, dtype=bool)
+        keep = []
+        for r in range(n):
+            if suppressed[r]:
+                continue
+            keep.append(r)
+            suppressed |= overlaps[r]
+        return indices[keep]
+
+    rows, cols = _overlap_pairs(boxes, overlap_threshold)
+    if len(rows) == 0:
+        return indices
+
+    # Arahkan tiap pasangan sesuai urutan pemrosesan: kotak dengan peringkat
+    # lebih awal adalah yang berpotensi menekan kotak lainnya
+    rank = np.empty(n, dtype=np.intp)
+    rank[indices] = np.arange(n)
+    rank_a, rank_b = rank[rows], rank[cols]
+    first = np.minimum(rank_a, rank_b)
+    second = np.maximum(rank_a, rank_b)
+
+    # Susun daftar tetangga (format CSR) berdasarkan peringkat
+    sort_idx = np.argsort(first, kind='stable')
+    first = first[sort_idx]
+    second = second[sort_idx]
+    indptr = np.searchsorted(first, np.arange(n + 1), side='left').tolist()
+    neighbours = second.tolist()
+
+    # Sweep greedy: hanya kotak yang punya tetangga overlap yang perlu diperiksa
+    suppressed = bytearray(n)
+    keep = []
+    for r in range(n):
+        if suppressed[r]:
+            continue
+        keep.append(r)
+        for s in neighbours[indptr[r]:indptr[r + 1]]:
+            suppressed[s] = 1
+
+    return indices[keep]
+
+
+def merge_faces(faces_list, overlap_threshold=OVERLAP_THRESHOLD):
+    """Menggabungkan hasil deteksi wajah dan menghilangkan duplikat"""
+    if not faces_list:
+        return np.array([])
+
+    # Gabungkan semua hasil deteksi
+    all_faces = np.vstack(faces_list) if len(faces_list) > 1 else faces_list[0]
+
+    # Jika tidak ada wajah yang terdeteksi, kembalikan array kosong
+    if len(all_faces) == 0:
+        return np.array([])
+
+    # Kembalikan wajah yang disimpan
+    return all_faces[non_max_suppression(all_faces, overlap_threshold)]
+
+
+def merge_faces_reference(faces_list, overlap_threshold=OVERLAP_THRESHOLD):
+    """Implementasi loop Python lama, dipertahankan sebagai acuan untuk tes dan benchmark"""
+    if not faces_list:
+        return np.array([])
+
+    all_faces = np.vstack(faces_list) if len(faces_list) > 1 else faces_list[0]
+
+    if len(all_faces) == 0:
+        return np.array([])
+
+    areas = all_faces[:, 2] * all_faces[:, 3]
+    indices = np.argsort(-areas)
+
+    keep = []
+
+    for idx in indices:
+        keep_face = True
+
+        x1 = all_faces[idx, 0]
+        y1 = all_faces[idx, 1]
+        x2 = x1 + all_faces[idx, 2]
+        y2 = y1 + all_faces[idx, 3]
+        area1 = (x2 - x1) * (y2 - y1)
+
+        for kept_idx in keep:
+            kx1 = all_faces[kept_idx, 0]
+            ky1 = all_faces[kept_idx, 1]
+            kx2 = kx1 + all_faces[kept_idx, 2]
+            ky2 = ky1 + all_faces[kept_idx, 3]
+            area2 = (kx2 - kx1) * (ky2 - ky1)
+
+            x_overlap = max(0, min(x2, kx2) - max(x1, kx1))
+            y_overlap = max(0, min(y2, ky2) - max(y1, ky1))
+            overlap_area = x_overlap * y_overlap
+
+            iou = overlap_area / float(area1 + area2 - overlap_area)
+
+            if iou > overlap_threshold:
+                keep_face = False
+                break
+
+        if keep_face:
+            keep.append(idx)
+
+    return all_faces[keep]
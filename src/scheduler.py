@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Penjadwal deteksi yang ditingkatkan berdasarkan anggaran waktu per frame
+Copyright (c) 2025, Ahmad Fadlilah (https://github.com/ahmadfadlilah)
+"""
+
+import math
+import threading
+import time
+
+try:
+    from .detector import ENHANCED_DETECTION_INTERVAL
+    from .intake import scale_faces
+    from .nms import merge_faces
+except ImportError:
+    from detector import ENHANCED_DETECTION_INTERVAL
+    from intake import scale_faces
+    from nms import merge_faces
+
+# Target FPS bawaan untuk loop live
+TARGET_FPS = 15
+# Batas interval (dalam frame) antara awal dua siklus deteksi yang ditingkatkan
+MIN_INTERVAL = 1
+MAX_INTERVAL = 60
+# Bobot pengukuran terbaru pada rata-rata bergerak eksponensial
+SMOOTHING = 0.2
+
+
+class EnhancedScheduler:
+    """Tentukan kapan dan seberapa banyak pass profil yang ditingkatkan dijalankan agar tetap dalam target FPS.
+
+    Scheduler mengukur waktu frame biasa (deteksi cepat atau pelacakan),
+    waktu pra-pemrosesan, dan waktu setiap pass cascade yang ditingkatkan.
+    Dari situ interval siklus dipilih sehingga rata-rata waktu frame tidak
+    melebihi 1 / target_fps. Dengan `spread=True`, pass dalam satu siklus
+    dibagi ke beberapa frame berurutan sebanyak yang muat dalam sisa anggaran
+    setiap frame. Aturan tahap tetap berlaku: tahap berikutnya (misalnya
+    cascade profil) hanya dijalankan jika tahap sebelumnya tidak menemukan wajah.
+    """
+
+    def __init__(self, detector, profile='live-enhanced', target_fps=TARGET_FPS, spread=True,
+                 min_interval=MIN_INTERVAL, max_interval=MAX_INTERVAL, smoothing=SMOOTHING,
+                 clock=time.perf_counter):
+        self.detector = detector
+        self.profile = profile
+        self.target_fps = target_fps
+        self.spread = spread
+        self.min_interval = max(1, int(min_interval))
+        self.max_interval = max(self.min_interval, int(max_interval))
+        self.smoothing = smoothing
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Lupakan pengukuran dan siklus yang sedang berjalan"""
+        with self._lock:
+            self.base_cost = None
+            self.prepare_cost = None
+            self.pass_costs = {}
+            self.cycle_cost = None
+            self.interval = ENHANCED_DETECTION_INTERVAL
+            self.frames_since_cycle = 0
+            self.cycles = 0
+            self.passes_run = 0
+            self._cycle = None
+
+    @property
+    def budget(self):
+        """Anggaran waktu per frame (detik)"""
+        return 1.0 / self.target_fps
+
+    def _average(self, current, value):
+        if current is None:
+            return value
+        return current + self.smoothing * (value - current)
+
+    def observe_frame(self, seconds):
+        """Catat waktu pemrosesan biasa satu frame (tanpa pass yang ditingkatkan)"""
+        with self._lock:
+            self.base_cost = self._average(self.base_cost, seconds)
+            self.interval = self._choose_interval()
+
+    def _pass_key(self, stage_index, pass_index):
+        return f"{stage_index}.{pass_index}"
+
+    def _estimated_cycle_cost(self):
+        """Perkiraan biaya satu siklus: pengukuran siklus nyata, atau jumlah pass tahap pertama"""
+        if self.cycle_cost is not None:
+            return self.cycle_cost
+        stages = self.detector.profiles[self.profile]['stages']
+        costs = [self.pass_costs.get(self._pass_key(0, i)) for i in range(len(stages[0]))]
+        if self.prepare_cost is None or any(cost is None for cost in costs):
+            return None
+        return self.prepare_cost + sum(costs)
+
+    def _choose_interval(self):
+        """Interval terkecil yang menjaga rata-rata waktu frame dalam anggaran"""
+        cycle_cost = self._estimated_cycle_cost()
+        if self.base_cost is None or cycle_cost is None:
+            return ENHANCED_DETECTION_INTERVAL
+        slack = self.budget - self.base_cost
+        if slack <= 0:
+            # Frame biasa saja sudah melebihi anggaran: jalankan siklus sejarang mungkin
+            return self.max_interval
+        return min(self.max_interval, max(self.min_interval, math.ceil(cycle_cost / slack)))
+
+    def _slice_budget(self):
+        """Sisa anggaran frame ini untuk pass yang ditingkatkan (None = tidak dibatasi)"""
+        if not self.spread or self.base_cost is None:
+            return None
+        return max(0.0, self.budget - self.base_cost)
+
+    def run(self, frame, faces):
+        """Jalankan bagian siklus yang dijadwalkan untuk frame ini.
+
+        Mengembalikan array wajah: `faces` yang digabung dengan wajah yang
+        ditemukan oleh pass yang ditingkatkan pada frame ini.
+        """
+        with self._lock:
+            self.frames_since_cycle += 1
+            if self._cycle is None:
+                if self.frames_since_cycle < self.interval:
+                    return faces
+                self._cycle = {'stage': 0, 'pass': 0, 'found': False, 'cost': 0.0}
+            cycle = self._cycle
+            budget = self._slice_budget()
+
+        spec = self.detector.profiles[self.profile]
+        stages = spec['stages']
+
+        start = self.clock()
+        # Seperti FaceDetector.detect: frame di atas max_detection_size diperkecil dulu, dan
+        # biaya perkecilan ikut dihitung sebagai biaya pra-pemrosesan
+        image, scale_x, scale_y = self.detector.downscale(frame)
+        images = self.detector.prepare(image, self.profile)
+        prepare_cost = self.clock() - start
+        spent = prepare_cost
+        found = [faces] if len(faces) > 0 else []
+        new_costs = {}
+
+        # Jalankan pass berurutan sampai anggaran frame ini habis (minimal satu pass)
+        while cycle['stage'] < len(stages):
+            stage = stages[cycle['stage']]
+            key = self._pass_key(cycle['stage'], cycle['pass'])
+            estimate = self.pass_costs.get(key)
+            if new_costs and budget is not None and (estimate is None or spent + estimate > budget):
+                break
+
+            start = self.clock()
+            detected = self.detector.run_pass(images, stage[cycle['pass']], self.profile)
+            cost = self.clock() - start
+            new_costs[key] = cost
+            spent += cost
+            if len(detected) > 0:
+                if scale_x is not None:
+                    # Kembalikan koordinat ke frame asli, sama dengan wajah dari deteksi biasa
+                    detected = scale_faces(detected, scale_x, scale_y)
+                found.append(detected)
+                cycle['found'] = True
+
+            cycle['pass'] += 1
+            if cycle['pass'] == len(stage):
+                # Tahap selesai: berhenti jika ada wajah, jika tidak lanjut ke tahap berikutnya
+                if cycle['found']:
+                    cycle['stage'] = len(stages)
+                else:
+                    cycle['stage'] += 1
+                    cycle['pass'] = 0
+
+        with self._lock:
+            self.prepare_cost = self._average(self.prepare_cost, prepare_cost)
+            for key, cost in new_costs.items():
+                self.pass_costs[key] = self._average(self.pass_costs.get(key), cost)
+            self.passes_run += len(new_costs)
+            cycle['cost'] += spent
+            if cycle['stage'] >= len(stages):
+                # Siklus selesai
+                self.cycle_cost = self._average(self.cycle_cost, cycle['cost'])
+                self._cycle = None
+                self.frames_since_cycle = 0
+                self.cycles += 1
+            self.interval = self._choose_interval()
+
+        if len(found) > 1:
+            return merge_faces(found)
+        return found[0] if found else faces
+
+    def stats(self):
+        """Jadwal yang dipilih dan anggaran yang terukur, untuk endpoint pemantauan"""
+        def ms(seconds):
+            return None if seconds is None else round(seconds * 1000, 2)
+
+        with self._lock:
+            return {
+                "profile": self.profile,
+                "target_fps": self.target_fps,
+                "budget_ms": ms(self.budget),
+                "spread": self.spread,
+                "interval": self.interval,
+                "base_ms": ms(self.base_cost),
+                "prepare_ms": ms(self.prepare_cost),
+                "pass_ms": {key: ms(cost) for key, cost in sorted(self.pass_costs.items())},
+                "cycle_ms": ms(self.cycle_cost),
+                "cycles": self.cycles,
+                "passes_run": self.passes_run,
+                "cycle_in_progress": self._cycle is not None,
+            }
@@ -0,0 +1,302 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Server produksi prefork: cascade dimuat sekali, lalu beberapa proses worker di-fork
+Copyright (c) 2025, Ahmad Fadlilah (https://github.com/ahmadfadlilah)
+
+`python src/app.py` menjalankan server pengembangan Werkzeug dalam satu proses
+Python, sehingga deteksi unggahan tidak pernah memakai lebih dari satu core
+(GIL). Di mode ini proses master membuka socket, memuat dan meng-warm-up
+cascade sekali, lalu mem-fork N worker. Setiap worker melayani aplikasi Flask
+yang sama pada socket bersama dengan server WSGI berthread, dan memori
+cascade/detektor dibagi copy-on-write dengan master.
+
+Sinyal ke proses master:
+    SIGTERM, SIGINT  berhenti dengan halus: worker menyelesaikan permintaan yang sedang berjalan
+    SIGHUP           restart halus: cascade dimuat ulang, worker baru di-fork, worker lama berhenti dengan halus
+
+Worker yang mati diganti otomatis. Sesi kamera live ada per proses, jadi dengan
+lebih dari satu worker /start_detection ditolak (503); jalankan kamera dengan
+`python src/app.py` atau `python src/asgi.py`.
+
+Menjalankan:
+    python src/serve.py                      # satu worker per core
+    python src/serve.py --workers 4 --port 8000
+"""
+
+import argparse
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+import traceback
+
+import cv2
+from werkzeug.serving import make_server
+from werkzeug.wsgi import ClosingIterator
+
+# OpenCV tidak boleh memulai thread pool-nya sebelum fork (thread tidak ikut ke proses anak):
+# master memuat dan meng-warm-up cascade tanpa thread, worker mengatur threadnya sendiri
+cv2.setNumThreads(1)
+
+try:
+    from . import app as webapp
+except ImportError:
+    import app as webapp
+
+# Jumlah proses worker; 0 = jumlah core
+SERVE_WORKERS = int(os.environ.get('FACE_WORKERS', '0'))
+# Thread OpenCV per worker; 0 = core dibagi rata ke semua worker (minimal 1)
+WORKER_CV_THREADS = int(os.environ.get('FACE_WORKER_CV_THREADS', '0'))
+# Batas waktu (detik) worker menyelesaikan permintaan yang berjalan saat berhenti atau restart
+GRACEFUL_TIMEOUT = float(os.environ.get('FACE_GRACEFUL_TIMEOUT', '30'))
+
+
+class RequestTracker:
+    """Middleware WSGI yang menghitung permintaan yang sedang diproses, untuk berhenti dengan halus"""
+
+    def __init__(self, app):
+        self.app = app
+        self.active = 0
+        self._condition = threading.Condition()
+
+    def __call__(self, environ, start_response):
+        with self._condition:
+            self.active += 1
+        try:
+            result = self.app(environ, start_response)
+        except BaseException:
+            self._finished()
+            raise
+        # Respons streaming dihitung sampai body selesai dikirim
+        return ClosingIterator(result, self._finished)
+
+    def _finished(self):
+        with self._condition:
+            self.active -= 1
+            self._condition.notify_all()
+
+    def wait_idle(self, timeout=None):
+        """Tunggu sampai tidak ada permintaan yang berjalan. Mengembalikan False jika batas waktu habis."""
+        with self._condition:
+            return self._condition.wait_for(lambda: self.active == 0, timeout)
+
+
+def default_cv_threads(workers):
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+
+def worker_admission(workers):
+    """(slot, antrean) /upload per worker: FACE_UPLOAD_CONCURRENCY dan FACE_UPLOAD_QUEUE dibagi rata ke semua worker.
+
+    Tanpa pembagian ini setiap worker menerima sebanyak jumlah core sekaligus,
+    sehingga server menjalankan core² deteksi bersamaan sebelum ada 503.
+    """
+    workers = max(1, workers)
+    limit = webapp.app.config['UPLOAD_CONCURRENCY']
+    queue_size = webapp.app.config['UPLOAD_QUEUE']
+    if limit <= 0:
+        return 0, queue_size
+    return max(1, limit // workers), -(-queue_size // workers)
+
+
+def load_shared_detector(reload=False):
+    """Muat dan warm-up cascade di master, sebelum fork. Mengembalikan False jika gagal.
+
+    Cascade yang sudah dimuat saat import (FACE_EAGER_LOAD) dipakai ulang kecuali `reload`.
+    """
+    if (reload or webapp.detector is None) and not webapp.load_detector():
+        return False
+    # Executor ensemble paralel tidak boleh ikut di-fork (thread-nya tidak ada di worker);
+    # setiap worker membuatnya lagi saat pertama kali dibutuhkan
+    webapp.detector.close()
+    return True
+
+
+def run_worker(sock, cv_threads, graceful_timeout=GRACEFUL_TIMEOUT, admission=None):
+    """Layani aplikasi Flask pada socket bersama sampai SIGTERM, lalu selesaikan permintaan yang berjalan.
+
+    `admission` adalah (slot, antrean) /upload untuk worker ini (lihat worker_admission).
+    """
+    cv2.setNumThreads(cv_threads)
+    if admission is not None:
+        webapp.upload_admission.resize(*admission)
+    tracker = RequestTracker(webapp.app)
+    host, port = sock.getsockname()[:2]
+    server = make_server(host, port, tracker, threaded=True, fd=sock.fileno())
+
+    def stop(signum, frame):
+        # shutdown() menunggu serve_forever selesai, jadi tidak boleh dipanggil dari thread yang sama
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    # Ctrl+C di terminal dikirim ke semua proses; master yang memutuskan kapan worker berhenti
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if hasattr(signal, 'SIGHUP'):
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+
+    server.serve_forever()
+    # Berhenti menerima koneksi agar worker lain yang melayaninya, lalu selesaikan permintaan yang berjalan
+    server.server_close()
+    webapp.sessions.stop_all()
+    if not tracker.wait_idle(graceful_timeout):
+        print(f"Worker {os.getpid()}: {tracker.active} permintaan dihentikan setelah {graceful_timeout} detik",
+              file=sys.stderr)
+
+
+class PreforkServer:
+    """Proses master: fork worker, ganti worker yang mati, restart dan berhenti dengan halus"""
+
+    def __init__(self, sock, workers, cv_threads=None, graceful_timeout=GRACEFUL_TIMEOUT, reload=None):
+        self.sock = sock
+        self.num_workers = max(1, workers)
+        self.cv_threads = cv_threads or default_cv_threads(self.num_workers)
+        self.graceful_timeout = graceful_timeout
+        self.admission = worker_admission(self.num_workers)
+        self.reload = reload
+        # pid worker -> generasi (naik setiap restart halus)
+        self.workers = {}
+        self.generation = 0
+        self.restarts = 0
+        self._pending = []
+        self._stopping = False
+
+    def spawn(self):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                run_worker(self.sock, self.cv_threads, self.graceful_timeout, self.admission)
+            except BaseException:
+                traceback.print_exc()
+                code = 1
+            finally:
+                # Jangan kembali ke loop master di proses anak
+                os._exit(code)
+        self.workers[pid] = self.generation
+        return pid
+
+    def current_workers(self):
+        return [pid for pid, generation in self.workers.items() if generation == self.generation]
+
+    def _signal(self, signum, frame):
+        self._pending.append(signum)
+
+    def run(self):
+        """Loop master sampai SIGTERM/SIGINT"""
+        signal.signal(signal.SIGTERM, self._signal)
+        signal.signal(signal.SIGINT, self._signal)
+        signal.signal(signal.SIGHUP, self._signal)
+        host, port = self.sock.getsockname()[:2]
+        print(f"Server prefork berjalan di http://{host}:{port} "
+              f"({self.num_workers} worker, {self.cv_threads} thread OpenCV dan "
+              f"{self.admission[0] or 'tanpa batas'} slot /upload per worker)", flush=True)
+        try:
+            while not self._stopping:
+                while self._pending:
+                    signum = self._pending.pop(0)
+                    if signum == signal.SIGHUP:
+                        self.restart()
+                    else:
+                        self._stopping = True
+                self.reap()
+                if not self._stopping:
+                    for _ in range(self.num_workers - len(self.current_workers())):
+                        self.spawn()
+                time.sleep(0.1)
+        finally:
+            self.stop()
+
+    def reap(self):
+        """Catat worker yang sudah keluar"""
+        while self.workers:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self.workers.clear()
+                return
+            if pid == 0:
+                return
+            generation = self.workers.pop(pid, None)
+            code = os.waitstatus_to_exitcode(status)
+            if generation == self.generation and not self._stopping and code != 0:
+                print(f"Worker {pid} berhenti (kode {code}), diganti", file=sys.stderr)
+
+    def restart(self):
+        """Restart halus: muat ulang cascade di master, fork worker baru, lalu hentikan worker lama"""
+        if self.reload is not None and not self.reload():
+            print("Gagal memuat ulang cascade; worker lama tetap berjalan", file=sys.stderr)
+            return
+        old = list(self.workers)
+        self.generation += 1
+        self.restarts += 1
+        for _ in range(self.num_workers):
+            self.spawn()
+        for pid in old:
+            self.kill(pid, signal.SIGTERM)
+
+    def kill(self, pid, signum):
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            self.workers.pop(pid, None)
+
+    def stop(self):
+        """Hentikan semua worker dengan halus; paksa berhenti jika melewati batas waktu"""
+        self._stopping = True
+        for pid in list(self.workers):
+            self.kill(pid, signal.SIGTERM)
+        deadline = time.monotonic() + self.graceful_timeout + 5
+        while self.workers and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.05)
+        for pid in list(self.workers):
+            self.kill(pid, signal.SIGKILL)
+        while self.workers:
+            self.reap()
+            time.sleep(0.05)
+        self.sock.close()
+
+
+def listen(host, port, backlog=1024):
+    """Socket TCP yang dibagi semua worker"""
+    sock = socket.create_server((host, port), backlog=backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default=os.environ.get('FACE_HOST', '127.0.0.1'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('FACE_PORT', '5000')))
+    parser.add_argument('--workers', type=int, default=SERVE_WORKERS or os.cpu_count() or 1,
+                        help='Jumlah proses worker (bawaan FACE_WORKERS atau jumlah core)')
+    parser.add_argument('--cv-threads', type=int, default=WORKER_CV_THREADS,
+                        help='Thread OpenCV per worker (0 = core dibagi rata)')
+    parser.add_argument('--graceful-timeout', type=float, default=GRACEFUL_TIMEOUT)
+    args = parser.parse_args()
+
+    sock = listen(args.host, args.port)
+    if not load_shared_detector():
+        sys.exit("Gagal memuat cascade classifier")
+
+    if not hasattr(os, 'fork'):
+        # Windows: tanpa fork, satu proses seperti server berthread biasa
+        print("os.fork tidak tersedia; server berjalan dalam satu proses", file=sys.stderr)
+        cv2.setNumThreads(args.cv_threads or default_cv_threads(1))
+        make_server(args.host, args.port, webapp.app, threaded=True, fd=sock.fileno()).serve_forever()
+        return
+
+    if args.workers > 1:
+        # Sesi kamera ada per worker: /start_detection dan /video_feed bisa jatuh ke worker berbeda
+        webapp.app.config['LIVE_ENABLED'] = False
+    server = PreforkServer(sock, args.workers, args.cv_threads, args.graceful_timeout,
+                           reload=lambda: load_shared_detector(reload=True))
+    server.run()
+    print("Server dihentikan.")
+
+
+if __name__ == '__main__':
+    main()
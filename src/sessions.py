@@ -0,0 +1,332 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Sesi kamera live: satu sumber frame per sesi dengan anggaran CPU bersama
+Copyright (c) 2025, Ahmad Fadlilah (https://github.com/ahmadfadlilah)
+
+Setiap sesi memiliki sumber frame, thread penangkap, loop deteksi, pelacak,
+broadcaster, dan statistiknya sendiri. Semua sesi memakai detektor (cascade)
+yang sama, dan `CpuBudget` membatasi berapa frame yang dideteksi bersamaan
+di seluruh sesi sehingga satu proses dapat melayani banyak kamera tanpa
+membebani CPU melebihi jumlah core.
+"""
+
+import os
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+try:
+    from .capture import LatestFrameCapture
+    from .scheduler import SMOOTHING
+    from .streaming import FrameBroadcaster, encode_event, encode_jpeg
+except ImportError:
+    from capture import LatestFrameCapture
+    from scheduler import SMOOTHING
+    from streaming import FrameBroadcaster, encode_event, encode_jpeg
+
+# ID kamera yang valid di URL (/video_feed/<camera_id>)
+CAMERA_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+# ID kamera untuk route lama tanpa ID jika FACE_CAMERAS tidak diatur
+DEFAULT_CAMERA = 'default'
+
+
+def parse_cameras(spec, default_source='0'):
+    """Baca daftar kamera 'id=sumber,id=sumber' menjadi dict berurutan.
+
+    Tanpa spesifikasi, satu kamera DEFAULT_CAMERA dengan `default_source`.
+    """
+    if not spec or not spec.strip():
+        return {DEFAULT_CAMERA: default_source}
+
+    cameras = {}
+    for entry in spec.split(','):
+        if not entry.strip():
+            continue
+        camera_id, separator, source = entry.partition('=')
+        camera_id = camera_id.strip()
+        if not separator or not CAMERA_ID_PATTERN.match(camera_id):
+            raise ValueError(f"Entri kamera tidak valid: '{entry.strip()}' (format: id=sumber)")
+        if camera_id in cameras:
+            raise ValueError(f"ID kamera '{camera_id}' didefinisikan lebih dari sekali")
+        cameras[camera_id] = source.strip()
+    return cameras
+
+
+def detection_event(camera_id, frame_id, shape, faces):
+    """Metadata deteksi satu frame live untuk /detections/stream (tanpa piksel)"""
+    return {
+        "camera": camera_id,
+        "frame_id": frame_id,
+        "timestamp": round(time.time(), 3),
+        "width": int(shape[1]),
+        "height": int(shape[0]),
+        "count": len(faces),
+        "faces": [[int(value) for value in face] for face in faces],
+    }
+
+
+class CpuBudget:
+    """Batas global jumlah frame live yang dideteksi bersamaan oleh semua sesi.
+
+    Slot dibagikan berurutan (FIFO) sehingga tidak ada sesi yang kelaparan.
+    Sesi yang menunggu slot tertinggal dari sumbernya, dan thread penangkapnya
+    membuang frame basi, jadi beban berlebih menurunkan FPS per kamera, bukan
+    menumpuk antrean. `share()` adalah bagian core yang didapat setiap sesi
+    aktif; scheduler sesi memakainya untuk mengecilkan anggaran waktu per frame.
+    """
+
+    def __init__(self, slots=None):
+        self.slots = max(1, int(slots or os.cpu_count() or 1))
+        self._condition = threading.Condition()
+        self._queue = deque()
+        self.in_use = 0
+        self.sessions = 0
+        self.acquired = 0
+        self.wait_seconds = 0.0
+
+    def register(self):
+        """Catat satu sesi aktif tambahan"""
+        with self._condition:
+            self.sessions += 1
+
+    def unregister(self):
+        with self._condition:
+            self.sessions = max(0, self.sessions - 1)
+
+    def share(self):
+        """Bagian core per sesi aktif (maksimal 1.0)"""
+        return min(1.0, self.slots / max(1, self.sessions))
+
+    @contextmanager
+    def slot(self):
+        """Tahan satu slot selama blok kode berjalan; tunggu giliran jika semua slot terpakai"""
+        ticket = object()
+        start = time.perf_counter()
+        with self._condition:
+            self._queue.append(ticket)
+            self._condition.wait_for(lambda: self._queue[0] is ticket and self.in_use < self.slots)
+            self._queue.popleft()
+            self.in_use += 1
+            self.acquired += 1
+            self.wait_seconds += time.perf_counter() - start
+            # Antrean berikutnya mungkin juga mendapat slot
+            self._condition.notify_all()
+        try:
+            yield
+        finally:
+            with self._condition:
+                self.in_use -= 1
+                self._condition.notify_all()
+
+    def stats(self):
+        with self._condition:
+            return {
+                "slots": self.slots,
+                "in_use": self.in_use,
+                "waiting": len(self._queue),
+                "sessions": self.sessions,
+                "share": round(self.share(), 3),
+                "acquired": self.acquired,
+                "wait_seconds": round(self.wait_seconds, 3),
+            }
+
+
+class CameraSession:
+    """Satu kamera live: sumber frame, thread penangkap, loop deteksi, dan broadcaster untuk /video_feed.
+
+    Bagian yang bergantung pada aplikasi diberikan sebagai fungsi:
+    `opener(spec)` membuka sumber frame, `tracker_factory()` membuat pelacak
+    (dengan scheduler) untuk setiap sesi deteksi, dan
+    `frame_handler(session, tracker, frame)` mendeteksi, menggambar, dan
+    menerbitkan satu frame dengan `session.publish()`. Selain frame MJPEG,
+    `detections` menyiarkan event metadata deteksi per frame (SSE).
+    """
+
+    def __init__(self, camera_id, spec, opener, tracker_factory, frame_handler, budget=None, encoder=encode_jpeg):
+        self.camera_id = camera_id
+        self.spec = spec
+        self.opener = opener
+        self.tracker_factory = tracker_factory
+        self.frame_handler = frame_handler
+        self.budget = budget
+        self.broadcaster = FrameBroadcaster(encoder=encoder)
+        self.detections = FrameBroadcaster(encoder=encode_event)
+        self.camera = None
+        self.capture = None
+        self.scheduler = None
+        self.running = False
+        self.fps = 0.0
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def open(self):
+        """Buka sumber frame sesi ini. Mengembalikan False jika gagal."""
+        source = self.opener(self.spec)
+        if not source.isOpened():
+            print(f"Error: Tidak bisa membuka sumber frame '{self.spec}' untuk kamera '{self.camera_id}'.")
+            source.release()
+            return False
+        self.camera = source
+        return True
+
+    def start(self):
+        """Mulai loop deteksi di thread tersendiri.
+
+        Mengembalikan (berhasil, pesan) seperti respons /start_detection.
+        """
+        with self._lock:
+            if self.running:
+                return False, "Deteksi wajah sudah berjalan"
+            if self.camera is None and not self.open():
+                return False, "Gagal menginisialisasi kamera"
+            self.running = True
+            self.broadcaster.open()
+            self.detections.open()
+            self._thread = threading.Thread(target=self.run, name=f'camera-{self.camera_id}', daemon=True)
+            self._thread.start()
+        return True, "Deteksi wajah dimulai"
+
+    def stop(self, timeout=2.0):
+        """Hentikan loop deteksi dan lepaskan sumber frame"""
+        with self._lock:
+            self.running = False
+            self.broadcaster.close()
+            self.detections.close()
+            # Hentikan thread penangkap sebelum sumber dilepas
+            if self.capture is not None:
+                self.capture.stop()
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+        with self._lock:
+            if self.camera is not None:
+                self.camera.release()
+                self.camera = None
+
+    def publish(self, frame, faces=None):
+        """Terbitkan frame ke penonton; frame yang digantikan kembali ke penangkap untuk dipakai ulang.
+
+        Jika `faces` diberikan, event deteksi frame ini juga diterbitkan ke
+        pelanggan `detections`.
+        """
+        if faces is not None:
+            capture = self.capture
+            self.detections.publish(detection_event(self.camera_id, capture.processed if capture is not None else 0,
+                                                    frame.shape, faces))
+        retired = self.broadcaster.publish(frame)
+        capture = self.capture
+        if retired is not None and capture is not None:
+            capture.recycle(retired)
+
+    def run(self):
+        """Loop deteksi live; berjalan sampai dihentikan atau sumber habis"""
+        # Sumber dikuras oleh thread tersendiri; deteksi selalu mengambil frame terbaru
+        # (atau setiap frame, untuk sumber yang diputar secepat mungkin)
+        capture = self.capture = LatestFrameCapture(self.camera).start()
+        tracker = self.tracker_factory()
+        scheduler = self.scheduler = tracker.scheduler
+        target_fps = scheduler.target_fps if scheduler is not None else None
+        if self.budget is not None:
+            self.budget.register()
+
+        # FPS live dihitung dari rata-rata bergerak jarak waktu antar frame yang selesai diproses
+        last_frame_time = None
+        frame_interval = None
+
+        try:
+            while self.running:
+                frame = capture.read(timeout=1.0)
+                if frame is None:
+                    if capture.failed:
+                        # Hentikan semua penonton stream dengan bersih
+                        self.broadcaster.close()
+                        self.detections.close()
+                        break
+                    if not capture.running:
+                        break
+                    continue
+
+                if self.budget is None:
+                    self.frame_handler(self, tracker, frame)
+                else:
+                    # Sesi lain berbagi core yang sama: anggaran waktu per frame ikut mengecil
+                    if scheduler is not None:
+                        scheduler.target_fps = target_fps / self.budget.share()
+                    with self.budget.slot():
+                        self.frame_handler(self, tracker, frame)
+
+                now = time.perf_counter()
+                if last_frame_time is not None:
+                    elapsed = now - last_frame_time
+                    if frame_interval is None:
+                        frame_interval = elapsed
+                    else:
+                        frame_interval += SMOOTHING * (elapsed - frame_interval)
+                    if frame_interval > 0:
+                        self.fps = round(1.0 / frame_interval, 2)
+                last_frame_time = now
+        finally:
+            capture.stop()
+            self.fps = 0.0
+            if self.budget is not None:
+                self.budget.unregister()
+            if capture.failed:
+                # Sumber gagal dibaca atau sudah habis (akhir file video): lepaskan agar
+                # deteksi bisa dimulai lagi dan sumber dibuka ulang dari awal
+                with self._lock:
+                    self.running = False
+                    if self.camera is not None:
+                        self.camera.release()
+                        self.camera = None
+
+    def stats(self):
+        """Sumber frame, penghitung frame, jadwal deteksi, dan penonton sesi ini"""
+        camera = self.camera
+        return {
+            "camera_id": self.camera_id,
+            "running": self.running,
+            "fps": self.fps,
+            "source": camera.describe() if camera is not None else None,
+            "capture": self.capture.stats() if self.capture is not None else None,
+            "scheduler": self.scheduler.stats() if self.scheduler is not None else None,
+            "viewers": self.broadcaster.viewers,
+            "subscribers": self.detections.viewers,
+            "frames_encoded": self.broadcaster.frames_encoded,
+        }
+
+
+class SessionManager:
+    """Kumpulan sesi kamera yang dikonfigurasi, berbagi satu CpuBudget"""
+
+    def __init__(self, cameras, session_factory, budget=None):
+        self.budget = budget
+        self.sessions = {camera_id: session_factory(camera_id, spec, budget)
+                         for camera_id, spec in cameras.items()}
+
+    @property
+    def default_id(self):
+        """Kamera untuk route tanpa ID: DEFAULT_CAMERA jika ada, selain itu kamera pertama"""
+        if DEFAULT_CAMERA in self.sessions:
+            return DEFAULT_CAMERA
+        return next(iter(self.sessions))
+
+    def get(self, camera_id=None):
+        """Sesi untuk camera_id (atau kamera bawaan); None jika tidak dikenal"""
+        return self.sessions.get(self.default_id if camera_id is None else camera_id)
+
+    def __iter__(self):
+        return iter(self.sessions.values())
+
+    def stop_all(self):
+        for session in self:
+            session.stop()
+
+    def stats(self):
+        return {
+            "default": self.default_id,
+            "budget": self.budget.stats() if self.budget is not None else None,
+            "cameras": {session.camera_id: session.stats() for session in self},
+        }
@@ -0,0 +1,259 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Sumber frame untuk loop live: webcam, file video, folder gambar, dan generator sintetis
+Copyright (c) 2025, Ahmad Fadlilah (https://github.com/ahmadfadlilah)
+
+Semua sumber memiliki antarmuka seperti `cv2.VideoCapture` (`isOpened`,
+`read`, `release`) sehingga bisa langsung dipakai oleh `LatestFrameCapture`.
+"""
+
+import os
+import time
+
+import cv2
+import numpy as np
+
+# Ekstensi file gambar yang dikenali (folder gambar dan arsip zip unggahan)
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp', '.tif', '.tiff')
+
+# FPS bawaan untuk sumber tanpa informasi FPS (folder gambar, sintetis, file tanpa metadata)
+DEFAULT_FPS = 15
+
+
+class FrameSource:
+    """Dasar sumber frame.
+
+    Dengan `realtime=True`, `read()` menunggu sampai jadwal frame berikutnya
+    sesuai `fps` sehingga sumber berperilaku seperti kamera (frame bisa dibuang
+    jika deteksi lebih lambat). Dengan `realtime=False`, frame diberikan secepat
+    mungkin dan `LatestFrameCapture` menunggu setiap frame diproses, sehingga
+    hasilnya deterministik.
+    """
+
+    kind = 'source'
+    # read() menerima buffer frame lama untuk ditimpa (lihat LatestFrameCapture.recycle)
+    reuses_buffers = True
+
+    def __init__(self, fps=DEFAULT_FPS, realtime=True):
+        self.fps = fps
+        self.realtime = realtime
+        self.frames_read = 0
+        self._next_frame = None
+
+    @property
+    def live(self):
+        """Apakah frame datang sesuai waktu nyata (boleh dibuang jika pemroses tertinggal)"""
+        return self.realtime
+
+    def isOpened(self):
+        return True
+
+    def _read(self, image=None):
+        raise NotImplementedError
+
+    def _pace(self):
+        """Tunggu sampai jadwal frame berikutnya pada fps sumber"""
+        now = time.perf_counter()
+        if self._next_frame is None or now - self._next_frame > 1.0:
+            # Frame pertama, atau pemroses tertinggal jauh: mulai jadwal baru dari sekarang
+            self._next_frame = now
+        elif now < self._next_frame:
+            time.sleep(self._next_frame - now)
+        self._next_frame += 1.0 / self.fps
+
+    def read(self, image=None):
+        """Baca frame berikutnya. Mengembalikan tuple (berhasil, frame) seperti VideoCapture.read().
+
+        Seperti VideoCapture.read(image), frame ditulis ke `image` jika ukurannya cocok.
+        """
+        if self.realtime and self.fps:
+            self._pace()
+        success, frame = self._read(image)
+        if success:
+            self.frames_read += 1
+        return success, frame
+
+    def release(self):
+        pass
+
+    def describe(self):
+        """Ringkasan sumber untuk endpoint pemantauan"""
+        return {"type": self.kind, "fps": self.fps, "realtime": self.realtime, "frames_read": self.frames_read}
+
+
+class DeviceSource(FrameSource):
+    """Webcam berdasarkan indeks perangkat, dengan cadangan backend CAP_DSHOW (Windows)"""
+
+    kind = 'device'
+
+    def __init__(self, index=0):
+        super().__init__(fps=None, realtime=True)
+        self.index = index
+        print("Menginisialisasi webcam...")
+        self.capture = cv2.VideoCapture(index)
+        if not self.capture.isOpened():
+            print("Error: Tidak bisa membuka webcam dengan metode default.")
+            print("Mencoba membuka webcam dengan backend alternatif (CAP_DSHOW)...")
+            self.capture = cv2.VideoCapture(index, cv2.CAP_DSHOW)
+            if not self.capture.isOpened():
+                print("Error: Tetap tidak bisa membuka webcam. "
+                      "Pastikan webcam terpasang dan tidak digunakan aplikasi lain.")
+            else:
+                print("Webcam berhasil dibuka dengan backend CAP_DSHOW.")
+        else:
+            print("Webcam berhasil dibuka dengan metode default.")
+        self.fps = self.capture.get(cv2.CAP_PROP_FPS) or None
+
+    def isOpened(self):
+        return self.capture.isOpened()
+
+    def read(self, image=None):
+        # Kamera sudah memberi frame sesuai waktu nyata; tidak perlu diatur lagi
+        success, frame = self.capture.read(image)
+        if success:
+            self.frames_read += 1
+        return success, frame
+
+    def release(self):
+        self.capture.release()
+
+
+class VideoFileSource(FrameSource):
+    """File video (atau URL stream yang didukung OpenCV), diputar pada FPS aslinya atau secepat mungkin"""
+
+    kind = 'video'
+
+    def __init__(self, path, realtime=True, loop=False, fps=None):
+        self.path = path
+        self.loop = loop
+        self.capture = cv2.VideoCapture(path)
+        super().__init__(fps=fps or self.capture.get(cv2.CAP_PROP_FPS) or DEFAULT_FPS, realtime=realtime)
+
+    def isOpened(self):
+        return self.capture.isOpened()
+
+    def _read(self, image=None):
+        success, frame = self.capture.read(image)
+        if not success and self.loop and self.frames_read > 0:
+            # Putar ulang dari awal
+            self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            success, frame = self.capture.read(image)
+        return success, frame
+
+    def release(self):
+        self.capture.release()
+
+    def describe(self):
+        return dict(super().describe(), path=self.path, loop=self.loop)
+
+
+class ImageDirectorySource(FrameSource):
+    """Urutan file gambar dalam satu folder (urut nama), diputar sebagai video"""
+
+    kind = 'images'
+
+    def __init__(self, directory, fps=DEFAULT_FPS, realtime=True, loop=False):
+        super().__init__(fps=fps, realtime=realtime)
+        self.directory = directory
+        self.loop = loop
+        self.paths = []
+        if os.path.isdir(directory):
+            self.paths = [os.path.join(directory, name) for name in sorted(os.listdir(directory))
+                          if name.lower().endswith(IMAGE_EXTENSIONS)]
+        self._index = 0
+
+    def isOpened(self):
+        return bool(self.paths)
+
+    def _read(self, image=None):
+        # Setiap file di-decode ke array baru; buffer lama tidak dipakai
+        while True:
+            if self._index >= len(self.paths):
+                if not self.loop or not self.paths:
+                    return False, None
+                self._index = 0
+            path = self.paths[self._index]
+            self._index += 1
+            frame = cv2.imread(path)
+            if frame is not None:
+                return True, frame
+            print(f"Peringatan: gambar '{path}' tidak dapat dibaca, dilewati.")
+
+    def describe(self):
+        return dict(super().describe(), directory=self.directory, images=len(self.paths), loop=self.loop)
+
+
+class SyntheticSource(FrameSource):
+    """Frame buatan yang deterministik: latar bertekstur dengan gambar yang bergerak melingkar.
+
+    Jika `image` diberikan (misalnya potret), gambar tersebut ditempel pada
+    lintasan melingkar; `face_box` [x, y, w, h] di dalam `image` membuat posisi
+    wajah pada frame terakhir tersedia di `last_box`. Tanpa `image`, yang
+    bergerak adalah persegi abu-abu (beban deteksi tanpa wajah).
+    """
+
+    kind = 'synthetic'
+
+    def __init__(self, size=(640, 480), fps=DEFAULT_FPS, realtime=True, frames=None, image=None,
+                 face_box=None, seed=0):
+        super().__init__(fps=fps, realtime=realtime)
+        width, height = size
+        self.size = (width, height)
+        self.frames = frames
+        rng = np.random.default_rng(seed)
+        self.background = cv2.GaussianBlur(rng.integers(0, 255, size=(height, width, 3), dtype=np.uint8),
+                                           (0, 0), 3)
+        if image is None:
+            image = np.full((min(height, width) // 4,) * 2 + (3,), 160, dtype=np.uint8)
+        self.image = image
+        self.face_box = face_box
+        self.last_box = None
+
+    def _read(self, image=None):
+        index = self.frames_read
+        if self.frames is not None and index >= self.frames:
+            return False, None
+
+        width, height = self.size
+        tile_height, tile_width = self.image.shape[:2]
+        # Lintasan melingkar pelan di tengah frame
+        angle = 2 * np.pi * index / 120
+        x = int((width - tile_width) / 2 + min(100, (width - tile_width) // 2) * np.cos(angle))
+        y = int((height - tile_height) / 2 + min(50, (height - tile_height) // 2) * np.sin(angle))
+        if image is not None and image.shape == self.background.shape:
+            frame = image
+            np.copyto(frame, self.background)
+        else:
+            frame = self.background.copy()
+        frame[y:y + tile_height, x:x + tile_width] = self.image
+        if self.face_box is not None:
+            self.last_box = np.array(self.face_box) + [x, y, 0, 0]
+        return True, frame
+
+    def describe(self):
+        return dict(super().describe(), size=list(self.size), frames=self.frames)
+
+
+def open_source(spec=None, realtime=True, loop=False, fps=None):
+    """Buat sumber frame dari string konfigurasi.
+
+    - kosong atau angka (misalnya '0'): webcam dengan indeks tersebut
+    - 'synthetic' atau 'synthetic:640x480': generator sintetis
+    - path folder: urutan gambar di folder tersebut
+    - selain itu: file video atau URL stream
+
+    Pemanggil memeriksa `isOpened()` pada sumber yang dikembalikan.
+    """
+    spec = str(spec).strip() if spec is not None else ''
+    if spec == '' or spec.isdigit():
+        return DeviceSource(int(spec or 0))
+    if spec == 'synthetic' or spec.startswith('synthetic:'):
+        size = (640, 480)
+        if ':' in spec:
+            width, height = spec.split(':', 1)[1].lower().split('x')
+            size = (int(width), int(height))
+        return SyntheticSource(size=size, fps=fps or DEFAULT_FPS, realtime=realtime)
+    if os.path.isdir(spec):
+        return ImageDirectorySource(spec, fps=fps or DEFAULT_FPS, realtime=realtime, loop=loop)
+    return VideoFileSource(spec, realtime=realtime, loop=loop, fps=fps)
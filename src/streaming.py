@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Penyiaran frame MJPEG: encode sekali, kirim ke banyak penonton
+Copyright (c) 2025, Ahmad Fadlilah (https://github.com/ahmadfadlilah)
+"""
+
+import json
+import threading
+
+import cv2
+
+
+def encode_jpeg(frame):
+    """Encode frame sebagai JPEG. Mengembalikan bytes atau None jika gagal."""
+    flag, encoded_image = cv2.imencode(".jpg", frame)
+    if not flag:
+        return None
+    return encoded_image.tobytes()
+
+
+def encode_event(event):
+    """Encode event deteksi (dict) sebagai satu pesan Server-Sent Events dengan `frame_id` sebagai id"""
+    data = json.dumps(event, separators=(',', ':'))
+    return f"id: {event.get('frame_id', '')}\ndata: {data}\n\n".encode('utf-8')
+
+
+class FrameBroadcaster:
+    """Menyimpan frame terbaru beserta nomor versinya dan membagikan JPEG-nya ke semua penonton.
+
+    Thread deteksi memanggil `publish()` untuk setiap frame baru. Penonton
+    menunggu pada condition sampai ada versi yang lebih baru; penonton pertama
+    yang membutuhkan versi tersebut melakukan encode (di luar lock), dan hasilnya
+    dipakai ulang oleh penonton lain. Jika tidak ada penonton, tidak ada encode.
+    Dengan `encoder=encode_event` yang diterbitkan adalah event deteksi (dict),
+    dan "JPEG" yang dibagikan adalah pesan SSE-nya.
+    """
+
+    def __init__(self, encoder=encode_jpeg):
+        self.encoder = encoder
+        self._condition = threading.Condition()
+        self._frame = None
+        self._version = 0
+        self._jpeg = None
+        self._jpeg_version = 0
+        self._encoding = False
+        # Frame yang sedang di-encode di luar lock (tidak boleh dikembalikan untuk dipakai ulang)
+        self._encoding_frame = None
+        self._closed = True
+        self.viewers = 0
+        self.frames_encoded = 0
+
+    @property
+    def version(self):
+        return self._version
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def open(self):
+        """Mulai sesi siaran baru (dipanggil saat deteksi dimulai)"""
+        with self._condition:
+            self._frame = None
+            self._jpeg = None
+            self._jpeg_version = self._version
+            self._closed = False
+
+    def close(self):
+        """Akhiri siaran; semua penonton yang menunggu akan berhenti dengan bersih"""
+        with self._condition:
+            self._closed = True
+            self._frame = None
+            self._jpeg = None
+            self._condition.notify_all()
+
+    def publish(self, frame):
+        """Terbitkan frame baru. Frame tidak boleh diubah lagi oleh pemanggil setelah diterbitkan.
+
+        Frame yang digantikan ditukar keluar di bawah lock dan dikembalikan agar
+        buffernya bisa dipakai ulang, atau None jika tidak ada atau frame itu
+        masih di-encode oleh penonton.
+        """
+        with self._condition:
+            retired = self._frame
+            self._frame = frame
+            self._version += 1
+            self._condition.notify_all()
+            if retired is self._encoding_frame:
+                return None
+            return retired
+
+    def wait_for_jpeg(self, last_version=0, timeout=None):
+        """Tunggu JPEG dengan versi lebih baru dari `last_version`.
+
+        Mengembalikan tuple (versi, jpeg_bytes), atau None jika siaran ditutup
+        (atau batas waktu habis).
+        """
+        with self._condition:
+            # Tunggu sampai ada frame yang lebih baru, tanpa busy-spin
+            if not self._condition.wait_for(
+                    lambda: self._closed or (self._frame is not None and self._version > last_version),
+                    timeout):
+                return None
+            if self._closed:
+                return None
+
+            # Jika penonton lain sedang meng-encode versi terbaru, tunggu hasilnya
+            self._condition.wait_for(lambda: self._closed or not self._encoding)
+            if self._closed:
+                return None
+            if self._jpeg is not None and self._jpeg_version > last_version:
+                return self._jpeg_version, self._jpeg
+
+            # Penonton ini menjadi encoder untuk versi terbaru
+            self._encoding = True
+            frame = self._encoding_frame = self._frame
+            version = self._version
+
+        jpeg = None
+        try:
+            # Encode di luar lock agar thread deteksi tidak tertahan
+            jpeg = self.encoder(frame)
+        finally:
+            with self._condition:
+                self._encoding = False
+                self._encoding_frame = None
+                if jpeg is not None and version > self._jpeg_version and not self._closed:
+                    self._jpeg = jpeg
+                    self._jpeg_version = version
+                    self.frames_encoded += 1
+                self._condition.notify_all()
+
+        if jpeg is None:
+            return None
+        return version, jpeg
+
+    def add_viewers(self, count):
+        """Catat penonton yang dilayani di luar frames() (misalnya coroutine mode ASGI)"""
+        with self._condition:
+            self.viewers += count
+
+    def frames(self):
+        """Generator JPEG untuk satu penonton; berhenti ketika siaran ditutup"""
+        self.add_viewers(1)
+        try:
+            last_version = 0
+            while True:
+                result = self.wait_for_jpeg(last_version)
+                if result is None:
+                    return
+                last_version, jpeg = result
+                yield jpeg
+        finally:
+            self.add_viewers(-1)
@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Pelacakan wajah antar keyframe untuk loop deteksi live
+Copyright (c) 2025, Ahmad Fadlilah (https://github.com/ahmadfadlilah)
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    from .detector import live_profile
+    from .nms import merge_faces
+except ImportError:
+    from detector import live_profile
+    from nms import merge_faces
+
+# Deteksi satu frame penuh setiap berapa frame (1 = setiap frame, tanpa pelacakan)
+KEYFRAME_INTERVAL = 5
+# Perluasan area pencarian di sekitar kotak sebelumnya, relatif terhadap ukuran kotak
+ROI_MARGIN = 0.5
+# Profil yang dipakai untuk deteksi ulang di dalam area pencarian
+ROI_PROFILE = 'live-fast'
+
+
+class FaceTracker:
+    """Deteksi penuh hanya pada keyframe; di antara keyframe, wajah dicari ulang di sekitar posisi sebelumnya.
+
+    Keyframe adalah frame pertama dan setiap `keyframe_interval` frame, ditambah
+    frame yang menurut `live_profile` memakai ensemble yang ditingkatkan. Jika
+    sebuah wajah tidak ditemukan lagi di area pencariannya, frame tersebut
+    langsung dideteksi ulang secara penuh.
+
+    Jika `scheduler` (EnhancedScheduler) diberikan, keyframe selalu memakai
+    profil cepat dan pass yang ditingkatkan dijadwalkan oleh scheduler. Dengan
+    `enhanced=False` keyframe juga selalu memakai profil cepat, tanpa ensemble
+    yang ditingkatkan sama sekali.
+    """
+
+    def __init__(self, detector, keyframe_interval=KEYFRAME_INTERVAL, roi_margin=ROI_MARGIN,
+                 roi_profile=ROI_PROFILE, scheduler=None, enhanced=True):
+        self.detector = detector
+        self.enhanced = enhanced
+        self.keyframe_interval = max(1, int(keyframe_interval))
+        self.roi_margin = roi_margin
+        self.roi_profile = roi_profile
+        self.scheduler = scheduler
+        self.reset()
+
+    def reset(self):
+        """Lupakan semua wajah yang dilacak (misalnya saat sesi deteksi baru dimulai)"""
+        self.tracks = np.empty((0, 4), dtype=np.int32)
+        self.frame_count = 0
+        self.keyframes = 0
+        self.tracked_frames = 0
+        self.lost_tracks = 0
+
+    def is_keyframe(self, frame_count):
+        """Apakah frame ke-frame_count harus dideteksi penuh"""
+        return (frame_count == 1 or frame_count % self.keyframe_interval == 0
+                or (self.scheduler is None and self.enhanced and live_profile(frame_count) != ROI_PROFILE))
+
+    def update(self, frame):
+        """Proses frame berikutnya. Mengembalikan array N x 4 [x, y, w, h]."""
+        if self.scheduler is None:
+            return self._update(frame)
+
+        start = self.scheduler.clock()
+        faces = self._update(frame)
+        self.scheduler.observe_frame(self.scheduler.clock() - start)
+
+        # Pass yang ditingkatkan dijalankan sesuai jadwal, mungkin tersebar di beberapa frame
+        self.tracks = self.scheduler.run(frame, faces)
+        return self.tracks
+
+    def _update(self, frame):
+        self.frame_count += 1
+
+        if self.keyframe_interval == 1 or self.is_keyframe(self.frame_count):
+            faces = self.detect_full(frame)
+        elif len(self.tracks) == 0:
+            # Tidak ada wajah yang dilacak: wajah baru akan ditemukan pada keyframe berikutnya
+            faces = self.tracks
+        else:
+            faces = self.track(frame)
+            if faces is None:
+                # Ada wajah yang hilang dari area pencariannya: kembali ke deteksi penuh
+                self.lost_tracks += 1
+                faces = self.detect_full(frame)
+            else:
+                self.tracked_frames += 1
+
+        self.tracks = faces
+        return faces
+
+    def detect_full(self, frame):
+        """Deteksi pada frame penuh dengan profil live sesuai nomor frame"""
+        self.keyframes += 1
+        if self.scheduler is not None or not self.enhanced:
+            return self.detector.detect(frame, profile=self.roi_profile)
+        return self.detector.detect(frame, profile=live_profile(self.frame_count))
+
+    def search_region(self, box, frame_shape):
+        """Area pencarian yang diperluas di sekitar kotak, dipotong pada batas frame"""
+        x, y, w, h = (int(v) for v in box)
+        margin = int(round(self.roi_margin * max(w, h)))
+        height, width = frame_shape[:2]
+        return (max(0, x - margin), max(0, y - margin),
+                min(width, x + w + margin), min(height, y + h + margin))
+
+    def track(self, frame):
+        """Cari ulang setiap wajah di area sekitarnya. Mengembalikan None jika ada wajah yang hilang."""
+        found = []
+        for box in self.tracks:
+            x1, y1, x2, y2 = self.search_region(box, frame.shape)
+            candidates = self.detector.detect(frame[y1:y2, x1:x2], profile=self.roi_profile)
+            if len(candidates) == 0:
+                return None
+
+            # Pilih kandidat yang pusatnya paling dekat dengan pusat kotak sebelumnya
+            candidates = np.asarray(candidates).reshape(-1, 4)
+            previous_center = np.array([box[0] + box[2] / 2 - x1, box[1] + box[3] / 2 - y1])
+            centers = candidates[:, :2] + candidates[:, 2:] / 2
+            best = candidates[np.argmin(np.sum((centers - previous_center) ** 2, axis=1))].copy()
+            best[:2] += (x1, y1)
+            found.append(best[None, :])
+
+        # Area pencarian yang tumpang tindih bisa menemukan wajah yang sama dua kali
+        return merge_faces(found)
+
+
+class TrackerRegistry:
+    """Pelacak per klien (misalnya perangkat yang mengirim frame ke /detect_frame).
+
+    Jumlah klien dibatasi `max_clients` (yang paling lama tidak aktif dibuang
+    lebih dulu) dan pelacak klien yang diam lebih dari `idle_seconds` dilupakan.
+    Frame dari klien yang sama diproses berurutan karena pelacak tidak
+    thread-safe; klien yang berbeda dapat diproses bersamaan.
+    """
+
+    def __init__(self, factory, max_clients=256, idle_seconds=30.0, clock=time.monotonic):
+        self.factory = factory
+        self.max_clients = max(1, int(max_clients))
+        self.idle_seconds = idle_seconds
+        self.clock = clock
+        self._clients = OrderedDict()
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    @contextmanager
+    def use(self, client_id, shape=None):
+        """Pinjam pelacak klien; pelacak di-reset jika ukuran frame berubah"""
+        now = self.clock()
+        with self._lock:
+            self._expire(now)
+            entry = self._clients.get(client_id)
+            if entry is None:
+                entry = self._clients[client_id] = {'tracker': self.factory(), 'lock': threading.Lock(),
+                                                    'shape': shape, 'seen': now}
+                while len(self._clients) > self.max_clients:
+                    self._clients.popitem(last=False)
+                    self.evicted += 1
+            self._clients.move_to_end(client_id)
+            entry['seen'] = now
+
+        with entry['lock']:
+            if shape is not None and entry['shape'] != shape:
+                entry['tracker'].reset()
+                entry['shape'] = shape
+            yield entry['tracker']
+
+    def _expire(self, now):
+        while self._clients:
+            client_id, entry = next(iter(self._clients.items()))
+            if now - entry['seen'] <= self.idle_seconds:
+                return
+            del self._clients[client_id]
+            self.evicted += 1
+
+    def __len__(self):
+        return len(self._clients)
+
+    def stats(self):
+        with self._lock:
+            return {"clients": len(self._clients), "max_clients": self.max_clients, "evicted": self.evicted}
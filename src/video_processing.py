@@ -0,0 +1,217 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Pemrosesan file video offline secara paralel: segmen per proses, hasil digabung berurutan
+Copyright (c) 2025, Ahmad Fadlilah (https://github.com/ahmadfadlilah)
+
+File video dibagi menjadi segmen berdasarkan indeks frame. Setiap segmen
+diproses oleh proses pekerja (seek ke frame awal, deteksi, gambar kotak) dan
+ditulis ke file video sementara. Proses utama menggabungkan segmen sesuai
+urutan begitu tersedia, menjadi satu video beranotasi dan satu file deteksi
+JSON Lines (satu baris per frame).
+"""
+
+import json
+import math
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+try:
+    from .detector import FaceDetector, draw_faces
+except ImportError:
+    from detector import FaceDetector, draw_faces
+
+# Profil deteksi bawaan untuk video offline
+VIDEO_PROFILE = 'live-fast'
+# Panjang segmen minimum (frame); segmen yang terlalu pendek didominasi biaya seek
+MIN_SEGMENT_FRAMES = 30
+# Jumlah segmen per pekerja agar beban tetap seimbang jika kecepatan segmen berbeda
+SEGMENTS_PER_WORKER = 4
+# Codec menurut ekstensi file output (selain itu MJPG)
+OUTPUT_CODECS = {'.mp4': 'mp4v', '.m4v': 'mp4v', '.avi': 'MJPG', '.mov': 'mp4v'}
+
+# Detektor per proses pekerja (dimuat sekali oleh initializer pool)
+_worker_detector = None
+
+
+def plan_segments(frame_count, workers, segment_frames=None):
+    """Bagi frame 0..frame_count menjadi daftar (awal, akhir) yang berurutan"""
+    if frame_count <= 0:
+        return []
+    if not segment_frames:
+        segment_frames = max(MIN_SEGMENT_FRAMES, math.ceil(frame_count / (max(1, workers) * SEGMENTS_PER_WORKER)))
+    return [(start, min(frame_count, start + segment_frames)) for start in range(0, frame_count, segment_frames)]
+
+
+def video_info(path):
+    """Jumlah frame, FPS, dan ukuran (lebar, tinggi) file video. Mengembalikan None jika tidak bisa dibuka."""
+    capture = cv2.VideoCapture(path)
+    try:
+        if not capture.isOpened():
+            return None
+        return {
+            "frames": int(capture.get(cv2.CAP_PROP_FRAME_COUNT)),
+            "fps": capture.get(cv2.CAP_PROP_FPS) or 30.0,
+            "size": (int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)), int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT))),
+        }
+    finally:
+        capture.release()
+
+
+def open_at(path, start):
+    """Buka video dan posisikan di frame `start`.
+
+    Seek memakai CAP_PROP_POS_FRAMES; jika backend tidak mendarat tepat di
+    frame tersebut, video dibuka ulang dan frame dilewati satu per satu.
+    """
+    capture = cv2.VideoCapture(path)
+    if start == 0:
+        return capture
+    capture.set(cv2.CAP_PROP_POS_FRAMES, start)
+    if int(capture.get(cv2.CAP_PROP_POS_FRAMES)) == start:
+        return capture
+
+    capture.release()
+    capture = cv2.VideoCapture(path)
+    for _ in range(start):
+        if not capture.grab():
+            break
+    return capture
+
+
+def create_writer(path, fps, size, codec=None):
+    """VideoWriter untuk path output; codec dipilih dari ekstensi jika tidak diberikan"""
+    codec = codec or OUTPUT_CODECS.get(os.path.splitext(path)[1].lower(), 'MJPG')
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*codec), fps, size)
+    if not writer.isOpened():
+        raise RuntimeError(f"Tidak bisa membuat video output '{path}' dengan codec {codec}")
+    return writer
+
+
+def _init_worker(cascade_dir, max_detection_size):
+    """Initializer proses pekerja: satu thread OpenCV per proses dan detektor yang dimuat sekali"""
+    global _worker_detector
+
+    # Paralelisme datang dari proses; thread internal OpenCV hanya akan berebut core
+    cv2.setNumThreads(1)
+    _worker_detector = FaceDetector(cascade_dir=cascade_dir, max_detection_size=max_detection_size)
+    if not _worker_detector.load():
+        raise RuntimeError("Gagal memuat cascade di proses pekerja")
+
+
+def process_segment(path, start, end, profile, segment_path, fps, size, annotate=True):
+    """Proses frame [start, end) dan tulis hasil beranotasi ke segment_path.
+
+    Mengembalikan list kotak wajah per frame (list [x, y, w, h]). Jika file
+    ternyata lebih pendek dari perkiraan, segmen berhenti di frame terakhir.
+    """
+    detector = _worker_detector
+    capture = open_at(path, start)
+    writer = create_writer(segment_path, fps, size, 'MJPG') if segment_path else None
+    detections = []
+    try:
+        if writer is not None:
+            # Segmen sementara akan di-encode ulang, jadi simpan dengan kualitas setinggi mungkin
+            writer.set(cv2.VIDEOWRITER_PROP_QUALITY, 100)
+        for _ in range(start, end):
+            success, frame = capture.read()
+            if not success:
+                break
+            faces = detector.detect(frame, profile=profile)
+            detections.append(np.asarray(faces).reshape(-1, 4).tolist())
+            if writer is not None:
+                if annotate:
+                    draw_faces(frame, faces)
+                writer.write(frame)
+    finally:
+        capture.release()
+        if writer is not None:
+            writer.release()
+    return detections
+
+
+def append_segment(writer, segment_path):
+    """Salin semua frame dari file segmen ke writer output. Mengembalikan jumlah frame."""
+    capture = cv2.VideoCapture(segment_path)
+    count = 0
+    try:
+        while True:
+            success, frame = capture.read()
+            if not success:
+                return count
+            writer.write(frame)
+            count += 1
+    finally:
+        capture.release()
+
+
+def process_video(path, output=None, detections_path=None, workers=None, profile=VIDEO_PROFILE,
+                  segment_frames=None, cascade_dir=None, max_detection_size=None, progress=print):
+    """Proses file video secara paralel dan tulis video beranotasi dan/atau file deteksi JSON Lines.
+
+    Mengembalikan dict ringkasan (frame, segmen, durasi, fps pemrosesan).
+    """
+    info = video_info(path)
+    if info is None:
+        raise ValueError(f"Tidak bisa membuka file video '{path}'")
+    if info["frames"] <= 0:
+        raise ValueError(f"Jumlah frame '{path}' tidak diketahui; pemrosesan paralel membutuhkan file video")
+
+    workers = max(1, int(workers or os.cpu_count() or 1))
+    segments = plan_segments(info["frames"], workers, segment_frames)
+    temp_dir = tempfile.mkdtemp(prefix='face-video-') if output else None
+    writer = create_writer(output, info["fps"], info["size"]) if output else None
+    detections_file = open(detections_path, 'w', encoding='utf-8') if detections_path else None
+
+    start_time = time.perf_counter()
+    frame_index = 0
+    faces_total = 0
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(cascade_dir, max_detection_size)) as executor:
+            futures = []
+            for index, (start, end) in enumerate(segments):
+                segment_path = os.path.join(temp_dir, f"segmen_{index:05d}.avi") if temp_dir else None
+                futures.append((executor.submit(process_segment, path, start, end, profile, segment_path,
+                                                info["fps"], info["size"]), segment_path))
+
+            # Gabungkan sesuai urutan segmen; segmen berikutnya tetap diproses sementara menunggu
+            for index, (future, segment_path) in enumerate(futures):
+                detections = future.result()
+                for faces in detections:
+                    if detections_file is not None:
+                        detections_file.write(json.dumps({
+                            "frame": frame_index,
+                            "time": round(frame_index / info["fps"], 3),
+                            "faces": faces,
+                        }) + "\n")
+                    faces_total += len(faces)
+                    frame_index += 1
+                if writer is not None:
+                    append_segment(writer, segment_path)
+                    os.remove(segment_path)
+                if progress is not None:
+                    progress(f"Segmen {index + 1}/{len(segments)} selesai ({frame_index} frame)")
+    finally:
+        if writer is not None:
+            writer.release()
+        if detections_file is not None:
+            detections_file.close()
+        if temp_dir is not None:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    elapsed = time.perf_counter() - start_time
+    return {
+        "frames": frame_index,
+        "segments": len(segments),
+        "workers": workers,
+        "faces": faces_total,
+        "seconds": round(elapsed, 3),
+        "fps": round(frame_index / elapsed, 2) if elapsed > 0 else None,
+    }
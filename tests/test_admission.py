@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Test cases for admission control in front of the upload pipeline
+Copyright (c) 2025, Ahmad Fadlilah (https://github.com/ahmadfadlilah)
+"""
+
+import os
+import sys
+import threading
+import time
+import unittest
+from io import BytesIO
+from unittest.mock import patch
+
+import cv2
+import numpy as np
+
+# Add the src directory to the path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+os.environ.setdefault('FACE_EAGER_LOAD', '0')
+
+from src.admission import AdmissionController, Overloaded
+
+
+def hold_slot(controller, release, timeout=None):
+    """Take a slot on a background thread until `release` is set"""
+    acquired = threading.Event()
+
+    def run():
+        with controller.slot(timeout):
+            acquired.set()
+            release.wait(5)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread, acquired
+
+
+def wait_until(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("Condition not reached")
+        time.sleep(0.005)
+
+
+class TestAdmissionController(unittest.TestCase):
+    """Test cases for AdmissionController"""
+
+    def test_requests_wait_in_order_within_the_limit(self):
+        controller = AdmissionController(limit=1, queue_size=2)
+        release = threading.Event()
+        holder, acquired = hold_slot(controller, release)
+        self.assertTrue(acquired.wait(5))
+
+        order = []
+        waiters = []
+        for name in 'ab':
+            thread = threading.Thread(target=self.enter_and_record, args=(controller, name, order))
+            thread.start()
+            waiters.append(thread)
+            wait_until(lambda: controller.queued == len(waiters))
+
+        release.set()
+        for thread in [holder] + waiters:
+            thread.join(5)
+        self.assertEqual(order, ['a', 'b'])
+        stats = controller.stats()
+        self.assertEqual((stats['admitted'], stats['in_use'], stats['queued']), (3, 0, 0))
+        self.assertGreater(controller.wait_seconds, 0)
+
+    @staticmethod
+    def enter_and_record(controller, name, order):
+        with controller.slot():
+            order.append(name)
+
+    def test_full_queue_is_rejected_immediately(self):
+        controller = AdmissionController(limit=1, queue_size=1)
+        release = threading.Event()
+        holder, acquired = hold_slot(controller, release)
+        self.assertTrue(acquired.wait(5))
+        waiter, _ = hold_slot(controller, threading.Event())
+        wait_until(lambda: controller.queued == 1)
+
+        self.assertTrue(controller.saturated())
+        start = time.perf_counter()
+        with self.assertRaises(Overloaded) as context:
+            with controller.slot():
+                pass
+        self.assertLess(time.perf_counter() - start, 0.1)
+        self.assertEqual(context.exception.reason, 'queue_full')
+        self.assertGreaterEqual(context.exception.retry_after, 1)
+        release.set()
+        holder.join(5)
+        self.assertEqual(controller.rejected['queue_full'], 1)
+
+    def test_deadlines(self):
+        """Requests give up when their deadline passes, or right away if it cannot be met"""
+        controller = AdmissionController(limit=1, queue_size=4, max_wait=10)
+        release = threading.Event()
+        holder, acquired = hold_slot(controller, release)
+        self.assertTrue(acquired.wait(5))
+
+        with self.assertRaises(Overloaded) as context:
+            with controller.slot(timeout=0.05):
+                pass
+        self.assertEqual(context.exception.reason, 'timeout')
+        self.assertEqual(controller.queued, 0)
+
+        # With a known service time of 2 s, a 1 s deadline cannot be met
+        controller.service_seconds = 2.0
+        with self.assertRaises(Overloaded) as context:
+            with controller.slot(timeout=1.0):
+                pass
+        self.assertEqual(context.exception.reason, 'deadline')
+        self.assertEqual(context.exception.retry_after, 2)
+        release.set()
+        holder.join(5)
+        self.assertEqual(controller.stats()['rejected'], {'queue_full': 0, 'deadline': 1, 'timeout': 1})
+
+    def test_service_time_is_measured(self):
+        controller = AdmissionController(limit=2)
+        with controller.slot() as waited:
+            time.sleep(0.02)
+        self.assertEqual(waited, controller.wait_seconds)
+        self.assertGreaterEqual(controller.service_seconds, 0.02)
+
+    def test_unlimited(self):
+        controller = AdmissionController(limit=0)
+        with controller.slot(), controller.slot():
+            self.assertFalse(controller.saturated())
+        self.assertEqual(controller.admitted, 0)
+
+
+class TestUploadAdmission(unittest.TestCase):
+    """Test cases for admission control on /upload"""
+
+    def setUp(self):
+        import src.app as webapp
+        self.webapp = webapp
+        self.client = webapp.app.test_client()
+        self.image = cv2.imencode('.png', np.zeros((40, 40, 3), dtype=np.uint8))[1].tobytes()
+
+    def post(self, headers=None):
+        return self.client.post('/upload?mode=boxes', data={'file': (BytesIO(self.image), 'a.png')},
+                                content_type='multipart/form-data', headers=headers or {})
+
+    def test_saturated_upload_returns_503_with_retry_after(self):
+        controller = AdmissionController(limit=1, queue_size=0)
+        release = threading.Event()
+        holder, acquired = hold_slot(controller, release)
+        self.assertTrue(acquired.wait(5))
+        controller.service_seconds = 2.5
+        try:
+            with patch.object(self.webapp, 'upload_admission', controller), \
+                    patch.object(self.webapp, 'detector') as detector:
+                response = self.post()
+                detector.detect.assert_not_called()
+                self.assertEqual(response.status_code, 503)
+                self.assertEqual(response.headers['Retry-After'], '3')
+                data = response.get_json()
+                self.assertFalse(data['success'])
+                self.assertEqual(data['reason'], 'queue_full')
+                self.assertEqual(self.client.get('/upload_stats').get_json()['rejected']['queue_full'], 1)
+                metrics = self.client.get('/metrics').get_data(as_text=True)
+                if self.webapp.metrics.enabled:
+                    self.assertIn('face_upload_rejected_total{reason="queue_full"} 1', metrics)
+        finally:
+            release.set()
+            holder.join(5)
+
+    def test_request_deadline(self):
+        """X-Request-Timeout bounds how long an upload waits in the queue"""
+        controller = AdmissionController(limit=1, queue_size=4)
+        release = threading.Event()
+        holder, acquired = hold_slot(controller, release)
+        self.assertTrue(acquired.wait(5))
+        try:
+            with patch.object(self.webapp, 'upload_admission', controller), \
+                    patch.object(self.webapp, 'result_cache', self.webapp.ResultCache(max_bytes=0)), \
+                    patch.object(self.webapp, 'detector') as detector:
+                detector.detect.return_value = np.empty((0, 4), dtype=np.int32)
+                response = self.post({'X-Request-Timeout': '0.05'})
+                self.assertEqual(response.status_code, 503)
+                self.assertEqual(response.get_json()['reason'], 'timeout')
+
+                release.set()
+                holder.join(5)
+                response = self.post({'X-Request-Timeout': '5'})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.get_json()['count'], 0)
+        finally:
+            release.set()
+
+
+if __name__ == '__main__':
+    unittest.main()
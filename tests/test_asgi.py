@@ -0,0 +1,197 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Test cases for the ASGI serving mode
+Copyright (c) 2025, Ahmad Fadlilah (https://github.com/ahmadfadlilah)
+"""
+
+import asyncio
+import json
+import os
+import sys
+import threading
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+# Add the src directory to the path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Tests do not need the cascades at import
+os.environ.setdefault('FACE_EAGER_LOAD', '0')
+
+from src.asgi import FaceDetectionASGI, handle_connection, wsgi_environ
+from src.sessions import SessionManager
+
+
+async def call(app, method, path, body=b'', headers=(), chunks=None):
+    """Call an ASGI app and collect (status, headers, body chunks)"""
+    messages = []
+    pending = list(chunks) if chunks is not None else [body]
+
+    async def receive():
+        if pending:
+            return {'type': 'http.request', 'body': pending.pop(0), 'more_body': bool(pending)}
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        messages.append(message)
+
+    path, _, query = path.partition('?')
+    scope = {'type': 'http', 'method': method, 'path': path, 'query_string': query.encode(),
+             'headers': list(headers), 'http_version': '1.1', 'scheme': 'http',
+             'server': ('127.0.0.1', 5000), 'client': ('127.0.0.1', 40000)}
+    await app(scope, receive, send)
+    start = messages[0]
+    return start['status'], dict(start['headers']), [m['body'] for m in messages[1:] if m.get('body')]
+
+
+class TestASGIApp(unittest.TestCase):
+    """Test cases for the ASGI application"""
+
+    def setUp(self):
+        import src.app as webapp
+        self.webapp = webapp
+        self.sessions = SessionManager({'default': 'synthetic'}, webapp.create_session)
+        self.app = FaceDetectionASGI(webapp.app, self.sessions, workers=2)
+
+    def tearDown(self):
+        self.app.shutdown()
+
+    def test_flask_routes_run_in_worker_pool(self):
+        """Routes other than /video_feed are served by the Flask app"""
+        status, headers, body = asyncio.run(call(self.app, 'GET', '/cache_stats'))
+        self.assertEqual(status, 200)
+        self.assertEqual(headers[b'content-type'], b'application/json')
+        self.assertIn('hits', json.loads(b''.join(body)))
+
+        status, _, _ = asyncio.run(call(self.app, 'GET', '/video_feed/unknown'))
+        self.assertEqual(status, 404)
+
+    def test_video_feed_viewers_share_one_encode(self):
+        """All coroutine viewers receive the published frames, which are encoded once, then end on close"""
+        session = self.sessions.get()
+        broadcaster = session.broadcaster
+        encoded = []
+        broadcaster.encoder = lambda frame: encoded.append(1) or bytes([int(frame[0, 0, 0])])
+        broadcaster.open()
+
+        def publish():
+            for value in (1, 2, 3):
+                # Publish the next frame only after the previous one was encoded
+                while broadcaster.viewers < 3 or len(encoded) < value - 1:
+                    threading.Event().wait(0.01)
+                broadcaster.publish(np.full((2, 2, 3), value, dtype=np.uint8))
+                threading.Event().wait(0.2)
+            broadcaster.close()
+
+        async def viewers():
+            publisher = threading.Thread(target=publish)
+            publisher.start()
+            results = await asyncio.gather(*(call(self.app, 'GET', '/video_feed') for _ in range(3)))
+            publisher.join()
+            return results
+
+        results = asyncio.run(viewers())
+        for status, headers, chunks in results:
+            self.assertEqual(status, 200)
+            self.assertTrue(headers[b'content-type'].startswith(b'multipart/x-mixed-replace'))
+            self.assertEqual([chunk[-3:-2] for chunk in chunks], [b'\x01', b'\x02', b'\x03'])
+        self.assertEqual(len(encoded), 3)
+        self.assertEqual(broadcaster.viewers, 0)
+
+    def test_detection_events_are_streamed(self):
+        """/detections/stream is served as a coroutine with the session's detection events"""
+        self.assertEqual(FaceDetectionASGI.stream_route({'method': 'GET', 'path': '/detections/stream/gate'}),
+                         ('detections/stream', 'gate'))
+        self.assertEqual(FaceDetectionASGI.stream_route({'method': 'GET', 'path': '/video_feed'}),
+                         ('video_feed', None))
+        self.assertIsNone(FaceDetectionASGI.stream_route({'method': 'GET', 'path': '/detections'}))
+
+        detections = self.sessions.get().detections
+        detections.open()
+
+        def publish():
+            while detections.viewers < 1:
+                threading.Event().wait(0.01)
+            detections.publish({"frame_id": 1, "count": 0, "faces": []})
+            threading.Event().wait(0.2)
+            detections.close()
+
+        publisher = threading.Thread(target=publish)
+        publisher.start()
+        status, headers, chunks = asyncio.run(call(self.app, 'GET', '/detections/stream'))
+        publisher.join()
+        self.assertEqual(status, 200)
+        self.assertEqual(headers[b'content-type'], b'text/event-stream')
+        self.assertEqual(chunks, [b'retry: 1000\n\n', b'id: 1\ndata: {"frame_id":1,"count":0,"faces":[]}\n\n'])
+
+    def test_wsgi_environ(self):
+        """Headers, query string and body are mapped as in PEP 3333"""
+        scope = {'method': 'POST', 'path': '/upload', 'query_string': b'mode=boxes',
+                 'headers': [(b'content-type', b'image/jpeg'), (b'accept', b'a'), (b'accept', b'b')]}
+        environ = wsgi_environ(scope, b'abc')
+        self.assertEqual(environ['QUERY_STRING'], 'mode=boxes')
+        self.assertEqual(environ['CONTENT_TYPE'], 'image/jpeg')
+        self.assertEqual(environ['CONTENT_LENGTH'], '3')
+        self.assertEqual(environ['HTTP_ACCEPT'], 'a,b')
+        self.assertEqual(environ['wsgi.input'].read(), b'abc')
+
+    def test_request_body_limit(self):
+        """Bodies over MAX_CONTENT_LENGTH are refused before they are buffered"""
+        with patch.dict(self.webapp.app.config, {'MAX_CONTENT_LENGTH': 1024, 'MAX_UPLOAD_MB': 0}):
+            status, _, body = asyncio.run(call(self.app, 'POST', '/upload',
+                                               headers=[(b'content-length', b'1000000000')]))
+            self.assertEqual(status, 413)
+            self.assertFalse(json.loads(b''.join(body))['success'])
+
+            # Without Content-Length the chunks are counted while they arrive
+            status, _, _ = asyncio.run(call(self.app, 'POST', '/upload',
+                                            chunks=[b'x' * 600, b'x' * 600, b'x' * 600]))
+            self.assertEqual(status, 413)
+
+            status, _, _ = asyncio.run(call(self.app, 'POST', '/upload', headers=[(b'content-length', b'abc')]))
+            self.assertEqual(status, 400)
+
+    def test_builtin_server_rejects_large_bodies_without_reading(self):
+        async def request(head):
+            server = await asyncio.start_server(lambda r, w: handle_connection(self.app, r, w), '127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+            async with server:
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+                writer.write(head)
+                response = await asyncio.wait_for(reader.read(), 5)
+                writer.close()
+            return response
+
+        with patch.dict(self.webapp.app.config, {'MAX_CONTENT_LENGTH': 1024}):
+            # The body is never sent: the server must answer from the header alone
+            response = asyncio.run(request(b'POST /upload HTTP/1.1\r\nContent-Length: 1000000000000\r\n\r\n'))
+            self.assertTrue(response.startswith(b'HTTP/1.1 413 '))
+            self.assertFalse(json.loads(response.partition(b'\r\n\r\n')[2])['success'])
+
+            response = asyncio.run(request(b'POST /upload HTTP/1.1\r\nContent-Length: banyak\r\n\r\n'))
+            self.assertTrue(response.startswith(b'HTTP/1.1 400 '))
+
+    def test_builtin_server_round_trip(self):
+        """The built-in asyncio server speaks HTTP/1.1 with chunked streaming responses"""
+        async def round_trip():
+            server = await asyncio.start_server(lambda r, w: handle_connection(self.app, r, w), '127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+            async with server:
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+                writer.write(b'GET /cache_stats HTTP/1.1\r\nHost: x\r\n\r\n')
+                response = await reader.read()
+                writer.close()
+            return response
+
+        response = asyncio.run(round_trip())
+        head, _, body = response.partition(b'\r\n\r\n')
+        self.assertTrue(head.startswith(b'HTTP/1.1 200 OK'))
+        self.assertIn(b'connection: close', head.lower())
+        self.assertIn('hits', json.loads(body))
+
+
+if __name__ == '__main__':
+    unittest.main()
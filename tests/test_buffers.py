@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Test cases for the reusable buffer pool and the allocation-free live loop
+Copyright (c) 2025, Ahmad Fadlilah (https://github.com/ahmadfadlilah)
+"""
+
+import os
+import sys
+import tracemalloc
+import unittest
+
+import cv2
+import numpy as np
+
+# Add the src directory to the path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.buffers import BufferPool
+from src.capture import LatestFrameCapture
+from src.detector import FaceDetector, draw_faces
+from src.scheduler import EnhancedScheduler
+from src.sessions import CameraSession
+from src.sources import SyntheticSource
+from src.tracking import FaceTracker
+
+SAMPLE = os.path.join(os.path.dirname(__file__), '..', 'benchmarks', 'data', 'astronaut.jpg')
+
+
+class TestBufferPool(unittest.TestCase):
+    """Test cases for BufferPool"""
+
+    def test_buffers_are_reused_and_grow(self):
+        """Same name returns the same memory; smaller requests are views, larger ones grow the buffer"""
+        pool = BufferPool()
+        first = pool.get('gray', (40, 60))
+        self.assertIs(pool.get('gray', (40, 60)).base, first.base)
+        self.assertEqual(pool.get('gray', (30, 50)).shape, (30, 50))
+        self.assertEqual(pool.allocations, 1)
+
+        pool.get('gray', (50, 40))
+        self.assertEqual(pool.allocations, 2)
+        self.assertEqual(pool.get('gray', (40, 60)).shape, (40, 60))
+        self.assertEqual(pool.allocations, 2)
+        # Other names, dtypes and channel counts get their own buffers
+        pool.get('gray', (40, 60, 3))
+        pool.get('gray', (40, 60), np.float32)
+        self.assertEqual(pool.allocations, 4)
+
+    def test_large_images_are_not_pooled(self):
+        pool = BufferPool(max_pixels=100)
+        self.assertEqual(pool.get('gray', (20, 20)).shape, (20, 20))
+        self.assertEqual(pool.allocations, 0)
+        self.assertEqual(pool.nbytes, 0)
+
+
+class TestPooledDetection(unittest.TestCase):
+    """Test cases for detection on pooled buffers"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.detector = FaceDetector(max_detection_size=320)
+        if not cls.detector.load():
+            raise unittest.SkipTest("Cascade files are not available")
+        cls.image = cv2.imread(SAMPLE)
+
+    def test_results_match_fresh_preprocessing(self):
+        """Pooled preprocessing yields the same images and faces as fresh arrays"""
+        for profile in ('live-fast', 'live-enhanced', 'upload-accurate'):
+            images = self.detector.prepare(self.image, profile)
+            expected = FaceDetector(profiles=self.detector.profiles).prepare(self.image, profile)
+            self.assertTrue(np.array_equal(images['enhanced'], expected['enhanced']))
+            faces = self.detector.detect(self.image, profile)
+            self.assertTrue(np.array_equal(faces, self.detector.detect(self.image.copy(), profile)))
+
+    def test_smaller_images_reuse_buffers(self):
+        """Regions of varying size (tracker search areas) do not allocate new buffers"""
+        self.detector.detect(self.image, 'live-fast')
+        allocations = self.detector.buffers.allocations
+        for size in (200, 180, 150):
+            self.detector.detect(self.image[:size, :size], 'live-fast')
+        self.assertEqual(self.detector.buffers.allocations, allocations)
+
+
+class TestSteadyStateAllocations(unittest.TestCase):
+    """The live loop allocates (almost) nothing per frame once warmed up"""
+
+    def test_live_loop_steady_state(self):
+        detector = FaceDetector()
+        if not detector.load():
+            self.skipTest("Cascade files are not available")
+        portrait = cv2.resize(cv2.imread(SAMPLE), (240, 240))
+        source = SyntheticSource(size=(640, 480), frames=80, realtime=False, image=portrait)
+        warmup = 20
+        peaks = []
+        state = {}
+
+        def handler(session, tracker, frame):
+            # Peak traced memory over one whole iteration: capture, detection and publishing
+            current, peak = tracemalloc.get_traced_memory()
+            if 'current' in state and session.capture.processed > warmup:
+                peaks.append(peak - state['current'])
+            tracemalloc.reset_peak()
+            state['current'] = current
+            faces = tracker.update(frame)
+            draw_faces(frame, faces)
+            session.publish(frame)
+
+        def tracker_factory():
+            return FaceTracker(detector, scheduler=EnhancedScheduler(detector))
+
+        session = CameraSession('test', 'synthetic', lambda spec: source, tracker_factory, handler)
+        session.camera = source
+        session.running = True
+        tracemalloc.start()
+        try:
+            session.run()
+        finally:
+            tracemalloc.stop()
+
+        self.assertGreater(len(peaks), 40)
+        self.assertIsInstance(session.capture, LatestFrameCapture)
+        # Without reuse every frame allocates a new 900 KB frame plus grayscale copies;
+        # what remains is small bookkeeping (face arrays, timings)
+        self.assertLess(max(peaks), 16 * 1024)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Test cases for the content-addressed upload result cache
+Copyright (c) 2025, Ahmad Fadlilah (https://github.com/ahmadfadlilah)
+"""
+
+import os
+import sys
+import unittest
+
+# Add the src directory to the path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.cache import ResultCache, content_key
+
+
+class FakeClock:
+    """Manually advanced clock for TTL tests"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestResultCache(unittest.TestCase):
+    """Test cases for ResultCache"""
+
+    def test_hit_and_miss_counters(self):
+        """Lookups are counted as hits or misses"""
+        cache = ResultCache(max_bytes=100)
+        self.assertIsNone(cache.get('a'))
+        cache.put('a', b'value', 5)
+        self.assertEqual(cache.get('a'), b'value')
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['bytes']), (1, 1, 5))
+        self.assertEqual(stats['hit_rate'], 0.5)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        """Exceeding the byte bound evicts the least recently used entries first"""
+        cache = ResultCache(max_bytes=10)
+        cache.put('a', 'A', 4)
+        cache.put('b', 'B', 4)
+        cache.get('a')
+        cache.put('c', 'C', 4)
+        self.assertEqual(cache.get('b'), None)
+        self.assertEqual(cache.get('a'), 'A')
+        self.assertEqual(cache.get('c'), 'C')
+        self.assertLessEqual(cache.current_bytes, 10)
+        self.assertEqual(cache.evictions, 1)
+
+    def test_oversized_entries_and_disabled_cache(self):
+        """Entries larger than the bound are not stored, and max_bytes=0 disables the cache"""
+        cache = ResultCache(max_bytes=10)
+        self.assertFalse(cache.put('big', 'X', 11))
+        self.assertEqual(len(cache), 0)
+
+        disabled = ResultCache(max_bytes=0)
+        self.assertFalse(disabled.enabled)
+        self.assertFalse(disabled.put('a', 'A', 1))
+
+    def test_ttl_expiry(self):
+        """Entries older than the TTL are dropped on lookup"""
+        clock = FakeClock()
+        cache = ResultCache(max_bytes=100, ttl=60, clock=clock)
+        cache.put('a', 'A', 1)
+        clock.now = 59
+        self.assertEqual(cache.get('a'), 'A')
+        clock.now = 61
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.current_bytes, 0)
+
+    def test_content_key(self):
+        """Keys depend on the content hash and every extra part"""
+        self.assertEqual(content_key(b'abc', 'p', 'fp'), content_key(b'abc', 'p', 'fp'))
+        self.assertNotEqual(content_key(b'abc', 'p', 'fp'), content_key(b'abd', 'p', 'fp'))
+        self.assertNotEqual(content_key(b'abc', 'p', 'fp'), content_key(b'abc', 'p', 'fp2'))
+
+
+if __name__ == '__main__':
+    unittest.main()
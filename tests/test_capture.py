@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Test cases for the latest-frame camera capture thread
+Copyright (c) 2025, Ahmad Fadlilah (https://github.com/ahmadfadlilah)
+"""
+
+import os
+import sys
+import threading
+import unittest
+
+# Add the src directory to the path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.capture import LatestFrameCapture
+
+
+class FakeCamera:
+    """Camera that yields numbered frames, optionally failing after a fixed count"""
+
+    def __init__(self, limit=None):
+        self.limit = limit
+        self.count = 0
+        self.gate = threading.Semaphore(0)
+
+    def read(self):
+        # Each read waits for the test to release one frame
+        self.gate.acquire()
+        self.count += 1
+        if self.limit is not None and self.count > self.limit:
+            return False, None
+        return True, self.count
+
+    def release_frames(self, count):
+        for _ in range(count):
+            self.gate.release()
+
+
+class TestLatestFrameCapture(unittest.TestCase):
+    """Test cases for LatestFrameCapture"""
+
+    def wait_for_captured(self, capture, count):
+        with capture._condition:
+            capture._condition.wait_for(lambda: capture.captured >= count or not capture.running, 2)
+
+    def test_stale_frames_are_dropped(self):
+        """A slow consumer always receives the newest frame and stale frames are counted as dropped"""
+        camera = FakeCamera()
+        capture = LatestFrameCapture(camera).start()
+        try:
+            camera.release_frames(5)
+            self.wait_for_captured(capture, 5)
+            self.assertEqual(capture.read(timeout=1), 5)
+
+            camera.release_frames(1)
+            self.assertEqual(capture.read(timeout=1), 6)
+
+            stats = capture.stats()
+            self.assertEqual((stats['captured'], stats['processed'], stats['dropped']), (6, 2, 4))
+        finally:
+            camera.release_frames(1)
+            capture.stop()
+
+    def test_read_times_out_without_new_frame(self):
+        """A frame is handed out only once; later reads wait for a newer one"""
+        camera = FakeCamera()
+        capture = LatestFrameCapture(camera).start()
+        try:
+            camera.release_frames(1)
+            self.assertEqual(capture.read(timeout=1), 1)
+            self.assertIsNone(capture.read(timeout=0.05))
+        finally:
+            camera.release_frames(1)
+            capture.stop()
+
+    def test_camera_failure_stops_capture(self):
+        """A failed camera read ends the capture after the pending frame is delivered"""
+        camera = FakeCamera(limit=1)
+        capture = LatestFrameCapture(camera).start()
+        camera.release_frames(2)
+        self.wait_for_captured(capture, 2)
+        capture._thread.join(2)
+
+        self.assertEqual(capture.read(timeout=1), 1)
+        self.assertIsNone(capture.read(timeout=1))
+        self.assertTrue(capture.failed)
+        self.assertFalse(capture.running)
+        capture.stop()
+
+    def test_lossless_source_delivers_every_frame(self):
+        """A source that is not live waits for each frame to be taken instead of dropping it"""
+        camera = FakeCamera(limit=5)
+        camera.live = False
+        capture = LatestFrameCapture(camera).start()
+        self.assertTrue(capture.lossless)
+        camera.release_frames(6)
+
+        frames = []
+        while True:
+            frame = capture.read(timeout=1)
+            if frame is None:
+                break
+            frames.append(frame)
+
+        self.assertEqual(frames, [1, 2, 3, 4, 5])
+        stats = capture.stats()
+        self.assertEqual((stats['captured'], stats['processed'], stats['dropped']), (5, 5, 0))
+        self.assertTrue(capture.failed)
+        capture.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
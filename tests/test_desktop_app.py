@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Test cases for the desktop launcher's background helpers (no display needed)
+Copyright (c) 2025, Ahmad Fadlilah (https://github.com/ahmadfadlilah)
+"""
+
+import json
+import os
+import queue
+import subprocess
+import sys
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add the src directory to the path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+try:
+    from src.desktop_app import check_ready, pump_output, wait_until_ready
+except ImportError:  # tkinter is not installed
+    check_ready = pump_output = wait_until_ready = None
+
+
+def start_health_server(responses):
+    """Serve /healthz answers from `responses` (status, body), repeating the last one"""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            status, body = responses.pop(0) if len(responses) > 1 else responses[0]
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}/healthz'
+
+
+def sleeper():
+    return subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)'])
+
+
+@unittest.skipIf(pump_output is None, "tkinter is not available")
+class TestDesktopLauncher(unittest.TestCase):
+    """Test cases for output draining and readiness polling"""
+
+    def test_output_is_drained_without_blocking(self):
+        """A chatty server writing more than a pipe buffer to both streams runs to completion"""
+        code = ("import sys\n"
+                "for i in range(5000):\n"
+                "    print('baris', i, 'x' * 60)\n"
+                "    print('error', i, file=sys.stderr)\n")
+        process = subprocess.Popen([sys.executable, '-c', code], stdout=subprocess.PIPE,
+                                   stderr=subprocess.STDOUT, text=True)
+        events = queue.Queue()
+        reader = threading.Thread(target=pump_output, args=(process, events), daemon=True)
+        reader.start()
+        reader.join(30)
+        self.assertFalse(reader.is_alive())
+
+        items = [events.get_nowait() for _ in range(events.qsize())]
+        lines = [payload for kind, _, payload in items if kind == 'log']
+        self.assertEqual(len(lines), 10000)
+        self.assertEqual(items[-1], ('exited', process, 0))
+
+    def test_ready_as_soon_as_healthz_reports_ready(self):
+        server, url = start_health_server([(503, {'ready': False}), (503, {'ready': False}),
+                                           (200, {'ready': True, 'status': 'ok'})])
+        self.addCleanup(server.shutdown)
+        process = sleeper()
+        self.addCleanup(process.kill)
+
+        events = queue.Queue()
+        wait_until_ready(process, events, url=url, timeout=10, interval=0.01)
+        kind, source, data = events.get_nowait()
+        self.assertEqual((kind, source), ('ready', process))
+        self.assertEqual(data['status'], 'ok')
+
+    def test_timeout_and_exit(self):
+        server, url = start_health_server([(503, {'ready': False})])
+        self.addCleanup(server.shutdown)
+        self.assertIsNone(check_ready(url))
+
+        process = sleeper()
+        self.addCleanup(process.kill)
+        events = queue.Queue()
+        wait_until_ready(process, events, url=url, timeout=0.05, interval=0.01)
+        self.assertEqual(events.get_nowait(), ('timeout', process, 0.05))
+
+        # A server that exits before becoming ready is reported by pump_output, not the poller
+        process.kill()
+        process.wait()
+        wait_until_ready(process, events, url=url, timeout=10, interval=0.01)
+        self.assertTrue(events.empty())
+
+
+if __name__ == '__main__':
+    unittest.main()
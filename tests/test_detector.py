@@ -0,0 +1,197 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Test cases for the shared FaceDetector pipeline
+Copyright (c) 2025, Ahmad Fadlilah (https://github.com/ahmadfadlilah)
+"""
+
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock
+import numpy as np
+
+# Add the src directory to the path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import cv2
+
+from src.detector import FaceDetector, live_profile
+
+
+def mock_cascade(faces):
+    """Create a cascade mock whose detectMultiScale returns a copy of faces"""
+    cascade = MagicMock()
+    cascade.detectMultiScale.side_effect = lambda *args, **kwargs: np.array(faces, dtype=np.int32).reshape(-1, 4)
+    return cascade
+
+
+class TestFaceDetector(unittest.TestCase):
+    """Test cases for FaceDetector"""
+
+    def setUp(self):
+        self.image = np.random.default_rng(0).integers(0, 255, size=(120, 160, 3), dtype=np.uint8)
+
+    def test_live_fast_uses_default_cascade_only(self):
+        """The live-fast profile runs a single pass with the default cascade"""
+        cascades = {name: mock_cascade([]) for name in ('default', 'alt', 'alt2', 'profile')}
+        cascades['default'] = mock_cascade([[10, 10, 50, 50]])
+        detector = FaceDetector(cascades=cascades)
+
+        faces = detector.detect(self.image, profile='live-fast')
+
+        self.assertEqual(faces.tolist(), [[10, 10, 50, 50]])
+        self.assertEqual(cascades['default'].detectMultiScale.call_count, 1)
+        cascades['alt'].detectMultiScale.assert_not_called()
+        cascades['profile'].detectMultiScale.assert_not_called()
+
+    def test_fallback_stages_only_run_without_faces(self):
+        """Later stages run only when earlier stages found nothing"""
+        cascades = {name: mock_cascade([]) for name in ('default', 'alt', 'alt2', 'profile')}
+        detector = FaceDetector(cascades=cascades)
+
+        faces = detector.detect(self.image, profile='upload-accurate')
+
+        self.assertEqual(faces.shape, (0, 4))
+        # Five passes in the first stage plus the normalized and gray fallbacks
+        self.assertEqual(cascades['default'].detectMultiScale.call_count, 3)
+        self.assertEqual(cascades['profile'].detectMultiScale.call_count, 2)
+
+        cascades['alt'] = mock_cascade([[10, 10, 40, 40]])
+        detector = FaceDetector(cascades=cascades)
+        cascades['default'].detectMultiScale.reset_mock()
+        detector.detect(self.image, profile='upload-accurate')
+        self.assertEqual(cascades['default'].detectMultiScale.call_count, 1)
+
+    def test_flipped_profile_is_mapped_back(self):
+        """Faces found on the flipped image are converted to original coordinates"""
+        cascades = {'default': mock_cascade([]), 'profile': mock_cascade([[10, 20, 30, 30]])}
+        detector = FaceDetector(cascades=cascades)
+        detector.profiles = {'flip-only': {'preprocess': [], 'stages': [[
+            {'cascade': 'profile', 'flip': True, 'params': {}},
+        ]]}}
+
+        faces = detector.detect(self.image, profile='flip-only')
+
+        self.assertEqual(faces.tolist(), [[160 - 10 - 30, 20, 30, 30]])
+
+    def test_missing_cascades_are_skipped(self):
+        """Passes whose cascade is not loaded are skipped"""
+        detector = FaceDetector(cascades={'default': mock_cascade([[5, 5, 40, 40]])})
+        faces = detector.detect(self.image, profile='live-enhanced')
+        self.assertEqual(len(faces), 1)
+
+    def test_detect_many(self):
+        """detect_many returns one box array per input image"""
+        detector = FaceDetector(cascades={'default': mock_cascade([[5, 5, 40, 40]])})
+        results = detector.detect_many([self.image, self.image[:, :, 0]], profile='live-fast')
+        self.assertEqual(len(results), 2)
+        for faces in results:
+            self.assertEqual(faces.tolist(), [[5, 5, 40, 40]])
+
+    def test_stage_observer_reports_each_step(self):
+        """The stage observer sees preprocessing, every cascade pass and the merge step"""
+        observed = []
+        cascades = {name: mock_cascade([[10, 10, 40, 40]]) for name in ('default', 'alt', 'alt2', 'profile')}
+        detector = FaceDetector(cascades=cascades,
+                                stage_observer=lambda profile, stage, seconds: observed.append((profile, stage)))
+
+        detector.detect(self.image, profile='live-enhanced')
+
+        self.assertEqual(observed, [
+            ('live-enhanced', 'cvtColor'),
+            ('live-enhanced', 'equalizeHist'),
+            ('live-enhanced', 'clahe'),
+            ('live-enhanced', 'bilateral'),
+            ('live-enhanced', 'detectMultiScale:default:enhanced'),
+            ('live-enhanced', 'detectMultiScale:alt:enhanced'),
+            ('live-enhanced', 'detectMultiScale:alt2:enhanced'),
+            ('live-enhanced', 'merge_faces'),
+        ])
+
+    def test_fingerprint_tracks_configuration(self):
+        """The fingerprint changes when profile parameters or cascades change"""
+        detector = FaceDetector(cascades={'default': mock_cascade([])})
+        before = detector.fingerprint('live-fast')
+        self.assertEqual(detector.fingerprint('live-fast'), before)
+        self.assertNotEqual(detector.fingerprint('upload-accurate'), before)
+
+        detector.profiles['live-fast'] = {'preprocess': [], 'stages': [[
+            {'cascade': 'default', 'params': {'scaleFactor': 1.2}},
+        ]]}
+        changed = detector.fingerprint('live-fast')
+        self.assertNotEqual(changed, before)
+
+        detector.cascades['default'] = mock_cascade([])
+        self.assertNotEqual(detector.fingerprint('live-fast'), changed)
+
+    def test_max_detection_size_maps_boxes_back(self):
+        """Large images are detected on a downscaled copy and boxes are returned in original coordinates"""
+        cascade = mock_cascade([[10, 20, 30, 40]])
+        detector = FaceDetector(cascades={'default': cascade}, max_detection_size=100)
+        image = np.zeros((300, 400, 3), dtype=np.uint8)
+
+        faces = detector.detect(image, profile='live-fast')
+
+        source = cascade.detectMultiScale.call_args[0][0]
+        self.assertEqual(source.shape, (75, 100))
+        self.assertEqual(faces.tolist(), [[40, 80, 120, 160]])
+        self.assertEqual(faces.dtype, np.int32)
+
+        # Images already within the limit are untouched
+        cascade.detectMultiScale.reset_mock()
+        detector.detect(image[:60, :80], profile='live-fast')
+        self.assertEqual(cascade.detectMultiScale.call_args[0][0].shape, (60, 80))
+
+    def test_max_detection_size_keeps_recall(self):
+        """A capped run finds the same face as the full-resolution run"""
+        sample = cv2.imread(os.path.join(os.path.dirname(__file__), '..', 'benchmarks', 'data', 'astronaut.jpg'))
+        sample = cv2.resize(sample, (768, 768), interpolation=cv2.INTER_CUBIC)
+
+        full = FaceDetector(cascade_dir=cv2.data.haarcascades)
+        capped = FaceDetector(cascade_dir=cv2.data.haarcascades, max_detection_size=256)
+        self.assertTrue(full.load(download=False))
+        self.assertTrue(capped.load(download=False))
+
+        expected = full.detect(sample, profile='live-fast')
+        faces = capped.detect(sample, profile='live-fast')
+        self.assertEqual(len(faces), len(expected))
+        self.assertGreater(len(faces), 0)
+        # The cascade pyramid quantizes box sizes, so compare by overlap instead of exact coordinates
+        (x1, y1, w1, h1), (x2, y2, w2, h2) = faces[0], expected[0]
+        overlap = max(0, min(x1 + w1, x2 + w2) - max(x1, x2)) * max(0, min(y1 + h1, y2 + h2) - max(y1, y2))
+        self.assertGreater(overlap / (w1 * h1 + w2 * h2 - overlap), 0.5)
+
+    def test_live_profile_interval(self):
+        """Every tenth frame uses the enhanced live profile"""
+        self.assertEqual(live_profile(10), 'live-enhanced')
+        self.assertEqual(live_profile(11), 'live-fast')
+
+    def test_parallel_ensemble_matches_sequential(self):
+        """Running stage passes on a thread pool gives the same boxes in the same order"""
+        sample = cv2.imread(os.path.join(os.path.dirname(__file__), '..', 'benchmarks', 'data', 'astronaut.jpg'))
+        sample = cv2.resize(sample, (256, 256), interpolation=cv2.INTER_AREA)
+
+        sequential = FaceDetector(cascade_dir=cv2.data.haarcascades)
+        parallel = FaceDetector(cascade_dir=cv2.data.haarcascades, max_workers=4)
+        self.assertTrue(sequential.load(download=False))
+        self.assertTrue(parallel.load(download=False))
+        try:
+            expected = sequential.detect(sample)
+            self.assertGreater(len(expected), 0)
+            for _ in range(3):
+                np.testing.assert_array_equal(parallel.detect(sample), expected)
+        finally:
+            parallel.close()
+
+    def test_load_real_cascades(self):
+        """Real cascades bundled with OpenCV load and run without errors"""
+        detector = FaceDetector(cascade_dir=cv2.data.haarcascades)
+        self.assertTrue(detector.load(download=False))
+        self.assertEqual(set(detector.cascades), {'default', 'alt', 'alt2', 'profile'})
+        faces = detector.detect(self.image)
+        self.assertEqual(faces.shape[1] if len(faces) else 4, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
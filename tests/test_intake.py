@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Test cases for the memory-bounded upload intake
+Copyright (c) 2025, Ahmad Fadlilah (https://github.com/ahmadfadlilah)
+"""
+
+import os
+import sys
+import unittest
+from io import BytesIO
+from unittest.mock import patch
+
+import cv2
+import numpy as np
+
+# Add the src directory to the path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+os.environ.setdefault('FACE_EAGER_LOAD', '0')
+
+from src.detector import FaceDetector
+from src.intake import (ImageTooLarge, decode_for_detection, decode_frame, image_size, reduction_factor,
+                        scale_faces)
+
+SAMPLE = os.path.join(os.path.dirname(__file__), '..', 'benchmarks', 'data', 'astronaut.jpg')
+
+
+def iou(a, b):
+    x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+    x2, y2 = min(a[0] + a[2], b[0] + b[2]), min(a[1] + a[3], b[1] + b[3])
+    inter = max(0, x2 - x1) * max(0, y2 - y1)
+    return inter / float(a[2] * a[3] + b[2] * b[3] - inter)
+
+
+def encode(image, extension='.jpg'):
+    return cv2.imencode(extension, image)[1].tobytes()
+
+
+class TestImageSize(unittest.TestCase):
+    """Test cases for reading the image size from the header"""
+
+    def test_png_and_jpeg_headers(self):
+        image = np.zeros((30, 70, 3), dtype=np.uint8)
+        self.assertEqual(image_size(encode(image, '.png')), (70, 30))
+        self.assertEqual(image_size(encode(image, '.jpg')), (70, 30))
+
+    def test_webp_bmp_and_tiff_headers(self):
+        image = np.zeros((30, 70, 3), dtype=np.uint8)
+        self.assertEqual(image_size(encode(image, '.bmp')), (70, 30))
+        self.assertEqual(image_size(encode(image, '.tiff')), (70, 30))
+        self.assertEqual(image_size(encode(image, '.webp')), (70, 30))
+        lossless = cv2.imencode('.webp', image, [cv2.IMWRITE_WEBP_QUALITY, 101])[1].tobytes()
+        self.assertEqual(lossless[12:16], b'VP8L')
+        self.assertEqual(image_size(lossless), (70, 30))
+        # Extended WebP stores the canvas size minus one in 24 bits
+        extended = b'RIFF\x00\x00\x00\x00WEBPVP8X' + bytes(8) + (9999).to_bytes(3, 'little') + (4999).to_bytes(3, 'little')
+        self.assertEqual(image_size(extended), (10000, 5000))
+
+    def test_unknown_or_truncated_data(self):
+        self.assertIsNone(image_size(b'not an image'))
+        self.assertIsNone(image_size(encode(np.zeros((30, 70, 3), dtype=np.uint8), '.ppm')))
+        self.assertIsNone(image_size(b'\xff\xd8\xff\xe0\x00'))
+        self.assertIsNone(image_size(b'BM\x00\x00'))
+        self.assertIsNone(image_size(b'II*\x00\x08\x00'))
+
+    def test_reduction_factor_keeps_detection_resolution(self):
+        """The decoder never shrinks the longest side below the detection size"""
+        self.assertEqual(reduction_factor((8000, 6000), 1280), 4)
+        self.assertEqual(reduction_factor((4000, 3000), 1280), 2)
+        self.assertEqual(reduction_factor((1000, 800), 1280), 1)
+        self.assertEqual(reduction_factor((8000, 6000), 0), 1)
+        self.assertEqual(reduction_factor(None, 1280), 1)
+
+
+class TestDecodeForDetection(unittest.TestCase):
+    """Test cases for the reduced grayscale decode"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.large = cv2.resize(cv2.imread(SAMPLE), (3072, 3072), interpolation=cv2.INTER_CUBIC)
+        cls.data = encode(cls.large)
+
+    def test_reduced_decode_and_scale(self):
+        gray, scale_x, scale_y = decode_for_detection(self.data, min_side=1280)
+        self.assertEqual(gray.shape, (1536, 1536))
+        self.assertEqual((scale_x, scale_y), (2.0, 2.0))
+
+        faces = np.array([[10, 20, 30, 40]], dtype=np.int32)
+        self.assertEqual(scale_faces(faces, scale_x, scale_y).tolist(), [[20, 40, 60, 80]])
+
+    def test_pixel_limit_rejects_before_decoding(self):
+        with patch('src.intake.cv2.imdecode') as mock_imdecode:
+            with self.assertRaises(ImageTooLarge):
+                decode_for_detection(self.data, min_side=1280, max_pixels=3_000_000)
+            for extension in ('.webp', '.bmp', '.tiff'):
+                with self.assertRaises(ImageTooLarge):
+                    decode_for_detection(encode(np.zeros((100, 100, 3), dtype=np.uint8), extension), max_pixels=5000)
+            mock_imdecode.assert_not_called()
+
+        # Formats without a parsed header are checked after decoding
+        with self.assertRaises(ImageTooLarge):
+            decode_for_detection(encode(np.zeros((100, 100, 3), dtype=np.uint8), '.ppm'), max_pixels=5000)
+
+    def test_undecodable_data(self):
+        self.assertEqual(decode_for_detection(b'not an image'), (None, None, None))
+
+    def test_unreduced_decode_matches_color_conversion(self):
+        """Images that need no reduction are converted exactly as before, so their results do not change"""
+        with open(SAMPLE, 'rb') as f:
+            data = f.read()
+        gray, scale_x, scale_y = decode_for_detection(data, min_side=1280)
+        color = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+        np.testing.assert_array_equal(gray, cv2.cvtColor(color, cv2.COLOR_BGR2GRAY))
+        self.assertEqual((scale_x, scale_y), (1.0, 1.0))
+
+        detector = FaceDetector(max_detection_size=1280)
+        if not detector.load():
+            self.skipTest("Cascade files are not available")
+        # Boxes returned by /upload before the lean intake
+        baseline = [[327, 4, 124, 124], [173, 64, 101, 101], [282, 22, 82, 82]]
+        self.assertEqual(detector.detect(gray, 'upload-accurate').tolist(), baseline)
+        self.assertEqual(detector.detect(color, 'upload-accurate').tolist(), baseline)
+
+    def test_faces_match_full_resolution_detection(self):
+        """Lean intake still finds the sample face, like decoding the full color image"""
+        detector = FaceDetector(max_detection_size=1280)
+        if not detector.load():
+            self.skipTest("Cascade files are not available")
+        gray, scale_x, scale_y = decode_for_detection(self.data, min_side=1280)
+        lean = scale_faces(detector.detect(gray, 'upload-accurate'), scale_x, scale_y)
+        full = detector.detect(cv2.imdecode(np.frombuffer(self.data, np.uint8), cv2.IMREAD_COLOR), 'upload-accurate')
+        # Face of the sample image (176, 65, 96, 96 at 512 px) scaled to 3072 px
+        truth = np.array([176, 65, 96, 96]) * 6
+        for faces in (lean, full):
+            self.assertGreaterEqual(max(iou(box, truth) for box in faces), 0.5)
+
+
+class TestDecodeFrame(unittest.TestCase):
+    """Test cases for client-pushed frames"""
+
+    def test_raw_frames_are_not_copied(self):
+        data = bytes(range(48)) * 2
+        frame, scale_x, scale_y = decode_frame(data, width=8, height=4)
+        self.assertEqual((frame.shape, scale_x, scale_y), ((4, 8, 3), 1.0, 1.0))
+        self.assertFalse(frame.flags.owndata)
+        self.assertEqual(decode_frame(data[:32], width=8, height=4)[0].shape, (4, 8))
+
+    def test_invalid_raw_frames(self):
+        with self.assertRaises(ValueError):
+            decode_frame(b'\0' * 10, width=8, height=4)
+        with self.assertRaises(ValueError):
+            decode_frame(b'\0' * 32, width=8)
+        with self.assertRaises(ImageTooLarge):
+            decode_frame(b'\0' * 32, width=8, height=4, max_pixels=16)
+
+
+class TestUploadLimits(unittest.TestCase):
+    """Test cases for the upload size and pixel limits in the web app"""
+
+    def setUp(self):
+        from src.app import app
+        self.app = app
+        self.client = app.test_client()
+
+    def post(self, data, name='a.png'):
+        return self.client.post('/upload?mode=boxes', data={'file': (BytesIO(data), name)},
+                                content_type='multipart/form-data')
+
+    def test_too_many_pixels(self):
+        data = encode(np.zeros((100, 100, 3), dtype=np.uint8), '.png')
+        with patch.dict(self.app.config, MAX_UPLOAD_PIXELS=5000), patch('src.app.detector') as detector:
+            response = self.post(data)
+        self.assertEqual(response.status_code, 413)
+        self.assertFalse(response.get_json()['success'])
+        detector.detect.assert_not_called()
+
+    def test_request_body_too_large(self):
+        with patch.dict(self.app.config, MAX_CONTENT_LENGTH=1024, MAX_UPLOAD_MB=0):
+            response = self.post(b'\0' * 4096)
+        self.assertEqual(response.status_code, 413)
+        self.assertFalse(response.get_json()['success'])
+
+
+if __name__ == '__main__':
+    unittest.main()
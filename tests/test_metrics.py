@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Test cases for the Prometheus text-format metrics registry
+Copyright (c) 2025, Ahmad Fadlilah (https://github.com/ahmadfadlilah)
+"""
+
+import os
+import sys
+import unittest
+
+# Add the src directory to the path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.metrics import MetricsRegistry
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    """Test cases for MetricsRegistry"""
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Bucket lines are cumulative and end with +Inf, _sum and _count"""
+        registry = MetricsRegistry()
+        histogram = registry.histogram('stage_seconds', 'Stage latency', ('stage',), buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 3.0):
+            histogram.observe(value, stage='clahe')
+
+        lines = registry.render().splitlines()
+        self.assertIn('# TYPE stage_seconds histogram', lines)
+        self.assertIn('stage_seconds_bucket{stage="clahe",le="0.1"} 1', lines)
+        self.assertIn('stage_seconds_bucket{stage="clahe",le="1"} 3', lines)
+        self.assertIn('stage_seconds_bucket{stage="clahe",le="+Inf"} 4', lines)
+        self.assertIn('stage_seconds_sum{stage="clahe"} 4.05', lines)
+        self.assertIn('stage_seconds_count{stage="clahe"} 4', lines)
+        self.assertEqual(histogram.count(stage='clahe'), 4)
+
+    def test_counter_gauge_and_label_escaping(self):
+        """Counters accumulate, gauges are overwritten and label values are escaped"""
+        registry = MetricsRegistry()
+        counter = registry.counter('requests_total', 'Requests', ('path',))
+        gauge = registry.gauge('live_fps', 'Live FPS')
+        counter.inc(path='/upload')
+        counter.inc(2, path='/upload')
+        counter.inc(path='a"b')
+        gauge.set(12.5)
+        gauge.set(14)
+
+        text = registry.render()
+        self.assertIn('requests_total{path="/upload"} 3\n', text)
+        self.assertIn('requests_total{path="a\\"b"} 1\n', text)
+        self.assertIn('live_fps 14\n', text)
+
+        with self.assertRaises(ValueError):
+            counter.inc(method='GET')
+        with self.assertRaises(ValueError):
+            registry.gauge('live_fps', 'Duplicate')
+
+    def test_callback_metrics_are_read_at_render_time(self):
+        """Callback metrics read the current value and omit the sample when it is None"""
+        state = {'dropped': None}
+        registry = MetricsRegistry()
+        registry.callback('frames_dropped_total', 'Dropped frames', lambda: state['dropped'], 'counter')
+
+        self.assertFalse(any(line.startswith('frames_dropped_total') for line in registry.render().splitlines()))
+        state['dropped'] = 7
+        text = registry.render()
+        self.assertIn('# TYPE frames_dropped_total counter', text)
+        self.assertIn('frames_dropped_total 7\n', text)
+
+    def test_labelled_callback_metrics(self):
+        """A labelled callback returns one value per label, skipping None"""
+        state = {'lobby': 3, 'gate': None}
+        registry = MetricsRegistry()
+        registry.callback('live_viewers', 'Viewers', lambda: dict(state), labelnames=('camera',))
+
+        text = registry.render()
+        self.assertIn('live_viewers{camera="lobby"} 3\n', text)
+        self.assertNotIn('camera="gate"', text)
+
+    def test_time_records_duration_only_when_enabled(self):
+        """The timing context manager is a no-op on a disabled registry"""
+        registry = MetricsRegistry()
+        histogram = registry.histogram('block_seconds', 'Block latency')
+        with registry.time(histogram):
+            pass
+        self.assertEqual(histogram.count(), 1)
+
+        registry.enabled = False
+        with registry.time(histogram):
+            pass
+        self.assertEqual(histogram.count(), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Test cases for the shared Non-Maximum Suppression module
+Copyright (c) 2025, Ahmad Fadlilah (https://github.com/ahmadfadlilah)
+"""
+
+import os
+import sys
+import unittest
+import numpy as np
+
+# Add the src directory to the path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.nms import merge_faces, merge_faces_reference, non_max_suppression
+
+
+def random_faces(rng, count, image_size=640):
+    """Generate clustered [x, y, w, h] boxes similar to multi-cascade output"""
+    centers = rng.integers(0, image_size, size=(max(1, count // 6), 2))
+    picks = centers[rng.integers(0, len(centers), size=count)]
+    sizes = rng.integers(20, 120, size=count)
+    jitter = rng.integers(-10, 11, size=(count, 2))
+    xy = np.clip(picks + jitter - sizes[:, None] // 2, 0, image_size)
+    return np.column_stack([xy, sizes, sizes + rng.integers(-5, 6, size=count)]).astype(np.int32)
+
+
+class TestNonMaxSuppression(unittest.TestCase):
+    """Test cases for the vectorized merge_faces"""
+
+    def test_matches_reference_on_random_boxes(self):
+        """Vectorized NMS returns exactly the same boxes as the old loop"""
+        rng = np.random.default_rng(42)
+        for count in (1, 2, 5, 10, 57, 300, 1000):
+            faces_list = [random_faces(rng, count // 3 + 1) for _ in range(3)]
+            expected = merge_faces_reference(faces_list)
+            result = merge_faces(faces_list)
+            np.testing.assert_array_equal(result, expected)
+            self.assertEqual(result.dtype, expected.dtype)
+
+    def test_matches_reference_with_equal_areas(self):
+        """Ties in area keep the same processing order as the old loop"""
+        faces = np.array([[0, 0, 50, 50], [10, 10, 50, 50], [200, 200, 50, 50],
+                          [205, 195, 50, 50], [400, 0, 50, 50]], dtype=np.int32)
+        np.testing.assert_array_equal(merge_faces([faces]), merge_faces_reference([faces]))
+
+    def test_blocked_sweep_matches_reference(self):
+        """Inputs larger than one sweep block give the same result"""
+        rng = np.random.default_rng(7)
+        faces = random_faces(rng, 2000, image_size=4000)
+        np.testing.assert_array_equal(merge_faces([faces]), merge_faces_reference([faces]))
+
+    def test_duplicate_is_removed(self):
+        """A box overlapping a larger one by more than 0.3 IoU is dropped"""
+        face1 = np.array([[10, 10, 50, 50]])
+        face2 = np.array([[60, 60, 50, 50]])
+        face3 = np.array([[12, 12, 48, 48]])
+        result = merge_faces([face1, face2, face3])
+        self.assertEqual(len(result), 2)
+        self.assertNotIn([12, 12, 48, 48], result.tolist())
+
+    def test_empty_inputs(self):
+        """Empty input lists and empty arrays return an empty array"""
+        self.assertEqual(len(merge_faces([])), 0)
+        self.assertEqual(len(merge_faces([np.empty((0, 4), dtype=np.int32)])), 0)
+        self.assertEqual(len(non_max_suppression(np.empty((0, 4)))), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
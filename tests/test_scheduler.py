@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Test cases for the frame-budget driven enhanced detection scheduler
+Copyright (c) 2025, Ahmad Fadlilah (https://github.com/ahmadfadlilah)
+"""
+
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock
+import numpy as np
+
+# Add the src directory to the path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.detector import FaceDetector
+from src.scheduler import EnhancedScheduler
+
+NO_FACES = np.empty((0, 4), dtype=np.int32)
+
+
+class FakeClock:
+    """Clock advanced by the fake detector instead of real time"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeDetector:
+    """Detector whose passes cost a fixed, simulated amount of time"""
+
+    def __init__(self, clock, stages, prepare_cost=0.005):
+        self.clock = clock
+        self.prepare_cost = prepare_cost
+        self.profiles = {'enhanced': {'preprocess': [], 'stages': stages}}
+        self.passes = []
+
+    def downscale(self, image):
+        return image, None, None
+
+    def prepare(self, image, profile=None):
+        self.clock.now += self.prepare_cost
+        return {}
+
+    def run_pass(self, images, detection_pass, profile=None):
+        self.clock.now += detection_pass['cost']
+        self.passes.append(detection_pass['name'])
+        return detection_pass.get('faces', NO_FACES)
+
+
+def make_pass(name, cost=0.010, faces=NO_FACES):
+    return {'name': name, 'cost': cost, 'faces': faces}
+
+
+class TestEnhancedScheduler(unittest.TestCase):
+    """Test cases for EnhancedScheduler"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def make_scheduler(self, stages, **kwargs):
+        detector = FakeDetector(self.clock, stages)
+        scheduler = EnhancedScheduler(detector, profile='enhanced', clock=self.clock, smoothing=1.0, **kwargs)
+        return scheduler, detector
+
+    def run_frames(self, scheduler, count, base_cost=0.020):
+        """Simulate frames whose normal work costs base_cost; returns the passes run per frame"""
+        per_frame = []
+        for _ in range(count):
+            self.clock.now += base_cost
+            scheduler.observe_frame(base_cost)
+            before = len(scheduler.detector.passes)
+            scheduler.run(None, NO_FACES)
+            per_frame.append(scheduler.detector.passes[before:])
+        return per_frame
+
+    def test_interval_follows_measured_budget(self):
+        """The interval is the smallest that keeps the average frame time within the budget"""
+        stages = [[make_pass('a'), make_pass('b'), make_pass('c')]]
+        scheduler, _ = self.make_scheduler(stages, target_fps=25, spread=False)
+
+        self.run_frames(scheduler, 10)
+
+        # Budget 40 ms, base 20 ms: a 35 ms cycle fits once every 2 frames
+        self.assertEqual(scheduler.interval, 2)
+        stats = scheduler.stats()
+        self.assertEqual(stats['budget_ms'], 40.0)
+        self.assertEqual(stats['cycle_ms'], 35.0)
+        self.assertEqual(stats['pass_ms'], {'0.0': 10.0, '0.1': 10.0, '0.2': 10.0})
+
+    def test_over_budget_uses_max_interval(self):
+        """When normal frames already exceed the budget the enhanced cycle runs as rarely as allowed"""
+        scheduler, _ = self.make_scheduler([[make_pass('a')]], target_fps=100, max_interval=30)
+        self.run_frames(scheduler, 10)
+        self.assertEqual(scheduler.interval, 30)
+
+    def test_spread_splits_cycle_across_frames(self):
+        """With spreading, each frame only runs the passes that fit in its remaining budget"""
+        stages = [[make_pass('a'), make_pass('b'), make_pass('c')]]
+        scheduler, _ = self.make_scheduler(stages, target_fps=25, spread=True)
+
+        per_frame = [passes for passes in self.run_frames(scheduler, 40) if passes]
+
+        # After the first measurements every frame runs one pass (5 ms prepare + 10 ms pass <= 20 ms slack)
+        self.assertTrue(all(len(passes) == 1 for passes in per_frame[3:]))
+        self.assertGreater(scheduler.cycles, 3)
+
+    def test_without_spread_cycle_runs_in_one_frame(self):
+        """Without spreading a whole stage runs in a single frame, like the fixed interval"""
+        stages = [[make_pass('a'), make_pass('b'), make_pass('c')]]
+        scheduler, _ = self.make_scheduler(stages, target_fps=25, spread=False)
+        per_frame = [passes for passes in self.run_frames(scheduler, 30) if passes]
+        self.assertTrue(all(passes == ['a', 'b', 'c'] for passes in per_frame))
+
+    def test_fallback_stage_only_without_faces(self):
+        """Later stages run only when the earlier stage of the same cycle found nothing"""
+        face = np.array([[10, 10, 40, 40]], dtype=np.int32)
+        stages = [[make_pass('a')], [make_pass('profile')]]
+
+        scheduler, detector = self.make_scheduler(stages, target_fps=25, spread=False)
+        self.run_frames(scheduler, 30)
+        self.assertIn('profile', detector.passes)
+
+        stages = [[make_pass('a', faces=face)], [make_pass('profile')]]
+        scheduler, detector = self.make_scheduler(stages, target_fps=25, spread=False)
+        per_frame = self.run_frames(scheduler, 30)
+        self.assertNotIn('profile', detector.passes)
+        self.assertIn(['a'], per_frame)
+
+    def test_found_faces_are_merged_into_frame_result(self):
+        """Faces from enhanced passes are returned together with the normal detections"""
+        extra = np.array([[300, 200, 60, 60]], dtype=np.int32)
+        scheduler, _ = self.make_scheduler([[make_pass('a', faces=extra)]], target_fps=25, min_interval=1)
+        scheduler.interval = 1
+        normal = np.array([[10, 10, 50, 50]], dtype=np.int32)
+
+        faces = scheduler.run(None, normal)
+
+        self.assertEqual(sorted(faces.tolist()), [[10, 10, 50, 50], [300, 200, 60, 60]])
+
+    def test_enhanced_passes_respect_max_detection_size(self):
+        """Frames above the detection size cap are downscaled and boxes come back in frame coordinates"""
+        cascade = MagicMock()
+        shapes = []
+
+        def detect_multi_scale(image, **params):
+            shapes.append(image.shape)
+            return np.array([[100, 60, 40, 40]], dtype=np.int32)
+
+        cascade.detectMultiScale.side_effect = detect_multi_scale
+        detector = FaceDetector(cascades={name: cascade for name in ('default', 'alt', 'alt2', 'profile')},
+                                max_detection_size=640)
+        scheduler = EnhancedScheduler(detector, spread=False)
+        scheduler.interval = 1
+
+        frame = np.zeros((1080, 1920, 3), dtype=np.uint8)
+        normal = np.array([[900, 500, 120, 120]], dtype=np.int32)
+        faces = scheduler.run(frame, normal)
+
+        self.assertTrue(shapes)
+        self.assertTrue(all(max(shape[:2]) <= 640 for shape in shapes))
+        self.assertIn([300, 180, 120, 120], faces.tolist())
+        self.assertIn([900, 500, 120, 120], faces.tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
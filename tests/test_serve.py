@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Test cases for the prefork production server
+Copyright (c) 2025, Ahmad Fadlilah (https://github.com/ahmadfadlilah)
+"""
+
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+import unittest
+import urllib.error
+import urllib.request
+
+# Add the src directory to the path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+os.environ.setdefault('FACE_EAGER_LOAD', '0')
+
+from unittest.mock import patch
+
+import src.app as webapp
+from src.serve import PreforkServer, RequestTracker, run_worker
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+class TestRequestTracker(unittest.TestCase):
+    """Test cases for counting in-flight requests"""
+
+    def test_streaming_responses_count_until_closed(self):
+        release = threading.Event()
+
+        def app(environ, start_response):
+            start_response('200 OK', [])
+            yield b'a'
+            release.wait(5)
+            yield b'b'
+
+        tracker = RequestTracker(app)
+        body = tracker({}, lambda status, headers: None)
+        self.assertEqual(tracker.active, 1)
+        self.assertEqual(next(iter(body)), b'a')
+        self.assertFalse(tracker.wait_idle(0.05))
+
+        release.set()
+        self.assertEqual(list(body), [b'b'])
+        body.close()
+        self.assertTrue(tracker.wait_idle(0))
+
+    def test_failed_requests_are_not_counted(self):
+        def app(environ, start_response):
+            raise RuntimeError("gagal")
+
+        tracker = RequestTracker(app)
+        with self.assertRaises(RuntimeError):
+            tracker({}, None)
+        self.assertEqual(tracker.active, 0)
+
+
+class TestWorkerAdmission(unittest.TestCase):
+    """Upload admission limits are shared out between prefork workers"""
+
+    def test_limits_are_divided_between_workers(self):
+        with patch.dict(webapp.app.config, {'UPLOAD_CONCURRENCY': 8, 'UPLOAD_QUEUE': 32}):
+            self.assertEqual(PreforkServer(None, 1).admission, (8, 32))
+            self.assertEqual(PreforkServer(None, 4).admission, (2, 8))
+            self.assertEqual(PreforkServer(None, 3).admission, (2, 11))
+            # More workers than slots: every worker still admits one upload
+            self.assertEqual(PreforkServer(None, 16).admission, (1, 2))
+        with patch.dict(webapp.app.config, {'UPLOAD_CONCURRENCY': 0, 'UPLOAD_QUEUE': 0}):
+            self.assertEqual(PreforkServer(None, 4).admission, (0, 0))
+
+    def test_worker_applies_its_share(self):
+        controller = webapp.AdmissionController(8, 32)
+        sock = socket.create_server(('127.0.0.1', 0))
+        self.addCleanup(sock.close)
+        with patch.object(webapp, 'upload_admission', controller), \
+                patch('src.serve.make_server') as make_server, \
+                patch('src.serve.signal.signal'), patch('src.serve.cv2.setNumThreads'):
+            run_worker(sock, 1, 0, admission=(2, 8))
+        make_server.return_value.serve_forever.assert_called_once()
+        self.assertEqual((controller.limit, controller.queue_size), (2, 8))
+
+
+@unittest.skipUnless(hasattr(os, 'fork') and os.path.exists('/proc/self/task'), "Requires fork and /proc")
+class TestPreforkServer(unittest.TestCase):
+    """Run src/serve.py as a subprocess with two workers"""
+
+    def setUp(self):
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            self.port = sock.getsockname()[1]
+        env = dict(os.environ, FACE_EAGER_LOAD='1', FACE_RESULT_CACHE_MB='0',
+                   FACE_UPLOAD_CONCURRENCY='4', FACE_UPLOAD_QUEUE='8')
+        self.server = subprocess.Popen([sys.executable, os.path.join('src', 'serve.py'), '--workers', '2',
+                                        '--port', str(self.port), '--graceful-timeout', '5'],
+                                       cwd=REPO_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        self.addCleanup(self.cleanup)
+        deadline = time.monotonic() + 60
+        while len(self.workers()) < 2 or self.request('GET', '/cascades') is None:
+            if self.server.poll() is not None or time.monotonic() > deadline:
+                self.fail("Prefork server did not start")
+            time.sleep(0.2)
+
+    def cleanup(self):
+        if self.server.poll() is None:
+            self.server.kill()
+            self.server.wait()
+
+    def workers(self):
+        try:
+            with open(f'/proc/{self.server.pid}/task/{self.server.pid}/children') as f:
+                return set(int(pid) for pid in f.read().split())
+        except OSError:
+            return set()
+
+    def request(self, method, path):
+        try:
+            with urllib.request.urlopen(urllib.request.Request(
+                    f'http://127.0.0.1:{self.port}{path}', method=method), timeout=10) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read())
+        except OSError:
+            return None
+
+    def test_workers_share_loaded_cascades_and_restart_gracefully(self):
+        status, data = self.request('GET', '/cascades')
+        self.assertEqual(status, 200)
+        self.assertTrue(data['loaded'])
+
+        # Each worker admits its share of the server-wide upload limits
+        status, data = self.request('GET', '/upload_stats')
+        self.assertEqual((data['limit'], data['queue_size']), (2, 4))
+
+        # Camera sessions are per process, so live detection is refused
+        status, data = self.request('POST', '/start_detection')
+        self.assertEqual(status, 503)
+        self.assertFalse(data['success'])
+
+        # SIGHUP replaces every worker while the server keeps answering
+        old = self.workers()
+        self.server.send_signal(signal.SIGHUP)
+        deadline = time.monotonic() + 30
+        while not (len(self.workers()) == 2 and not self.workers() & old):
+            self.assertLess(time.monotonic(), deadline, "Workers were not replaced")
+            self.assertEqual(self.request('GET', '/cascades')[0], 200)
+            time.sleep(0.1)
+
+        # A worker that dies is replaced
+        victim = next(iter(self.workers()))
+        os.kill(victim, signal.SIGKILL)
+        deadline = time.monotonic() + 10
+        while len(self.workers() - {victim}) < 2:
+            self.assertLess(time.monotonic(), deadline, "Worker was not replaced")
+            time.sleep(0.1)
+
+        self.server.send_signal(signal.SIGTERM)
+        self.assertEqual(self.server.wait(15), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
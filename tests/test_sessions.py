@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Test cases for the camera sessions and the shared CPU budget
+Copyright (c) 2025, Ahmad Fadlilah (https://github.com/ahmadfadlilah)
+"""
+
+import os
+import sys
+import threading
+import time
+import unittest
+
+# Add the src directory to the path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.sessions import DEFAULT_CAMERA, CpuBudget, SessionManager, parse_cameras
+
+
+class TestParseCameras(unittest.TestCase):
+    """Test cases for the FACE_CAMERAS format"""
+
+    def test_default_and_explicit_cameras(self):
+        """An empty value gives the default camera; entries keep their order and full source"""
+        self.assertEqual(parse_cameras('', '2'), {DEFAULT_CAMERA: '2'})
+        cameras = parse_cameras('lobby=0, gate=rtsp://host/stream?a=1 ,demo=synthetic:320x240')
+        self.assertEqual(list(cameras), ['lobby', 'gate', 'demo'])
+        self.assertEqual(cameras['gate'], 'rtsp://host/stream?a=1')
+
+    def test_invalid_entries(self):
+        """Missing sources, invalid IDs and duplicates are rejected"""
+        for spec in ('lobby', 'bad id=0', 'a=0,a=1'):
+            with self.assertRaises(ValueError):
+                parse_cameras(spec)
+
+
+class TestCpuBudget(unittest.TestCase):
+    """Test cases for the global detection slots"""
+
+    def test_concurrency_never_exceeds_slots(self):
+        """Many sessions contending for two slots never run more than two blocks at once"""
+        budget = CpuBudget(slots=2)
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def work():
+            for _ in range(5):
+                with budget.slot():
+                    with lock:
+                        active.append(1)
+                        peak.append(len(active))
+                    time.sleep(0.002)
+                    with lock:
+                        active.pop()
+
+        threads = [threading.Thread(target=work) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(max(peak), 2)
+        stats = budget.stats()
+        self.assertEqual((stats['acquired'], stats['in_use'], stats['waiting']), (30, 0, 0))
+        self.assertGreater(stats['wait_seconds'], 0)
+
+    def test_share_follows_active_sessions(self):
+        """Each active session gets an equal share of the slots, at most one core"""
+        budget = CpuBudget(slots=2)
+        self.assertEqual(budget.share(), 1.0)
+        for _ in range(4):
+            budget.register()
+        self.assertEqual(budget.share(), 0.5)
+        budget.unregister()
+        self.assertAlmostEqual(budget.share(), 2 / 3)
+
+    def test_manager_default_camera(self):
+        """Routes without an ID use the 'default' camera, otherwise the first one configured"""
+        def factory(camera_id, spec, budget):
+            return type('Session', (), {'camera_id': camera_id})()
+
+        manager = SessionManager({'lobby': '0', 'gate': '1'}, factory)
+        self.assertEqual(manager.get().camera_id, 'lobby')
+        self.assertIsNone(manager.get('missing'))
+        self.assertEqual(SessionManager({'gate': '1', DEFAULT_CAMERA: '0'}, factory).default_id, DEFAULT_CAMERA)
+
+
+if __name__ == '__main__':
+    unittest.main()
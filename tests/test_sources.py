@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Test cases for the live frame sources
+Copyright (c) 2025, Ahmad Fadlilah (https://github.com/ahmadfadlilah)
+"""
+
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+import cv2
+import numpy as np
+
+# Add the src directory to the path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.sources import (DeviceSource, ImageDirectorySource, SyntheticSource, VideoFileSource,
+                         open_source)
+
+
+def read_all(source, limit=100):
+    """Read frames until the source ends (or limit frames)"""
+    frames = []
+    while len(frames) < limit:
+        success, frame = source.read()
+        if not success:
+            break
+        frames.append(frame)
+    return frames
+
+
+class TestFrameSources(unittest.TestCase):
+    """Test cases for the frame sources"""
+
+    def test_synthetic_source_is_deterministic(self):
+        """Two synthetic sources with the same seed produce the same frames and face boxes"""
+        image = np.full((40, 40, 3), 200, dtype=np.uint8)
+        first = SyntheticSource(size=(160, 120), frames=4, realtime=False, image=image, face_box=(5, 5, 30, 30))
+        second = SyntheticSource(size=(160, 120), frames=4, realtime=False, image=image, face_box=(5, 5, 30, 30))
+
+        frames = read_all(first)
+        self.assertEqual(len(frames), 4)
+        for frame in frames:
+            self.assertTrue(np.array_equal(frame, second.read()[1]))
+        x, y = first.last_box[:2] - 5
+        self.assertTrue(np.all(frames[-1][y:y + 40, x:x + 40] == 200))
+        self.assertFalse(first.read()[0])
+        self.assertEqual(first.describe()['frames_read'], 4)
+
+    def test_realtime_source_is_paced(self):
+        """A realtime source hands out frames at its fps, a non-realtime one as fast as possible"""
+        start = time.perf_counter()
+        read_all(SyntheticSource(size=(32, 24), fps=50, frames=6))
+        self.assertGreaterEqual(time.perf_counter() - start, 0.09)
+
+        source = SyntheticSource(size=(32, 24), fps=1, frames=6, realtime=False)
+        start = time.perf_counter()
+        read_all(source)
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertFalse(source.live)
+
+    def test_image_directory_source(self):
+        """Images are replayed in name order, unreadable files are skipped and loop restarts"""
+        with tempfile.TemporaryDirectory() as directory:
+            for index in range(3):
+                cv2.imwrite(os.path.join(directory, f"{index:03d}.png"), np.full((8, 8, 3), index, np.uint8))
+            with open(os.path.join(directory, '001b.jpg'), 'wb') as f:
+                f.write(b'not an image')
+            with open(os.path.join(directory, 'notes.txt'), 'w') as f:
+                f.write('ignored')
+
+            source = ImageDirectorySource(directory, realtime=False)
+            self.assertTrue(source.isOpened())
+            self.assertEqual([int(frame[0, 0, 0]) for frame in read_all(source)], [0, 1, 2])
+
+            looping = ImageDirectorySource(directory, realtime=False, loop=True)
+            self.assertEqual([int(frame[0, 0, 0]) for frame in read_all(looping, limit=5)], [0, 1, 2, 0, 1])
+
+            self.assertFalse(ImageDirectorySource(os.path.join(directory, 'missing')).isOpened())
+
+    def test_video_file_source(self):
+        """A video file is read to the end with its own fps, or replayed when looping"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'clip.avi')
+            writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 12, (64, 48))
+            if not writer.isOpened():
+                self.skipTest("MJPG VideoWriter not available")
+            for index in range(5):
+                writer.write(np.full((48, 64, 3), index * 40, np.uint8))
+            writer.release()
+
+            source = VideoFileSource(path, realtime=False)
+            self.assertTrue(source.isOpened())
+            self.assertEqual(source.fps, 12)
+            self.assertEqual(len(read_all(source)), 5)
+            source.release()
+
+            looping = VideoFileSource(path, realtime=False, loop=True)
+            self.assertEqual(len(read_all(looping, limit=8)), 8)
+            looping.release()
+
+    def test_open_source_parses_spec(self):
+        """open_source picks the source type from the configuration string"""
+        synthetic = open_source('synthetic:320x240', realtime=False)
+        self.assertIsInstance(synthetic, SyntheticSource)
+        self.assertEqual(synthetic.read()[1].shape, (240, 320, 3))
+
+        with tempfile.TemporaryDirectory() as directory:
+            self.assertIsInstance(open_source(directory), ImageDirectorySource)
+            missing = open_source(os.path.join(directory, 'missing.mp4'))
+            self.assertIsInstance(missing, VideoFileSource)
+            self.assertFalse(missing.isOpened())
+
+        # A device index tries the default backend first, then CAP_DSHOW
+        with patch('src.sources.cv2.VideoCapture') as mock_capture:
+            mock_capture.return_value.isOpened.side_effect = [False, True, True]
+            mock_capture.return_value.get.return_value = 30
+            device = open_source('1')
+            self.assertIsInstance(device, DeviceSource)
+            self.assertTrue(device.isOpened())
+            self.assertEqual(mock_capture.call_args_list[-1].args, (1, cv2.CAP_DSHOW))
+
+
+if __name__ == '__main__':
+    unittest.main()
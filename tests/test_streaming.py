@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Test cases for the encode-once MJPEG frame broadcaster
+Copyright (c) 2025, Ahmad Fadlilah (https://github.com/ahmadfadlilah)
+"""
+
+import os
+import sys
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+
+# Add the src directory to the path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.streaming import FrameBroadcaster, encode_event
+
+
+class TestFrameBroadcaster(unittest.TestCase):
+    """Test cases for FrameBroadcaster"""
+
+    def setUp(self):
+        self.encoder = MagicMock(side_effect=lambda frame: f'jpeg-{frame}'.encode())
+        self.broadcaster = FrameBroadcaster(encoder=self.encoder)
+        self.broadcaster.open()
+
+    def test_each_version_is_encoded_once_for_many_viewers(self):
+        """All viewers share a single encode per published frame"""
+        self.broadcaster.publish('a')
+        results = [self.broadcaster.wait_for_jpeg(0) for _ in range(5)]
+        self.assertEqual(results, [(1, b'jpeg-a')] * 5)
+        self.assertEqual(self.encoder.call_count, 1)
+
+        self.broadcaster.publish('b')
+        self.assertEqual(self.broadcaster.wait_for_jpeg(1), (2, b'jpeg-b'))
+        self.assertEqual(self.broadcaster.wait_for_jpeg(1), (2, b'jpeg-b'))
+        self.assertEqual(self.encoder.call_count, 2)
+
+    def test_idle_broadcaster_does_not_encode(self):
+        """Frames published without viewers are never encoded"""
+        for i in range(10):
+            self.broadcaster.publish(i)
+        self.encoder.assert_not_called()
+
+    def test_viewer_blocks_until_new_version(self):
+        """A viewer that has the latest frame waits instead of resending it"""
+        self.broadcaster.publish('a')
+        self.broadcaster.wait_for_jpeg(0)
+        self.assertIsNone(self.broadcaster.wait_for_jpeg(1, timeout=0.05))
+
+        threading.Timer(0.05, self.broadcaster.publish, args=('b',)).start()
+        self.assertEqual(self.broadcaster.wait_for_jpeg(1, timeout=2), (2, b'jpeg-b'))
+
+    def test_close_stops_viewers(self):
+        """Closing the broadcaster ends every viewer generator"""
+        received = []
+        viewer = threading.Thread(target=lambda: received.extend(self.broadcaster.frames()))
+        viewer.start()
+
+        self.broadcaster.publish('a')
+        deadline = time.time() + 2
+        while not received and time.time() < deadline:
+            time.sleep(0.01)
+        self.broadcaster.close()
+        viewer.join(timeout=2)
+
+        self.assertFalse(viewer.is_alive())
+        self.assertEqual(received, [b'jpeg-a'])
+        self.assertEqual(self.broadcaster.viewers, 0)
+
+    def test_viewer_on_closed_broadcaster_returns_immediately(self):
+        """Viewers connecting while detection is stopped end right away"""
+        self.broadcaster.close()
+        self.assertEqual(list(self.broadcaster.frames()), [])
+
+
+class TestEncodeEvent(unittest.TestCase):
+    """Test cases for detection events as Server-Sent Events"""
+
+    def test_event_message(self):
+        message = encode_event({"frame_id": 7, "count": 1, "faces": [[1, 2, 3, 4]]})
+        self.assertEqual(message, b'id: 7\ndata: {"frame_id":7,"count":1,"faces":[[1,2,3,4]]}\n\n')
+
+    def test_events_are_serialized_once_for_all_subscribers(self):
+        broadcaster = FrameBroadcaster(encoder=encode_event)
+        broadcaster.open()
+        broadcaster.publish({"frame_id": 1, "faces": []})
+        first, second = broadcaster.wait_for_jpeg(0), broadcaster.wait_for_jpeg(0)
+        self.assertIs(first[1], second[1])
+        self.assertEqual(broadcaster.frames_encoded, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
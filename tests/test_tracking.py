@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Test cases for keyframe face tracking in the live loop
+Copyright (c) 2025, Ahmad Fadlilah (https://github.com/ahmadfadlilah)
+"""
+
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock
+import numpy as np
+
+# Add the src directory to the path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.tracking import FaceTracker, TrackerRegistry
+
+
+class FakeDetector:
+    """Detector that reports the bounding box of the bright pixels in the image it is given"""
+
+    def __init__(self):
+        self.calls = []
+
+    def detect(self, image, profile=None):
+        self.calls.append((image.shape[:2], profile))
+        ys, xs = np.nonzero(image[:, :, 0])
+        if len(xs) == 0:
+            return np.empty((0, 4), dtype=np.int32)
+        return np.array([[xs.min(), ys.min(), xs.max() - xs.min() + 1, ys.max() - ys.min() + 1]], dtype=np.int32)
+
+
+def frame_with_face(x, y, size=80):
+    """Black 640x480 frame with a white square standing in for a face"""
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    frame[y:y + size, x:x + size] = 255
+    return frame
+
+
+class TestFaceTracker(unittest.TestCase):
+    """Test cases for FaceTracker"""
+
+    def setUp(self):
+        self.frame = np.zeros((480, 640, 3), dtype=np.uint8)
+
+    def test_full_detection_only_on_keyframes(self):
+        """Between keyframes only the enlarged region around the face is searched"""
+        detector = FakeDetector()
+        tracker = FaceTracker(detector, keyframe_interval=5)
+
+        for i in range(9):
+            # The face drifts a few pixels per frame
+            faces = tracker.update(frame_with_face(200 + 3 * i, 150))
+            self.assertEqual(faces.tolist(), [[200 + 3 * i, 150, 80, 80]])
+
+        full_frames = [call for call in detector.calls if call[0] == (480, 640)]
+        # Frames 1 and 5 are keyframes; the other seven only search around the face
+        self.assertEqual(tracker.keyframes, 2)
+        self.assertEqual(len(full_frames), 2)
+        self.assertEqual(tracker.tracked_frames, 7)
+        for shape, profile in detector.calls:
+            if shape != (480, 640):
+                self.assertEqual(shape, (160, 160))
+                self.assertEqual(profile, 'live-fast')
+
+    def test_lost_track_falls_back_to_full_frame(self):
+        """When a face leaves its search region the same frame is detected in full"""
+        tracker = FaceTracker(FakeDetector(), keyframe_interval=5)
+        for _ in range(5):
+            tracker.update(frame_with_face(200, 150))
+
+        faces = tracker.update(frame_with_face(450, 300))
+
+        self.assertEqual(faces.tolist(), [[450, 300, 80, 80]])
+        self.assertEqual(tracker.lost_tracks, 1)
+        self.assertEqual(tracker.keyframes, 3)
+
+    def test_enhanced_frames_are_keyframes(self):
+        """Frames that use the enhanced live profile always run on the full frame"""
+        detector = MagicMock()
+        detector.detect.return_value = np.empty((0, 4), dtype=np.int32)
+        tracker = FaceTracker(detector, keyframe_interval=7)
+        for _ in range(10):
+            tracker.update(self.frame)
+        profiles = [call.kwargs['profile'] for call in detector.detect.call_args_list]
+        self.assertEqual(profiles, ['live-fast', 'live-fast', 'live-enhanced'])
+
+    def test_interval_one_detects_every_frame(self):
+        """keyframe_interval=1 keeps the original full-frame detection on every frame"""
+        detector = MagicMock()
+        detector.detect.return_value = np.array([[10, 10, 60, 60]], dtype=np.int32)
+        tracker = FaceTracker(detector, keyframe_interval=1)
+        for _ in range(10):
+            tracker.update(self.frame)
+        profiles = [call.kwargs['profile'] for call in detector.detect.call_args_list]
+        self.assertEqual(profiles, ['live-fast'] * 9 + ['live-enhanced'])
+
+
+class TestTrackerRegistry(unittest.TestCase):
+    """Test cases for per-client trackers"""
+
+    def test_clients_are_bounded_and_expire(self):
+        now = [0.0]
+        registry = TrackerRegistry(lambda: FaceTracker(FakeDetector()), max_clients=2, idle_seconds=10,
+                                   clock=lambda: now[0])
+        with registry.use('a') as tracker_a:
+            pass
+        with registry.use('b'), registry.use('a') as again:
+            self.assertIs(again, tracker_a)
+        # 'b' is now the least recently used client
+        with registry.use('c'):
+            pass
+        self.assertEqual(len(registry), 2)
+        with registry.use('a') as again:
+            self.assertIs(again, tracker_a)
+
+        now[0] = 20.0
+        with registry.use('d'):
+            pass
+        self.assertEqual(len(registry), 1)
+        self.assertEqual(registry.stats()['evicted'], 3)
+
+    def test_new_frame_size_resets_tracks(self):
+        registry = TrackerRegistry(lambda: FaceTracker(FakeDetector()))
+        with registry.use('a', (480, 640, 3)) as tracker:
+            tracker.update(frame_with_face(100, 100))
+            self.assertEqual(len(tracker.tracks), 1)
+        with registry.use('a', (240, 320, 3)) as tracker:
+            self.assertEqual(len(tracker.tracks), 0)
+
+    def test_fast_only_tracker(self):
+        """enhanced=False never switches keyframes to the enhanced profile"""
+        detector = MagicMock()
+        detector.detect.return_value = np.empty((0, 4), dtype=np.int32)
+        tracker = FaceTracker(detector, keyframe_interval=1, enhanced=False)
+        for _ in range(10):
+            tracker.update(np.zeros((48, 64, 3), dtype=np.uint8))
+        profiles = [call.kwargs['profile'] for call in detector.detect.call_args_list]
+        self.assertEqual(profiles, ['live-fast'] * 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Test cases for parallel offline video processing
+Copyright (c) 2025, Ahmad Fadlilah (https://github.com/ahmadfadlilah)
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import cv2
+
+# Add the src directory to the path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.sources import SyntheticSource
+from src.video_processing import plan_segments, process_video, video_info
+
+SAMPLE = os.path.join(os.path.dirname(__file__), '..', 'benchmarks', 'data', 'astronaut.jpg')
+
+
+def read_jsonl(path):
+    with open(path, encoding='utf-8') as handle:
+        return [json.loads(line) for line in handle]
+
+
+class TestPlanSegments(unittest.TestCase):
+    """Test cases for splitting a video into frame ranges"""
+
+    def test_segments_cover_every_frame_in_order(self):
+        """Segments are contiguous, ordered and cover the whole clip"""
+        segments = plan_segments(1000, workers=4)
+        self.assertEqual(segments[0][0], 0)
+        self.assertEqual(segments[-1][1], 1000)
+        for (_, end), (start, _) in zip(segments, segments[1:]):
+            self.assertEqual(end, start)
+        self.assertEqual(len(segments), 16)
+
+    def test_short_clips_and_explicit_length(self):
+        """Short clips are not split below the minimum; an explicit length is honoured"""
+        self.assertEqual(plan_segments(20, workers=8), [(0, 20)])
+        self.assertEqual(plan_segments(10, workers=2, segment_frames=4), [(0, 4), (4, 8), (8, 10)])
+        self.assertEqual(plan_segments(0, workers=2), [])
+
+
+class TestProcessVideo(unittest.TestCase):
+    """Test cases for the process pool pipeline"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_dir = tempfile.mkdtemp()
+        cls.clip = os.path.join(cls.temp_dir, 'clip.avi')
+        portrait = cv2.resize(cv2.imread(SAMPLE), (240, 240))
+        source = SyntheticSource(size=(400, 300), frames=10, realtime=False, image=portrait)
+        writer = cv2.VideoWriter(cls.clip, cv2.VideoWriter_fourcc(*'MJPG'), 10, (400, 300))
+        while True:
+            success, frame = source.read()
+            if not success:
+                break
+            writer.write(frame)
+        writer.release()
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.temp_dir, ignore_errors=True)
+
+    def test_parallel_output_matches_sequential(self):
+        """Segments processed by several workers are reassembled in frame order"""
+        output = os.path.join(self.temp_dir, 'out.avi')
+        parallel = os.path.join(self.temp_dir, 'parallel.jsonl')
+        sequential = os.path.join(self.temp_dir, 'sequential.jsonl')
+
+        summary = process_video(self.clip, output=output, detections_path=parallel, workers=2,
+                                segment_frames=3, progress=None)
+        process_video(self.clip, detections_path=sequential, workers=1, progress=None)
+
+        self.assertEqual(summary['frames'], 10)
+        self.assertEqual(summary['segments'], 4)
+        self.assertEqual(video_info(output)['frames'], 10)
+
+        lines = read_jsonl(parallel)
+        self.assertEqual([line['frame'] for line in lines], list(range(10)))
+        self.assertEqual(lines, read_jsonl(sequential))
+        self.assertGreater(summary['faces'], 0)
+
+    def test_unreadable_video_raises(self):
+        """A path that cannot be opened is reported instead of producing empty output"""
+        with self.assertRaises(ValueError):
+            process_video(os.path.join(self.temp_dir, 'missing.mp4'), progress=None)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,30 +5,32 @@ Test cases for web application face detection functionality
 Copyright (c) 2025, Ahmad Fadlilah (https://github.com/ahmadfadlilah)
 """
 
+import json
 import os
 import sys
 import unittest
 from unittest.mock import patch, MagicMock
 import base64
 import numpy as np
+from werkzeug.datastructures import Headers, MIMEAccept
 
 # Add the src directory to the path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+# Tests patch cv2 and the detector themselves, so skip loading cascades at import
+os.environ.setdefault('FACE_EAGER_LOAD', '0')
+
 class TestWebAppFunctions(unittest.TestCase):
     """Test cases for the web application face detection"""
 
+    @patch('src.intake.cv2')
     @patch('src.app.cv2')
-    @patch('src.app.face_cascade')
-    @patch('src.app.face_cascade_alt')
-    @patch('src.app.face_cascade_alt2')
-    @patch('src.app.profile_cascade')
-    @patch('src.app.merge_faces')
-    def test_detect_faces_in_image(self, mock_merge_faces, mock_profile_cascade, 
-                                   mock_face_cascade_alt2, mock_face_cascade_alt, 
-                                   mock_face_cascade, mock_cv2):
+    @patch('src.detector.cv2')
+    @patch('src.detector.merge_faces')
+    def test_detect_faces_in_image(self, mock_merge_faces, mock_detector_cv2, mock_cv2, mock_intake_cv2):
         """Test face detection in an uploaded image with multiple cascade classifiers"""
         from src.app import upload_image
+        from src.detector import FaceDetector
         from flask import Flask
         
         app = Flask(__name__)
@@ -38,29 +40,42 @@ class TestWebAppFunctions(unittest.TestCase):
             mock_file.filename = 'test.jpg'
             mock_file.read.return_value = b'test_image_data'
             
+            # Setup multiple face detection mocks
+            mock_face_cascade = MagicMock()
+            mock_face_cascade_alt = MagicMock()
+            mock_face_cascade_alt2 = MagicMock()
+            mock_profile_cascade = MagicMock()
+            mock_face_cascade.detectMultiScale.return_value = np.array([[10, 10, 100, 100]])
+            mock_face_cascade_alt.detectMultiScale.return_value = np.array([[20, 20, 80, 80]])
+            mock_face_cascade_alt2.detectMultiScale.return_value = np.array([[30, 30, 70, 70]])
+            mock_profile_cascade.detectMultiScale.return_value = np.array([[40, 40, 60, 60]])
+            
+            detector = FaceDetector(cascades={
+                'default': mock_face_cascade,
+                'alt': mock_face_cascade_alt,
+                'alt2': mock_face_cascade_alt2,
+                'profile': mock_profile_cascade,
+            })
+            
             # Mock requests.files to return our mock file
-            with patch('src.app.request') as mock_request:
+            with patch('src.app.request') as mock_request, patch('src.app.detector', detector):
                 mock_request.files = {'file': mock_file}
+                mock_request.args = {}
+                mock_request.accept_mimetypes = MIMEAccept()
+                mock_request.headers = Headers()
                 
                 # Mock numpy and cv2 operations
-                mock_cv2.imdecode.return_value = MagicMock()
-                mock_cv2.cvtColor.return_value = MagicMock()
-                mock_cv2.equalizeHist.return_value = MagicMock()
-                mock_cv2.bilateralFilter.return_value = MagicMock()
-                mock_cv2.createCLAHE.return_value.apply.return_value = MagicMock()
-                mock_cv2.normalize.return_value = MagicMock()
-                mock_cv2.flip.return_value = MagicMock()
-                
-                # Setup multiple face detection mocks
-                mock_faces_default = np.array([[10, 10, 100, 100]])
-                mock_faces_alt = np.array([[20, 20, 80, 80]])
-                mock_faces_alt2 = np.array([[30, 30, 70, 70]])
-                mock_profile_faces = np.array([[40, 40, 60, 60]])
-                
-                mock_face_cascade.detectMultiScale.return_value = mock_faces_default
-                mock_face_cascade_alt.detectMultiScale.return_value = mock_faces_alt
-                mock_face_cascade_alt2.detectMultiScale.return_value = mock_faces_alt2
-                mock_profile_cascade.detectMultiScale.return_value = mock_profile_faces
+                decoded_image = MagicMock()
+                decoded_image.shape = (480, 640, 3)
+                mock_intake_cv2.imdecode.return_value = decoded_image
+                decoded_gray = MagicMock()
+                decoded_gray.shape = (480, 640)
+                mock_intake_cv2.cvtColor.return_value = decoded_gray
+                enhanced_image = MagicMock()
+                enhanced_image.shape = (480, 640)
+                mock_detector_cv2.equalizeHist.return_value = enhanced_image
+                mock_detector_cv2.bilateralFilter.return_value = enhanced_image
+                mock_detector_cv2.createCLAHE.return_value.apply.return_value = enhanced_image
                 
                 # Mock merged faces result
                 mock_merged_faces = np.array([[15, 15, 90, 90], [35, 35, 65, 65]])
@@ -91,29 +106,26 @@ class TestWebAppFunctions(unittest.TestCase):
                     # Verify that merge_faces was called
                     mock_merge_faces.assert_called()
     
-    @patch('src.app.cv2')
-    @patch('src.app.face_cascade')
-    @patch('src.app.threading')
-    def test_start_detection(self, mock_threading, mock_face_cascade, mock_cv2):
+    def test_start_detection(self):
         """Test starting face detection"""
-        from src.app import start_detection, download_cascade_if_needed, init_camera
+        import src.app as webapp
         from flask import Flask
         
-        # Set up patch for download_cascade_if_needed to return True
-        with patch('src.app.download_cascade_if_needed', return_value=True):
-            # Set up patch for init_camera to return True
-            with patch('src.app.init_camera', return_value=True):
-                app = Flask(__name__)
-                with app.test_request_context():
-                    with patch('src.app.detection_running', False):
-                        with patch('src.app.face_cascade', None):
-                            # Call the function
-                            result = start_detection()
-                            
-                            # Verify result
-                            data = result.get_json()
-                            self.assertTrue(data['success'])
-                            self.assertEqual(data['message'], "Deteksi wajah dimulai")
+        session = webapp.sessions.get()
+        # Set up patch for load_detector to return True and a session that starts without a camera
+        with patch('src.app.load_detector', return_value=True), \
+                patch.object(session, 'start', return_value=(True, "Deteksi wajah dimulai")):
+            app = Flask(__name__)
+            with app.test_request_context():
+                with patch('src.app.detector', None):
+                    # Call the function
+                    result = webapp.start_detection()
+                    
+                    # Verify result
+                    data = result.get_json()
+                    self.assertTrue(data['success'])
+                    self.assertEqual(data['message'], "Deteksi wajah dimulai")
+                    self.assertEqual(data['camera'], 'default')
     
     @patch('src.app.np')
     def test_merge_faces(self, mock_np):
@@ -141,5 +153,449 @@ class TestWebAppFunctions(unittest.TestCase):
         empty_result = merge_faces([])
         self.assertEqual(len(empty_result), 0)
 
+class TestCascadeLoading(unittest.TestCase):
+    """Test cases for offline cascade loading at startup"""
+
+    def test_load_detector_is_offline_and_warmed_up(self):
+        """Cascades resolve from OpenCV's bundled data without network and report load times"""
+        import src.app as webapp
+
+        with patch.object(webapp, 'detector', None), \
+                patch.dict(webapp.app.config, {'CASCADE_DIR': None, 'CASCADE_DOWNLOAD': False}), \
+                patch('src.cascades.download_cascades') as mock_download:
+            self.assertTrue(webapp.load_detector())
+            mock_download.assert_not_called()
+
+            info = webapp.app.test_client().get('/cascades').get_json()
+            self.assertTrue(info['loaded'])
+            self.assertEqual(set(info['cascades']), {'default', 'alt', 'alt2', 'profile'})
+            self.assertTrue(all(item['load_ms'] >= 0 for item in info['cascades'].values()))
+            self.assertIn('upload-accurate', info['warmup_ms'])
+
+    def test_healthz_reports_readiness(self):
+        """/healthz answers 503 until the cascades are loaded and warm, then 200"""
+        import src.app as webapp
+        from src.detector import FaceDetector
+
+        client = webapp.app.test_client()
+        with patch.object(webapp, 'detector', None):
+            response = client.get('/healthz')
+            self.assertEqual(response.status_code, 503)
+            self.assertFalse(response.get_json()['ready'])
+            self.assertEqual(response.headers['Cache-Control'], 'no-store')
+
+            # Loaded but not warmed up yet
+            webapp.detector = FaceDetector(cascades={'default': object()})
+            self.assertEqual(client.get('/healthz').status_code, 503)
+
+            with patch.dict(webapp.app.config, {'CASCADE_DIR': None, 'CASCADE_DOWNLOAD': False}):
+                self.assertTrue(webapp.load_detector())
+            response = client.get('/healthz')
+            self.assertEqual(response.status_code, 200)
+            data = response.get_json()
+            self.assertEqual((data['status'], data['ready']), ('ok', True))
+            self.assertIn('default', data['cascades'])
+            self.assertIn('live-fast', data['warmup_ms'])
+
+    def test_missing_cascade_dir_falls_back_to_bundled(self):
+        """A configured directory without cascades still resolves the bundled files"""
+        from src.cascades import CascadeRegistry, bundled_cascade_dir
+
+        registry = CascadeRegistry([os.path.dirname(__file__), bundled_cascade_dir()])
+        self.assertTrue(registry.load())
+        self.assertEqual(registry.errors, {})
+        self.assertTrue(registry.info['default']['path'].startswith(bundled_cascade_dir()))
+
+    def test_invalid_cascade_is_reported(self):
+        """An unreadable cascade file is reported per cascade instead of raising"""
+        import tempfile
+        from src.cascades import CascadeRegistry
+
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, 'broken.xml'), 'w') as f:
+                f.write('<opencv_storage></opencv_storage>')
+            registry = CascadeRegistry([directory], files={'default': 'broken.xml'})
+            self.assertFalse(registry.load())
+            self.assertIn('default', registry.errors)
+
+class TestLiveLoop(unittest.TestCase):
+    """Test cases for the live detection loop and its counters"""
+
+    def make_session(self, webapp, camera_id, source):
+        session = webapp.create_session(camera_id, 'test', None)
+        session.camera = source
+        session.running = True
+        session.broadcaster.open()
+        return session
+
+    def test_detect_faces_uses_capture_thread(self):
+        """Frames come from the capture thread and the counters are exposed at /live_stats"""
+        import src.app as webapp
+
+        camera = MagicMock()
+        frames = [(True, np.zeros((48, 64, 3), dtype=np.uint8)) for _ in range(3)] + [(False, None)]
+        camera.read.side_effect = frames
+        camera.describe.return_value = {"type": "device"}
+        detector = MagicMock()
+        detector.detect.return_value = np.empty((0, 4), dtype=np.int32)
+
+        session = self.make_session(webapp, 'default', camera)
+        with patch.dict(webapp.sessions.sessions, {'default': session}), patch.object(webapp, 'detector', detector):
+            session.run()
+
+            self.assertTrue(session.broadcaster.closed)
+            stats = webapp.app.test_client().get('/live_stats').get_json()['capture']
+            self.assertEqual(stats['captured'], 3)
+            self.assertEqual(stats['processed'] + stats['dropped'], 3)
+            self.assertTrue(stats['failed'])
+            self.assertGreaterEqual(detector.detect.call_count, 1)
+
+    def test_detect_faces_replays_file_source_without_drops(self):
+        """A source replayed as fast as possible is processed frame by frame, then released"""
+        import src.app as webapp
+        from src.sources import SyntheticSource
+
+        detector = MagicMock()
+        detector.detect.return_value = np.empty((0, 4), dtype=np.int32)
+
+        session = self.make_session(webapp, 'default', SyntheticSource(size=(64, 48), frames=5, realtime=False))
+        with patch.object(webapp, 'detector', detector):
+            session.run()
+
+        stats = session.capture.stats()
+        self.assertEqual((stats['captured'], stats['processed'], stats['dropped']), (5, 5, 0))
+        # End of the source stops detection so it can be started again
+        self.assertFalse(session.running)
+        self.assertIsNone(session.camera)
+
+    def test_cameras_run_independently_with_shared_budget(self):
+        """Each camera has its own feed and counters, and detection never exceeds the CPU budget"""
+        import src.app as webapp
+        from src.sessions import CpuBudget, SessionManager
+        from src.sources import SyntheticSource
+
+        lengths = {'lobby': 6, 'gate': 4}
+        budget = CpuBudget(slots=1)
+        manager = SessionManager(
+            {camera_id: 'synthetic' for camera_id in lengths}, webapp.create_session, budget=budget)
+        opened = {camera_id: SyntheticSource(size=(64, 48), frames=frames, realtime=False)
+                  for camera_id, frames in lengths.items()}
+        detector = MagicMock()
+        detector.detect.return_value = np.empty((0, 4), dtype=np.int32)
+
+        with patch.object(webapp, 'sessions', manager), patch.object(webapp, 'detector', detector):
+            for session in manager:
+                session.opener = lambda spec, camera_id=session.camera_id: opened[camera_id]
+            client = webapp.app.test_client()
+            for camera_id in lengths:
+                data = client.post(f'/start_detection/{camera_id}').get_json()
+                self.assertTrue(data['success'])
+                self.assertEqual(data['camera'], camera_id)
+            for session in manager:
+                session._thread.join(5)
+
+            for camera_id, frames in lengths.items():
+                stats = client.get(f'/live_stats/{camera_id}').get_json()
+                self.assertEqual(stats['camera_id'], camera_id)
+                self.assertEqual(stats['capture']['processed'], frames)
+            self.assertEqual(budget.acquired, sum(lengths.values()))
+            self.assertEqual(budget.stats()['in_use'], 0)
+
+            overview = client.get('/cameras').get_json()
+            self.assertEqual(sorted(overview['cameras']), sorted(lengths))
+            self.assertEqual(overview['budget']['slots'], 1)
+            self.assertEqual(client.get('/video_feed/unknown').status_code, 404)
+            self.assertEqual(client.post('/start_detection/unknown').status_code, 404)
+
+    def test_detection_events_without_jpeg_encoding(self):
+        """Subscribers of /detections/stream get per-frame metadata; without MJPEG viewers nothing is drawn or encoded"""
+        import src.app as webapp
+        from src.sources import SyntheticSource
+
+        detector = MagicMock()
+        detector.detect.return_value = np.array([[4, 6, 20, 20]], dtype=np.int32)
+        session = webapp.create_session('default', 'synthetic', None)
+        session.opener = lambda spec: SyntheticSource(size=(64, 48), fps=50)
+
+        with patch.dict(webapp.sessions.sessions, {'default': session}), patch.object(webapp, 'detector', detector), \
+                patch.object(webapp, 'draw_faces') as draw_faces:
+            client = webapp.app.test_client()
+            self.assertTrue(client.post('/start_detection').get_json()['success'])
+            response = client.get('/detections/stream', buffered=False)
+            try:
+                self.assertEqual(response.mimetype, 'text/event-stream')
+                chunks = iter(response.response)
+                self.assertEqual(next(chunks), b'retry: 1000\n\n')
+                messages = [next(chunks).decode() for _ in range(3)]
+                self.assertEqual(session.stats()['subscribers'], 1)
+            finally:
+                client.post('/stop_detection')
+            # The stream ends when detection stops
+            list(chunks)
+            response.close()
+
+        events = [json.loads(message.split('data: ', 1)[1]) for message in messages]
+        ids = [event['frame_id'] for event in events]
+        self.assertEqual(ids, sorted(set(ids)))
+        self.assertTrue(messages[0].startswith(f"id: {ids[0]}\n"))
+        for event in events:
+            self.assertEqual((event['camera'], event['width'], event['height']), ('default', 64, 48))
+            self.assertEqual(event['count'], len(event['faces']))
+            self.assertIsInstance(event['timestamp'], float)
+        self.assertEqual(events[0]['count'], 1)
+        draw_faces.assert_not_called()
+        self.assertEqual(session.broadcaster.frames_encoded, 0)
+        self.assertEqual(session.detections.viewers, 0)
+
+class TestBatchUpload(unittest.TestCase):
+    """Test cases for the /upload_batch endpoint"""
+
+    def setUp(self):
+        import cv2
+        from src.app import app
+
+        self.client = app.test_client()
+        image = np.zeros((40, 40, 3), dtype=np.uint8)
+        self.image_bytes = cv2.imencode('.png', image)[1].tobytes()
+
+        self.detector = MagicMock()
+        self.detector.detect.return_value = np.array([[1, 2, 3, 4]])
+        patcher = patch('src.app.detector', self.detector)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def read_lines(self, response):
+        import json
+        return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+    def test_multiple_files_stream_ndjson(self):
+        """Each uploaded file produces one NDJSON line followed by a summary"""
+        from io import BytesIO
+
+        data = {'files': [(BytesIO(self.image_bytes), f'img{i}.png') for i in range(3)]}
+        response = self.client.post('/upload_batch', data=data, content_type='multipart/form-data')
+
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        lines = self.read_lines(response)
+        results = sorted(lines[:-1], key=lambda item: item['index'])
+        self.assertEqual([item['filename'] for item in results], ['img0.png', 'img1.png', 'img2.png'])
+        self.assertTrue(all(item['faces'] == [[1, 2, 3, 4]] for item in results))
+        self.assertEqual(lines[-1], {"done": True, "total": 3, "succeeded": 3})
+
+    def test_zip_archive_and_invalid_image(self):
+        """Images inside a zip archive are processed and broken images are reported"""
+        import zipfile
+        from io import BytesIO
+
+        archive = BytesIO()
+        with zipfile.ZipFile(archive, 'w') as zf:
+            zf.writestr('a.png', self.image_bytes)
+            zf.writestr('notes.txt', b'skip me')
+            zf.writestr('broken.jpg', b'not an image')
+        archive.seek(0)
+
+        response = self.client.post('/upload_batch', data={'file': (archive, 'photos.zip')},
+                                    content_type='multipart/form-data')
+
+        lines = self.read_lines(response)
+        by_name = {item['filename']: item for item in lines[:-1]}
+        self.assertEqual(set(by_name), {'a.png', 'broken.jpg'})
+        self.assertTrue(by_name['a.png']['success'])
+        self.assertFalse(by_name['broken.jpg']['success'])
+        self.assertEqual(lines[-1], {"done": True, "total": 2, "succeeded": 1})
+
+    def test_oversized_members_and_bad_archives_are_reported(self):
+        """Members that expand past the upload limit are skipped, and a bad archive does not end the batch"""
+        import zipfile
+        from io import BytesIO
+        import src.app as webapp
+
+        archive = BytesIO()
+        with zipfile.ZipFile(archive, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr('bomb.png', bytes(4 * 1024 * 1024))
+            zf.writestr('a.png', self.image_bytes)
+        archive.seek(0)
+        self.assertLess(len(archive.getvalue()), 64 * 1024)
+
+        data = {'files': [(archive, 'photos.zip'), (BytesIO(b'PK\x03\x04 rusak'), 'broken.zip'),
+                          (BytesIO(self.image_bytes), 'b.png')]}
+        with patch.dict(webapp.app.config, {'MAX_CONTENT_LENGTH': 1024 * 1024, 'MAX_UPLOAD_MB': 1}), \
+                patch('src.app.zipfile.ZipExtFile.read', autospec=True, side_effect=zipfile.ZipExtFile.read) as read:
+            response = self.client.post('/upload_batch', data=data, content_type='multipart/form-data')
+            lines = self.read_lines(response)
+
+        by_name = {item['filename']: item for item in lines[:-1]}
+        self.assertEqual(set(by_name), {'bomb.png', 'a.png', 'broken.zip', 'b.png'})
+        self.assertFalse(by_name['bomb.png']['success'])
+        self.assertIn('1 MB', by_name['bomb.png']['message'])
+        self.assertFalse(by_name['broken.zip']['success'])
+        self.assertTrue(by_name['a.png']['success'] and by_name['b.png']['success'])
+        self.assertEqual(lines[-1], {"done": True, "total": 4, "succeeded": 2})
+        # The oversized member is never decompressed, and the others are read with a bound
+        self.assertTrue(read.call_args_list)
+        self.assertTrue(all(call.args[1] > 0 for call in read.call_args_list))
+
+class TestUploadModes(unittest.TestCase):
+    """Test cases for the /upload response modes"""
+
+    def setUp(self):
+        import cv2
+        from src.app import app
+
+        self.client = app.test_client()
+        image = np.zeros((40, 40, 3), dtype=np.uint8)
+        self.image_bytes = cv2.imencode('.png', image)[1].tobytes()
+
+        self.detector = MagicMock()
+        self.detector.detect.return_value = np.array([[1, 2, 3, 4]])
+        self.detector.fingerprint.return_value = 'fingerprint-1'
+        patcher = patch('src.app.detector', self.detector)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        from src.app import result_cache
+        self.result_cache = result_cache
+        result_cache.clear()
+        self.addCleanup(result_cache.clear)
+
+    def post(self, query='', headers=None):
+        from io import BytesIO
+        return self.client.post('/upload' + query, data={'file': (BytesIO(self.image_bytes), 'a.png')},
+                                content_type='multipart/form-data', headers=headers)
+
+    def test_default_mode_returns_base64_image(self):
+        """Without a mode the response keeps the original JSON with a base64 image"""
+        data = self.post(headers={'Accept': '*/*'}).get_json()
+        self.assertTrue(data['success'])
+        self.assertIn('image', data)
+
+    def test_boxes_mode_skips_drawing_and_encoding(self):
+        """Boxes mode returns coordinates only without touching the image"""
+        with patch('src.app.draw_faces') as mock_draw, patch('src.app.cv2.imencode') as mock_imencode:
+            for query, headers in (('?mode=boxes', None), ('', {'Accept': 'application/vnd.face-boxes+json'})):
+                data = self.post(query, headers).get_json()
+                self.assertEqual(data['faces'], [[1, 2, 3, 4]])
+                self.assertEqual(data['count'], 1)
+                self.assertNotIn('image', data)
+            mock_draw.assert_not_called()
+            mock_imencode.assert_not_called()
+
+    def test_binary_image_modes(self):
+        """Image modes return raw bytes with the boxes in a header"""
+        import cv2
+
+        for query, headers, mimetype in (('?mode=jpeg', None, 'image/jpeg'),
+                                         ('', {'Accept': 'image/webp'}, 'image/webp')):
+            response = self.post(query, headers)
+            self.assertEqual(response.mimetype, mimetype)
+            self.assertEqual(response.headers['X-Face-Count'], '1')
+            self.assertEqual(response.headers['X-Faces'], '[[1, 2, 3, 4]]')
+            decoded = cv2.imdecode(np.frombuffer(response.data, np.uint8), cv2.IMREAD_COLOR)
+            self.assertEqual(decoded.shape, (40, 40, 3))
+
+    def test_repeated_upload_is_served_from_cache(self):
+        """The same bytes with the same mode and detector configuration skip detection"""
+        first = self.post('?mode=jpeg')
+        second = self.post('?mode=jpeg')
+        self.assertEqual(first.headers['X-Cache'], 'MISS')
+        self.assertEqual(second.headers['X-Cache'], 'HIT')
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second.headers['X-Faces'], '[[1, 2, 3, 4]]')
+        self.assertEqual(self.detector.detect.call_count, 1)
+
+        # A different mode is a separate entry
+        self.post('?mode=boxes')
+        self.assertEqual(self.detector.detect.call_count, 2)
+
+        # Changing cascades or parameters changes the fingerprint and invalidates entries
+        self.detector.fingerprint.return_value = 'fingerprint-2'
+        self.assertEqual(self.post('?mode=jpeg').headers['X-Cache'], 'MISS')
+        self.assertEqual(self.detector.detect.call_count, 3)
+
+        stats = self.client.get('/cache_stats').get_json()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 3))
+
+    def test_metrics_endpoint_reports_upload_stages(self):
+        """/metrics exposes per-stage upload latency and faces per image in Prometheus text format"""
+        from src.app import PIPELINE_STAGE_SECONDS, FACES_PER_IMAGE
+
+        decoded = PIPELINE_STAGE_SECONDS.count(pipeline='upload', stage='imdecode')
+        encoded = PIPELINE_STAGE_SECONDS.count(pipeline='upload', stage='base64')
+        images = FACES_PER_IMAGE.count(pipeline='upload')
+        self.post()
+
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain; version=0.0.4'))
+        text = response.get_data(as_text=True)
+        self.assertIn('# TYPE face_pipeline_stage_seconds histogram', text)
+        self.assertIn('face_faces_per_image_bucket{pipeline="upload",le="1"}', text)
+        self.assertIn('face_upload_seconds_count{mode="full",cache="miss"}', text)
+        self.assertIn('face_live_viewers{camera="default"} 0', text)
+        self.assertEqual(PIPELINE_STAGE_SECONDS.count(pipeline='upload', stage='imdecode'), decoded + 1)
+        self.assertEqual(PIPELINE_STAGE_SECONDS.count(pipeline='upload', stage='base64'), encoded + 1)
+        self.assertEqual(FACES_PER_IMAGE.count(pipeline='upload'), images + 1)
+
+
+class TestDetectFrame(unittest.TestCase):
+    """Test cases for the /detect_frame endpoint"""
+
+    def setUp(self):
+        from src.app import app, frame_trackers
+        self.client = app.test_client()
+        self.detector = MagicMock()
+        self.detector.detect.return_value = np.array([[10, 20, 30, 40]], dtype=np.int32)
+        patcher = patch('src.app.detector', self.detector)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.frame_trackers = frame_trackers
+
+    def post(self, data, query='', content_type='application/octet-stream'):
+        return self.client.post('/detect_frame' + query, data=data, content_type=content_type)
+
+    def test_raw_grayscale_and_bgr_frames(self):
+        """Raw frames are used as-is with the fast live profile"""
+        for shape in ((48, 64), (48, 64, 3)):
+            frame = np.arange(np.prod(shape), dtype=np.uint64).astype(np.uint8).reshape(shape)
+            response = self.post(frame.tobytes(), '?width=64&height=48')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.get_json(), {"success": True, "count": 1, "faces": [[10, 20, 30, 40]]})
+            self.assertIn('detect;dur=', response.headers['Server-Timing'])
+            image = self.detector.detect.call_args.args[0]
+            self.assertEqual(image.shape, shape)
+            self.assertTrue(np.array_equal(image, frame))
+            self.assertEqual(self.detector.detect.call_args.kwargs['profile'], 'live-fast')
+
+    def test_jpeg_frame_and_scale(self):
+        """Encoded frames are decoded; ?scale= maps boxes back to the client's original frame"""
+        import cv2
+        jpeg = cv2.imencode('.jpg', np.zeros((48, 64, 3), dtype=np.uint8))[1].tobytes()
+        response = self.post(jpeg, '?scale=2', 'image/jpeg')
+        self.assertEqual(response.get_json()['faces'], [[20, 40, 60, 80]])
+        self.assertEqual(self.detector.detect.call_args.args[0].shape, (48, 64))
+
+    def test_invalid_frames(self):
+        self.assertEqual(self.post(b'\0' * 100, '?width=64&height=48').status_code, 400)
+        self.assertEqual(self.post(b'\0' * 100, '?width=10').status_code, 400)
+        self.assertEqual(self.post(b'not an image', '', 'image/jpeg').status_code, 400)
+        self.assertEqual(self.post(b'\0' * 100, '?width=10&height=10&scale=0').status_code, 400)
+        self.assertEqual(self.post(b'\0' * 100, '?width=10&height=10&client=../x').status_code, 400)
+        self.detector.detect.assert_not_called()
+
+    def test_client_frames_are_tracked(self):
+        """With ?client= only keyframes run on the full frame; other frames search around the last face"""
+        frame = np.zeros((480, 640), dtype=np.uint8).tobytes()
+        shapes = []
+        self.detector.detect.side_effect = lambda image, profile=None: (
+            shapes.append(image.shape) or np.array([[100, 100, 80, 80]], dtype=np.int32))
+        for _ in range(3):
+            response = self.post(frame, '?width=640&height=480&client=kamera-1')
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(shapes[0], (480, 640))
+        self.assertTrue(all(shape[0] < 480 for shape in shapes[1:]))
+        self.assertEqual(len(self.frame_trackers), 1)
+        self.frame_trackers._clients.clear()
+
+
 if __name__ == '__main__':
     unittest.main()